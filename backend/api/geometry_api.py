@@ -0,0 +1,57 @@
+import math
+from flask import Blueprint, request, jsonify
+from thong_tin.geometry_service import GeometryService, MIN_ZOOM, MAX_ZOOM
+from thong_tin.data_validator import validate_coordinates
+from config import Config
+from utils.logger import logger
+
+geometry_bp = Blueprint('geometry', __name__)
+
+@geometry_bp.route('/route-geometry', methods=['POST'])
+def route_geometry():
+    """
+    Hình dạng đường đi của một tour đã giải
+    Payload: {"points": [...], "route": [0, 2, 1, 0] (tùy chọn, mặc định theo thứ tự points), "zoom": 13}
+    """
+    try:
+        data = request.get_json()
+        points = data.get("points", [])
+
+        is_valid, error_message = validate_coordinates(points)
+        if not is_valid:
+            return jsonify({'success': False, 'error': error_message}), 400
+
+        route = data.get("route")
+        if route is None:
+            route = list(range(len(points)))
+        if not isinstance(route, list) or len(route) < 2 or \
+                not all(isinstance(v, int) and 0 <= v < len(points) for v in route):
+            return jsonify({'success': False, 'error': "Dữ liệu không hợp lệ: 'route' phải là danh sách chỉ số của 'points'."}), 400
+
+        zoom = data.get("zoom", Config.GEOMETRY_DEFAULT_ZOOM)
+        # bool là lớp con của int, NaN/Infinity qua được json nên phải loại riêng
+        if isinstance(zoom, bool) or not isinstance(zoom, (int, float)) or \
+                not math.isfinite(zoom) or not MIN_ZOOM <= zoom <= MAX_ZOOM:
+            return jsonify({'success': False, 'error': f"Dữ liệu không hợp lệ: 'zoom' phải là số trong khoảng {MIN_ZOOM}–{MAX_ZOOM}."}), 400
+
+        ordered = [points[v] for v in route]
+        geometry = GeometryService.get_route_geometry(ordered, zoom)
+
+        return jsonify({
+            'success': True,
+            'polyline': geometry['polyline'],
+            'distance': round(geometry['distance'] / 1000.0, 2),
+            'legs': [
+                {
+                    'from': route[t],
+                    'to': route[t + 1],
+                    'distance': round(leg['distance'] / 1000.0, 3),
+                    'fallback': leg['fallback']
+                }
+                for t, leg in enumerate(geometry['legs'])
+            ]
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error in route_geometry: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
@@ -0,0 +1,95 @@
+import json
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from api.route_api import build_route_response, previous_from_payload, remember_route, solve_options_from_payload
+from thuat_toan.job_manager import JobManager, JobStoreFull
+from thuat_toan.solver import RouteSolver
+from thong_tin.data_validator import validate_coordinates
+from config import Config
+from utils.logger import logger
+
+job_bp = Blueprint('jobs', __name__)
+
+job_manager = JobManager(
+    max_workers=Config.JOB_WORKERS,
+    max_jobs=Config.JOB_MAX_ENTRIES,
+    result_ttl=Config.JOB_RESULT_TTL
+)
+
+def _run_solve(job):
+    params = job.params
+    solver = RouteSolver(consider_traffic=params.get("consider_traffic", True))
+    result = solver.solve_from_coordinates(
+        params["points"],
+        on_progress=job.report_progress,
+        cancel_event=job.cancel_event,
+        previous=previous_from_payload(params),
+        decomposition=params.get("decomposition"),
+        **solve_options_from_payload(params)
+    )
+    remember_route(params["points"], result)
+    return build_route_response(result)
+
+@job_bp.route('/jobs', methods=['POST'])
+def create_job():
+    try:
+        data = request.get_json()
+        points = data.get("points", [])
+
+        is_valid, error_message = validate_coordinates(points)
+        if not is_valid:
+            return jsonify({'success': False, 'error': error_message}), 400
+
+        job = job_manager.submit(data, _run_solve)
+        return jsonify({'success': True, 'job_id': job.id, 'status': job.status}), 202
+
+    except JobStoreFull as e:
+        return jsonify({'success': False, 'error': str(e)}), 429
+    except Exception as e:
+        logger.error(f"Error in create_job: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@job_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Không tìm thấy job'}), 404
+    return jsonify({'success': True, **job.to_dict()}), 200
+
+@job_bp.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Không tìm thấy job'}), 404
+    return jsonify({'success': True, 'job_id': job.id, 'status': job.status}), 200
+
+@job_bp.route('/jobs/<job_id>/events', methods=['GET'])
+def stream_job(job_id):
+    """
+    Server-Sent Events: gửi tiến độ (best_distance, generation, route khi cải thiện)
+    mỗi khi job thay đổi, kết thúc bằng sự kiện 'done'
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Không tìm thấy job'}), 404
+
+    def events():
+        version = -1
+        while True:
+            new_version = job.wait_for_change(version, timeout=Config.JOB_SSE_KEEPALIVE)
+            if new_version == version:
+                # Giữ kết nối khi chưa có cập nhật
+                yield ": keep-alive\n\n"
+                continue
+            version = new_version
+            state = job.to_dict()
+            if state['status'] in ('succeeded', 'failed', 'cancelled'):
+                yield f"event: done\ndata: {json.dumps(state, ensure_ascii=False)}\n\n"
+                return
+            payload = {'status': state['status'], **state['progress']}
+            yield f"event: progress\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
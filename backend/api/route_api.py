@@ -1,40 +1,189 @@
+import json
+import time
 from flask import Blueprint, request, jsonify
 from thuat_toan.solver import RouteSolver
+from thuat_toan.batch_solver import solve_batch
+from thuat_toan.route_store import RouteStore
+from thuat_toan.worker_pool import DeadlineExceeded, PoolSaturated
 from thong_tin.data_validator import validate_coordinates
+from config import Config
 from utils.logger import logger
+from utils.profiling import RequestProfile
 
 route_bp = Blueprint('route', __name__)
 
+route_store = RouteStore(
+    max_entries=Config.ROUTE_STORE_MAX_ENTRIES,
+    ttl=Config.ROUTE_STORE_TTL,
+    matrix_max_n=Config.ROUTE_STORE_MATRIX_MAX_N
+)
+
+def solve_options_from_payload(data):
+    """
+    Đọc các tham số của solver từ payload JSON (dùng chung cho /multi-route và /jobs)
+    """
+    return {
+        # None: để planner chọn theo N và thời gian mục tiêu
+        'ga_population_size': data.get("ga_population_size"),
+        'ga_generations': data.get("ga_generations"),
+        'ga_islands': data.get("ga_islands", Config.GA_ISLANDS),
+        'ga_migration_interval': data.get("ga_migration_interval", Config.GA_MIGRATION_INTERVAL),
+        'seed': data.get("seed"),
+        'time_limit_ms': data.get("time_limit_ms"),
+        'stall_generations': data.get("stall_generations"),
+        'stall_time_ms': data.get("stall_time_ms")
+    }
+
+def previous_from_payload(data):
+    """
+    Lời giải trước để warm start: 'previous_route_id' (route_id của response trước)
+    hoặc cặp 'previous_points' + 'previous_route'. Dữ liệu không hợp lệ thì giải lại từ đầu
+    """
+    route_id = data.get("previous_route_id")
+    if route_id:
+        previous = route_store.get(str(route_id))
+        if previous is None:
+            logger.info(f"previous_route_id {route_id} not found, solving from scratch")
+        return previous
+
+    points = data.get("previous_points")
+    route = data.get("previous_route")
+    if not points or not route:
+        return None
+    is_valid, _ = validate_coordinates(points)
+    if not is_valid or not isinstance(route, list):
+        return None
+    if not all(isinstance(v, int) and 0 <= v < len(points) for v in route):
+        return None
+    return {'points': points, 'route': route, 'matrix': None}
+
+def remember_route(points, result):
+    """
+    Lưu lời giải vào route_store và gắn 'route_id' vào kết quả (bỏ ma trận khỏi kết quả)
+    """
+    matrix = result.pop('matrix', None)
+    if result.get('route'):
+        result['route_id'] = route_store.save(points, result['route'], matrix)
+    return result
+
+def request_deadline():
+    """Thời hạn của request hiện tại (time.time()), None nếu SOLVER_DEADLINE_MS = 0"""
+    if not Config.SOLVER_DEADLINE_MS:
+        return None
+    return time.time() + Config.SOLVER_DEADLINE_MS / 1000.0
+
+def overload_response(error, status):
+    """Response 429 / 503 khi quá tải hoặc quá hạn, kèm Retry-After"""
+    response = jsonify({'success': False, 'error': str(error)})
+    response.headers['Retry-After'] = '1'
+    return response, status
+
+def build_route_response(result):
+    """
+    Chuẩn hóa kết quả của RouteSolver thành response JSON
+    """
+    return {
+        'success': True,
+        'route': result.get('route', []),
+        'distance': result.get('distance', 0),
+        'message': result.get('message', 'Thành công'),
+        'generations': result.get('generations', 0),
+        'stop_reason': result.get('stop_reason'),
+        'optimality_gap': result.get('optimality_gap'),
+        'merged_stops': result.get('merged_stops', 0),
+        'plan': result.get('plan'),
+        'estimated_matrix': result.get('estimated_matrix', False),
+        'route_id': result.get('route_id')
+    }
+
 @route_bp.route('/multi-route', methods=['POST'])
 def find_multi_route():
     try:
+        deadline = request_deadline()
         data = request.get_json()
         points = data.get("points", [])
-        
-        is_valid, error_message = validate_coordinates(points)
+        # profile: true -> trả thêm thời gian từng giai đoạn, top hàm và bản ghi hội tụ
+        profile = RequestProfile() if data.get("profile") else None
+
+        if profile is None:
+            is_valid, error_message = validate_coordinates(points)
+        else:
+            with profile.phase('validate'):
+                is_valid, error_message = validate_coordinates(points)
         if not is_valid:
             return jsonify({'success': False, 'error': error_message}), 400
-        
+
         consider_traffic = data.get("consider_traffic", True)
-        ga_population_size = data.get("ga_population_size", 100)
-        ga_generations = data.get("ga_generations", 500)
-        
+
         solver = RouteSolver(consider_traffic=consider_traffic)
         result = solver.solve_from_coordinates(
             points,
-            ga_population_size=ga_population_size,
-            ga_generations=ga_generations
+            previous=previous_from_payload(data),
+            profile=profile,
+            deadline=deadline,
+            decomposition=data.get("decomposition"),
+            **solve_options_from_payload(data)
         )
-        
+        remember_route(points, result)
+
         # Format response
-        response = {
-            'success': True,
-            'route': result.get('route', []),
-            'distance': result.get('distance', 0),
-            'message': result.get('message', 'Thành công')
-        }
+        response = build_route_response(result)
+        if profile is not None:
+            with profile.phase('serialize'):
+                json.dumps(response)
+            response['profile'] = profile.to_dict()
         return jsonify(response), 200
-    
+
+    except PoolSaturated as e:
+        return overload_response(e, 429)
+    except DeadlineExceeded as e:
+        logger.error(f"find_multi_route: {str(e)}")
+        return overload_response(e, 503)
     except Exception as e:
         logger.error(f"Error in find_multi_route: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
+
+@route_bp.route('/multi-route/batch', methods=['POST'])
+def find_multi_route_batch():
+    """
+    Giải nhiều tập điểm trong một request
+    Payload: {"instances": [{"points": [...]}, ...], <tham số solver dùng chung>}
+    """
+    try:
+        deadline = request_deadline()
+        data = request.get_json()
+        instances = data.get("instances", [])
+
+        if not instances or not isinstance(instances, list):
+            return jsonify({'success': False, 'error': "Dữ liệu không hợp lệ: 'instances' phải là một danh sách."}), 400
+        if len(instances) > Config.BATCH_MAX_INSTANCES:
+            return jsonify({'success': False, 'error': f"Tối đa {Config.BATCH_MAX_INSTANCES} bài toán mỗi request."}), 400
+
+        point_sets = []
+        for i, instance in enumerate(instances):
+            points = instance.get("points", []) if isinstance(instance, dict) else None
+            is_valid, error_message = validate_coordinates(points)
+            if not is_valid:
+                return jsonify({'success': False, 'error': f"Bài toán thứ {i+1}: {error_message}"}), 400
+            point_sets.append(points)
+
+        options = solve_options_from_payload(data)
+        options.pop('ga_islands', None)  # mỗi bài toán chạy trong một worker của pool
+        results = solve_batch(point_sets, options, deadline=deadline)
+
+        return jsonify({
+            'success': True,
+            'results': [
+                {'success': False, 'error': r['error']} if 'error' in r else build_route_response(r)
+                for r in results
+            ]
+        }), 200
+
+    except PoolSaturated as e:
+        return overload_response(e, 429)
+    except DeadlineExceeded as e:
+        logger.error(f"find_multi_route_batch: {str(e)}")
+        return overload_response(e, 503)
+    except Exception as e:
+        logger.error(f"Error in find_multi_route_batch: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
@@ -3,6 +3,8 @@
 """
 from flask import Flask
 from api.route_api import route_bp
+from api.job_api import job_bp
+from api.geometry_api import geometry_bp
 
 def register_routes(app: Flask):
     """
@@ -12,4 +14,6 @@ def register_routes(app: Flask):
         app: Flask app instance
     """
     app.register_blueprint(route_bp, url_prefix='/api')
+    app.register_blueprint(job_bp, url_prefix='/api')
+    app.register_blueprint(geometry_bp, url_prefix='/api')
 
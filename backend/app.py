@@ -5,21 +5,43 @@ backend_dir = os.path.dirname(os.path.abspath(__file__))
 if backend_dir not in sys.path:
     sys.path.insert(0, backend_dir)
 
-from flask import Flask
+import time
+from flask import Flask, Response, g, request
 from flask_cors import CORS
 from config import Config
 from api.routes import register_routes
 from utils.logger import logger
+from utils import metrics
 
 def create_app():
     app = Flask(__name__)
     CORS(app, origins=Config.CORS_ORIGINS)
     register_routes(app)
     
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+    
+    @app.after_request
+    def record_latency(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            metrics.REQUEST_LATENCY.observe(
+                time.perf_counter() - started,
+                endpoint=request.endpoint or 'unknown',
+                method=request.method,
+                status=response.status_code
+            )
+        return response
+    
     @app.route('/health', methods=['GET'])
     def health():
         return {'status': 'ok', 'service': 'route-finder'}, 200
     
+    @app.route('/metrics', methods=['GET'])
+    def prometheus_metrics():
+        return Response(metrics.registry.render(), mimetype=metrics.CONTENT_TYPE)
+    
     logger.info("Flask app initialized")
     
     return app
@@ -0,0 +1,3 @@
+"""
+Bộ benchmark offline cho các thuật toán (không gọi OSRM)
+"""
@@ -0,0 +1,45 @@
+"""
+Sinh bài toán tổng hợp (có seed) dạng ma trận khoảng cách (mét)
+"""
+import numpy as np
+
+AREA_METERS = 20000.0  # kích thước vùng sinh điểm (20km x 20km)
+
+def _euclidean(xy):
+    delta = xy[:, None, :] - xy[None, :, :]
+    return np.sqrt((delta ** 2).sum(axis=2))
+
+def uniform_instance(n, seed=0):
+    """Điểm phân bố đều trong vùng"""
+    rng = np.random.default_rng(seed)
+    xy = rng.random((n, 2)) * AREA_METERS
+    return _euclidean(xy)
+
+def clustered_instance(n, seed=0, clusters=None):
+    """Điểm tập trung quanh một số cụm (khu dân cư, khu công nghiệp)"""
+    rng = np.random.default_rng(seed)
+    clusters = clusters or max(2, n // 25)
+    centers = rng.random((clusters, 2)) * AREA_METERS
+    labels = rng.integers(0, clusters, size=n)
+    xy = centers[labels] + rng.normal(scale=AREA_METERS / 40.0, size=(n, 2))
+    return _euclidean(xy)
+
+def city_instance(n, seed=0):
+    """
+    Mô phỏng đường phố: khoảng cách Manhattan trên lưới, hệ số đường vòng ngẫu nhiên
+    và bất đối xứng nhẹ (đường một chiều) như ma trận OSRM thực tế
+    """
+    rng = np.random.default_rng(seed)
+    block = 150.0
+    xy = np.round(rng.random((n, 2)) * AREA_METERS / block) * block
+    manhattan = np.abs(xy[:, None, :] - xy[None, :, :]).sum(axis=2)
+    detour = 1.0 + 0.3 * rng.random((n, n))
+    matrix = manhattan * detour + 50.0
+    np.fill_diagonal(matrix, 0.0)
+    return matrix
+
+GENERATORS = {
+    'uniform': uniform_instance,
+    'clustered': clustered_instance,
+    'city': city_instance,
+}
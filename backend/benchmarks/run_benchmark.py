@@ -0,0 +1,203 @@
+"""
+Benchmark offline cho held_karp, genetic_algorithm và two_opt
+
+Ví dụ (chạy trong thư mục backend):
+    python -m benchmarks.run_benchmark --sizes 10 16 50 100 --output bench.json
+    python -m benchmarks.run_benchmark --tsplib data/berlin52.tsp --baseline bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import numpy as np
+from benchmarks.instances import GENERATORS
+from benchmarks.tsplib import load_tsplib
+from thuat_toan.algorithms.genetic_algorithm import calculate_route_distance, genetic_algorithm, two_opt
+from thuat_toan.algorithms.held_karp import held_karp
+from thuat_toan.algorithms.branch_and_bound import branch_and_bound
+from thuat_toan.algorithms.local_search import iterated_local_search
+
+def _closed_length(matrix, route):
+    # Route của held_karp / GA đã có điểm quay về ở cuối
+    if len(route) > 1 and route[0] == route[-1]:
+        route = route[:-1]
+    return float(calculate_route_distance(matrix, route))
+
+def _run_held_karp(matrix, args):
+    return _closed_length(matrix, held_karp(matrix)['route'])
+
+def _run_branch_and_bound(matrix, args):
+    return _closed_length(matrix, branch_and_bound(matrix)['route'])
+
+def _run_genetic_algorithm(matrix, args):
+    n = len(matrix)
+    result = genetic_algorithm(matrix, list(range(n)), population_size=args.population,
+                               generations=args.generations, seed=args.seed,
+                               stall_generations=args.stall_generations,
+                               seed_fraction=args.seed_fraction, improvement=args.improvement)
+    return _closed_length(matrix, result['route'])
+
+def _run_two_opt(matrix, args):
+    n = len(matrix)
+    rng = np.random.default_rng(args.seed)
+    route = [0] + (rng.permutation(n - 1) + 1).tolist()
+    return _closed_length(matrix, two_opt(matrix, route))
+
+def _run_iterated_local_search(matrix, args):
+    n = len(matrix)
+    result = iterated_local_search(matrix, list(range(n)), seed=args.seed,
+                                   max_iterations=args.ils_iterations)
+    return _closed_length(matrix, result['route'])
+
+ALGORITHMS = {
+    'held_karp': _run_held_karp,
+    'branch_and_bound': _run_branch_and_bound,
+    'genetic_algorithm': _run_genetic_algorithm,
+    'two_opt': _run_two_opt,
+    'iterated_local_search': _run_iterated_local_search,
+}
+
+def measure(fn, with_memory):
+    """Chạy fn: đo thời gian (không bật tracemalloc), sau đó chạy lại để đo bộ nhớ đỉnh"""
+    started = time.perf_counter()
+    value = fn()
+    elapsed = time.perf_counter() - started
+
+    peak_mb = None
+    if with_memory:
+        tracemalloc.start()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak_mb = peak / (1024 * 1024)
+    return value, elapsed, peak_mb
+
+def load_instances(args):
+    instances = []
+    for path in args.tsplib:
+        data = load_tsplib(path)
+        instances.append({'instance': data['name'], 'kind': 'tsplib', 'n': data['n'],
+                          'matrix': data['matrix'], 'optimum': data['optimum']})
+    for kind in args.kinds:
+        for n in args.sizes:
+            matrix = GENERATORS[kind](n, seed=args.seed)
+            instances.append({'instance': f"{kind}-{n}-s{args.seed}", 'kind': kind, 'n': n,
+                              'matrix': matrix, 'optimum': None})
+    return instances
+
+def run(args):
+    results = []
+    for inst in load_instances(args):
+        matrix = inst['matrix'].astype(np.float32)
+        rows = []
+        for name in args.algorithms:
+            if name == 'held_karp' and inst['n'] > args.held_karp_max:
+                continue
+            if name == 'branch_and_bound' and inst['n'] > args.branch_and_bound_max:
+                continue
+            distance, elapsed, peak_mb = measure(lambda: ALGORITHMS[name](matrix, args),
+                                                 not args.no_memory)
+            rows.append({'instance': inst['instance'], 'kind': inst['kind'], 'n': inst['n'],
+                         'algorithm': name, 'time_s': elapsed, 'peak_memory_mb': peak_mb,
+                         'distance': distance})
+
+        # Tham chiếu: tối ưu đã biết, kết quả Held-Karp / branch-and-bound (chính xác)
+        # hoặc tốt nhất đã tìm được
+        optimum = inst['optimum']
+        reference = 'known_optimum'
+        if optimum is None:
+            exact = [(r['distance'], r['algorithm']) for r in rows
+                     if r['algorithm'] in ('held_karp', 'branch_and_bound')]
+            if exact:
+                optimum, reference = exact[0]
+            elif rows:
+                optimum, reference = min(r['distance'] for r in rows), 'best_found'
+        for r in rows:
+            r['optimum'] = optimum
+            r['reference'] = reference
+            r['gap'] = (r['distance'] - optimum) / optimum if optimum else None
+            print(f"{r['instance']:<24} {r['algorithm']:<22} n={r['n']:<5} "
+                  f"time={r['time_s']:.4f}s "
+                  f"mem={'-' if r['peak_memory_mb'] is None else format(r['peak_memory_mb'], '.2f')}MB "
+                  f"gap={'-' if r['gap'] is None else format(r['gap'] * 100, '.2f')}%")
+        results.extend(rows)
+    return results
+
+def compare(results, baseline, time_tolerance, gap_tolerance):
+    """So sánh với baseline, trả về danh sách mô tả các regression"""
+    base = {(r['instance'], r['algorithm']): r for r in baseline['results']}
+    regressions = []
+    for r in results:
+        b = base.get((r['instance'], r['algorithm']))
+        if b is None:
+            continue
+        # Bỏ qua dao động nhỏ hơn 50ms
+        if r['time_s'] > b['time_s'] * (1 + time_tolerance) and r['time_s'] - b['time_s'] > 0.05:
+            regressions.append(f"{r['instance']} / {r['algorithm']}: time "
+                               f"{b['time_s']:.4f}s -> {r['time_s']:.4f}s")
+        if r['gap'] is not None and b.get('gap') is not None and r['gap'] > b['gap'] + gap_tolerance:
+            regressions.append(f"{r['instance']} / {r['algorithm']}: gap "
+                               f"{b['gap'] * 100:.2f}% -> {r['gap'] * 100:.2f}%")
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark thuật toán TSP (offline)")
+    parser.add_argument('--tsplib', nargs='*', default=[], help="Các file .tsp")
+    parser.add_argument('--kinds', nargs='*', default=list(GENERATORS), choices=list(GENERATORS))
+    parser.add_argument('--sizes', nargs='*', type=int, default=[10, 16, 50, 100, 200])
+    parser.add_argument('--algorithms', nargs='*', default=list(ALGORITHMS), choices=list(ALGORITHMS))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--population', type=int, default=100)
+    parser.add_argument('--generations', type=int, default=200)
+    parser.add_argument('--stall-generations', type=int, default=0)
+    parser.add_argument('--seed-fraction', type=float, default=0.2, help="Tỉ lệ quần thể gieo bằng heuristic")
+    parser.add_argument('--improvement', default='two_opt', choices=['two_opt', 'local_search'])
+    parser.add_argument('--ils-iterations', type=int, default=200, help="Số lần nhiễu của ILS")
+    parser.add_argument('--held-karp-max', type=int, default=16)
+    parser.add_argument('--branch-and-bound-max', type=int, default=30)
+    parser.add_argument('--no-memory', action='store_true', help="Không đo bộ nhớ đỉnh")
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--baseline', help="File JSON kết quả cũ để so sánh")
+    parser.add_argument('--time-tolerance', type=float, default=0.25, help="Cho phép chậm hơn 25%%")
+    parser.add_argument('--gap-tolerance', type=float, default=0.01, help="Cho phép gap tăng 1 điểm %%")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run(args)
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'args': vars(args)
+        },
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved {len(results)} results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.time_tolerance, args.gap_tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print("No regressions against baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
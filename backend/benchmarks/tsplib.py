@@ -0,0 +1,118 @@
+"""
+Đọc file TSPLIB (.tsp) thành ma trận khoảng cách
+"""
+import math
+import os
+import re
+import numpy as np
+
+_HEADER = re.compile(r'^[A-Z_]+\s*:')
+
+# Giá trị tối ưu đã biết của một số bài toán TSPLIB phổ biến
+KNOWN_OPTIMA = {
+    'burma14': 3323, 'ulysses16': 6859, 'gr17': 2085, 'gr21': 2707, 'ulysses22': 7013,
+    'gr24': 1272, 'fri26': 937, 'bayg29': 1610, 'bays29': 2020, 'dantzig42': 699,
+    'att48': 10628, 'eil51': 426, 'berlin52': 7542, 'st70': 675, 'eil76': 538,
+    'pr76': 108159, 'rat99': 1211, 'kroA100': 21282, 'kroB100': 22141, 'eil101': 629,
+    'lin105': 14379, 'ch130': 6110, 'ch150': 6528, 'a280': 2579, 'pr1002': 259045,
+}
+
+def _geo_radians(value):
+    degrees = int(value)
+    minutes = value - degrees
+    return math.pi * (degrees + 5.0 * minutes / 3.0) / 180.0
+
+def _coordinate_matrix(coords, weight_type):
+    n = len(coords)
+    matrix = np.zeros((n, n))
+    if weight_type == 'GEO':
+        rrr = 6378.388
+        lat = [_geo_radians(x) for x, _ in coords]
+        lng = [_geo_radians(y) for _, y in coords]
+        for i in range(n):
+            for j in range(n):
+                if i == j:
+                    continue
+                q1 = math.cos(lng[i] - lng[j])
+                q2 = math.cos(lat[i] - lat[j])
+                q3 = math.cos(lat[i] + lat[j])
+                matrix[i, j] = int(rrr * math.acos(0.5 * ((1.0 + q1) * q2 - (1.0 - q1) * q3)) + 1.0)
+        return matrix
+
+    xy = np.asarray(coords, dtype=float)
+    delta = xy[:, None, :] - xy[None, :, :]
+    if weight_type == 'ATT':
+        r = np.sqrt((delta ** 2).sum(axis=2) / 10.0)
+        t = np.floor(r + 0.5)
+        return np.where(t < r, t + 1, t)
+    euclid = np.sqrt((delta ** 2).sum(axis=2))
+    if weight_type == 'CEIL_2D':
+        return np.ceil(euclid)
+    if weight_type == 'EUC_2D':
+        return np.floor(euclid + 0.5)
+    raise ValueError(f"EDGE_WEIGHT_TYPE không được hỗ trợ: {weight_type}")
+
+def _explicit_matrix(values, n, weight_format):
+    if weight_format == 'FULL_MATRIX':
+        return np.asarray(values[:n * n], dtype=float).reshape(n, n)
+    matrix = np.zeros((n, n))
+    it = iter(values)
+    for i in range(n):
+        if weight_format == 'UPPER_ROW':
+            cols = range(i + 1, n)
+        elif weight_format == 'LOWER_ROW':
+            cols = range(0, i)
+        elif weight_format == 'UPPER_DIAG_ROW':
+            cols = range(i, n)
+        elif weight_format == 'LOWER_DIAG_ROW':
+            cols = range(0, i + 1)
+        else:
+            raise ValueError(f"EDGE_WEIGHT_FORMAT không được hỗ trợ: {weight_format}")
+        for j in cols:
+            matrix[i, j] = matrix[j, i] = float(next(it))
+    return matrix
+
+def load_tsplib(path):
+    """
+    Returns:
+        dict: name, n, matrix (np.ndarray), optimum (None nếu không biết)
+    """
+    header = {}
+    coords = []
+    weights = []
+    section = None
+
+    with open(path) as f:
+        for raw in f:
+            line = raw.strip()
+            if not line or line == 'EOF':
+                continue
+            if line in ('NODE_COORD_SECTION', 'EDGE_WEIGHT_SECTION', 'DISPLAY_DATA_SECTION'):
+                section = line
+                continue
+            if _HEADER.match(line):
+                key, value = line.split(':', 1)
+                header[key.strip()] = value.strip()
+                section = None
+                continue
+            if section == 'NODE_COORD_SECTION':
+                _, x, y = line.split()[:3]
+                coords.append((float(x), float(y)))
+            elif section == 'EDGE_WEIGHT_SECTION':
+                weights.extend(line.split())
+
+    name = header.get('NAME', os.path.splitext(os.path.basename(path))[0])
+    n = int(header['DIMENSION'])
+    weight_type = header.get('EDGE_WEIGHT_TYPE', 'EUC_2D')
+
+    if weight_type == 'EXPLICIT':
+        matrix = _explicit_matrix(weights, n, header.get('EDGE_WEIGHT_FORMAT', 'FULL_MATRIX'))
+    else:
+        matrix = _coordinate_matrix(coords, weight_type)
+
+    return {
+        'name': name,
+        'n': n,
+        'matrix': matrix,
+        'optimum': KNOWN_OPTIMA.get(name)
+    }
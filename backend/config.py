@@ -8,21 +8,100 @@ class Config:
     Cấu hình chính
     """
     # Flask config
-    DEBUG = os.getenv('DEBUG', 'True').lower() == 'true'
+    DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
     HOST = os.getenv('HOST', '0.0.0.0')
     PORT = int(os.getenv('PORT', 5000))
+    SERVER_THREADS = int(os.getenv('SERVER_THREADS', 16))  # số thread của waitress (wsgi.py)
     
     # Algorithm config
     GA_POPULATION_SIZE = int(os.getenv('GA_POPULATION_SIZE', 100))
-    GA_GENERATIONS = int(os.getenv('GA_GENERATIONS', 500))
+    GA_GENERATIONS = int(os.getenv('GA_GENERATIONS', 150))
     GA_MUTATION_RATE = float(os.getenv('GA_MUTATION_RATE', 0.1))
     GA_ELITE_SIZE = int(os.getenv('GA_ELITE_SIZE', 5))
+    GA_SEED_FRACTION = float(os.getenv('GA_SEED_FRACTION', 0.2))  # tỉ lệ quần thể gieo bằng heuristic (NN, greedy, insertion)
+    GA_TIME_LIMIT_MS = int(os.getenv('GA_TIME_LIMIT_MS', 0))  # 0: không giới hạn thời gian
+    GA_STALL_GENERATIONS = int(os.getenv('GA_STALL_GENERATIONS', 50))  # dừng khi không cải thiện sau N thế hệ (0: tắt)
+    GA_STALL_TIME_MS = int(os.getenv('GA_STALL_TIME_MS', 0))  # dừng khi không cải thiện sau T ms (0: tắt)
+    GA_ISLANDS = int(os.getenv('GA_ISLANDS', 1))  # > 1: chạy island model song song trên nhiều tiến trình
+    GA_MIGRATION_INTERVAL = int(os.getenv('GA_MIGRATION_INTERVAL', 50))  # số thế hệ giữa 2 lần trao đổi
+    GA_MIGRATION_SIZE = int(os.getenv('GA_MIGRATION_SIZE', 2))  # số cá thể tốt nhất gửi sang đảo kế tiếp
+    SOLVER_WORKERS = int(os.getenv('SOLVER_WORKERS', 0))  # 0: bằng số lõi CPU
+    SOLVER_USE_PROCESS_POOL = os.getenv('SOLVER_USE_PROCESS_POOL', 'True').lower() == 'true'  # giải /multi-route trên process pool
+    SOLVER_QUEUE_SIZE = int(os.getenv('SOLVER_QUEUE_SIZE', -1))  # số bài chờ tối đa khi mọi worker bận (-1: bằng số worker), đầy -> 429
+    SOLVER_DEADLINE_MS = int(os.getenv('SOLVER_DEADLINE_MS', 30000))  # thời hạn mỗi request (0: tắt), quá hạn -> 503
+    HELD_KARP_MAX_N = min(int(os.getenv('HELD_KARP_MAX_N', 16)), 20)  # N <= giá trị này: Held-Karp (tối đa 20)
+    BRANCH_AND_BOUND_MAX_N = int(os.getenv('BRANCH_AND_BOUND_MAX_N', 30))  # HELD_KARP_MAX_N < N <= giá trị này: branch-and-bound chính xác (0: tắt)
+    BRANCH_AND_BOUND_TIME_MS = int(os.getenv('BRANCH_AND_BOUND_TIME_MS', 5000))  # hết giờ thì trả về lời giải tốt nhất kèm optimality_gap
+    PLANNER_ENABLED = os.getenv('PLANNER_ENABLED', 'True').lower() == 'true'  # tự chọn thuật toán / tham số theo mô hình chi phí đã hiệu chỉnh
+    PLANNER_TARGET_MS = int(os.getenv('PLANNER_TARGET_MS', 2000))  # thời gian mục tiêu cho cả request khi request không có time_limit_ms
+    PLANNER_CALIBRATION_PATH = os.getenv('PLANNER_CALIBRATION_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'planner_calibration.json'))  # rỗng: đo lại mỗi lần khởi động
+    GA_IMPROVEMENT = os.getenv('GA_IMPROVEMENT', 'two_opt')  # toán tử cải thiện trong GA: two_opt, local_search
+    LOCAL_SEARCH_MIN_N = int(os.getenv('LOCAL_SEARCH_MIN_N', 300))  # N >= giá trị này: Iterated Local Search thay cho GA (0: tắt)
+    LOCAL_SEARCH_TIME_MS = int(os.getenv('LOCAL_SEARCH_TIME_MS', 5000))  # thời gian tối đa của ILS khi request không có time_limit_ms
+    LOCAL_SEARCH_STALL_ITERATIONS = int(os.getenv('LOCAL_SEARCH_STALL_ITERATIONS', 1000))  # dừng ILS khi không cải thiện sau N lần nhiễu
+    DECOMPOSITION_MIN_N = int(os.getenv('DECOMPOSITION_MIN_N', 1000))  # N >= giá trị này: phân cụm rồi giải từng cụm (0: tắt)
+    DECOMPOSITION_CLUSTER_SIZE = int(os.getenv('DECOMPOSITION_CLUSTER_SIZE', 0))  # số điểm mỗi cụm (0: tự chọn theo N và số worker)
+    DECOMPOSITION_MAX_CLUSTER_SIZE = int(os.getenv('DECOMPOSITION_MAX_CLUSTER_SIZE', 150))  # giới hạn trên khi tự chọn kích thước cụm
+    
+    # Stop merge config
+    STOP_MERGE_RADIUS_M = float(os.getenv('STOP_MERGE_RADIUS_M', 5))  # gộp các điểm cách nhau không quá R mét trước khi giải (0: chỉ gộp điểm trùng tọa độ, < 0: tắt)
+    
+    # Warm start config
+    WARM_START_MAX_CHANGE = float(os.getenv('WARM_START_MAX_CHANGE', 0.3))  # tỉ lệ điểm mới tối đa để sửa tour cũ thay vì giải lại
+    ROUTE_STORE_MAX_ENTRIES = int(os.getenv('ROUTE_STORE_MAX_ENTRIES', 200))  # số lời giải giữ lại cho warm start (route_id)
+    ROUTE_STORE_TTL = int(os.getenv('ROUTE_STORE_TTL', 3600))  # giây
+    ROUTE_STORE_MATRIX_MAX_N = int(os.getenv('ROUTE_STORE_MATRIX_MAX_N', 500))  # chỉ giữ ma trận khi số điểm <= giá trị này
+    
+    # Result cache config
+    RESULT_CACHE_ENABLED = os.getenv('RESULT_CACHE_ENABLED', 'True').lower() == 'true'  # dùng lại kết quả / gộp các request giải trùng nhau
+    RESULT_CACHE_MAX_ENTRIES = int(os.getenv('RESULT_CACHE_MAX_ENTRIES', 500))  # số kết quả giữ lại
+    RESULT_CACHE_TTL = int(os.getenv('RESULT_CACHE_TTL', 600))  # giây
+    RESULT_CACHE_SEED = int(os.getenv('RESULT_CACHE_SEED', 0))  # seed dùng khi request không có seed (kết quả tái lập được)
+    
+    # Batch config
+    BATCH_MAX_INSTANCES = int(os.getenv('BATCH_MAX_INSTANCES', 100))  # số bài toán tối đa mỗi request batch
+    
+    # Async job config
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))  # số job giải chạy đồng thời
+    JOB_MAX_ENTRIES = int(os.getenv('JOB_MAX_ENTRIES', 200))  # số job tối đa lưu trong bộ nhớ
+    JOB_RESULT_TTL = int(os.getenv('JOB_RESULT_TTL', 600))  # giây giữ kết quả sau khi job xong
+    JOB_SSE_KEEPALIVE = float(os.getenv('JOB_SSE_KEEPALIVE', 15))  # giây giữa các keep-alive SSE
     
     # Map config
     CONSIDER_TRAFFIC = os.getenv('CONSIDER_TRAFFIC', 'True').lower() == 'true'
     USE_OSM = os.getenv('USE_OSM', 'True').lower() == 'true'
     OSM_PLACE = os.getenv('OSM_PLACE', 'Hanoi, Vietnam')
     OSM_NETWORK_TYPE = os.getenv('OSM_NETWORK_TYPE', 'drive')  # drive, walk, bike, all
+    OSM_GRAPH_PATH = os.getenv('OSM_GRAPH_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'osm', '_'.join(OSM_PLACE.lower().replace(',', ' ').split()) + '.osm'))  # file .osm của OSM_PLACE, không có thì dùng OSRM API
+    
+    # OSRM request config
+    OSRM_TIMEOUT = float(os.getenv('OSRM_TIMEOUT', 40))  # giây, cho mỗi tile
+    OSRM_TILE_SIZE = int(os.getenv('OSRM_TILE_SIZE', 50))  # số hàng/cột tối đa mỗi request Table API
+    OSRM_MAX_WORKERS = int(os.getenv('OSRM_MAX_WORKERS', 8))  # số tile gọi đồng thời
+    OSRM_TILE_RETRIES = int(os.getenv('OSRM_TILE_RETRIES', 2))
+    OSRM_BACKENDS = [url.strip() for url in os.getenv('OSRM_BACKENDS', 'http://router.project-osrm.org').split(',') if url.strip()]  # danh sách máy chủ OSRM theo thứ tự ưu tiên, cách nhau bởi dấu phẩy
+    OSRM_LATENCY_WINDOW = int(os.getenv('OSRM_LATENCY_WINDOW', 100))  # số request gần nhất dùng để tính p95 độ trễ của mỗi máy
+    OSRM_HEDGE_DEFAULT_MS = int(os.getenv('OSRM_HEDGE_DEFAULT_MS', 1000))  # ngưỡng gửi request dự phòng khi chưa đủ mẫu độ trễ
+    OSRM_HEDGE_MIN_MS = int(os.getenv('OSRM_HEDGE_MIN_MS', 50))  # chặn dưới / trên của ngưỡng hedge (p95 của máy đầu)
+    OSRM_HEDGE_MAX_MS = int(os.getenv('OSRM_HEDGE_MAX_MS', 5000))
+    OSRM_CIRCUIT_FAILURES = int(os.getenv('OSRM_CIRCUIT_FAILURES', 3))  # số lỗi liên tiếp trước khi ngắt mạch một máy
+    OSRM_CIRCUIT_COOLDOWN = float(os.getenv('OSRM_CIRCUIT_COOLDOWN', 30))  # giây trước khi thử lại máy đã ngắt mạch
+    OSRM_FALLBACK_ENABLED = os.getenv('OSRM_FALLBACK_ENABLED', 'True').lower() == 'true'  # mọi máy đều lỗi: ước lượng ma trận theo đường chim bay
+    OSRM_FALLBACK_DETOUR = float(os.getenv('OSRM_FALLBACK_DETOUR', 1.3))  # hệ số nhân khoảng cách chim bay khi ước lượng
+    
+    # OSRM distance cache config
+    OSRM_CACHE_ENABLED = os.getenv('OSRM_CACHE_ENABLED', 'True').lower() == 'true'
+    OSRM_CACHE_PATH = os.getenv('OSRM_CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'osrm_distances.sqlite3'))  # rỗng: chỉ cache trong bộ nhớ
+    OSRM_CACHE_TTL = int(os.getenv('OSRM_CACHE_TTL', 7 * 24 * 3600))  # giây
+    OSRM_CACHE_MAX_ENTRIES = int(os.getenv('OSRM_CACHE_MAX_ENTRIES', 2000000))  # số ô tối đa trên đĩa
+    OSRM_CACHE_MEMORY_ENTRIES = int(os.getenv('OSRM_CACHE_MEMORY_ENTRIES', 200000))  # số ô tối đa trong bộ nhớ
+    OSRM_CACHE_PRECISION = int(os.getenv('OSRM_CACHE_PRECISION', 5))  # số chữ số thập phân khi lượng tử hóa tọa độ
+    
+    # Route geometry config
+    GEOMETRY_CACHE_ENTRIES = int(os.getenv('GEOMETRY_CACHE_ENTRIES', 20000))  # số chặng giữ geometry trong bộ nhớ
+    GEOMETRY_MAX_WAYPOINTS = int(os.getenv('GEOMETRY_MAX_WAYPOINTS', 50))  # số điểm tối đa mỗi request OSRM Route API
+    GEOMETRY_TOLERANCE_PX = float(os.getenv('GEOMETRY_TOLERANCE_PX', 1.0))  # sai số đơn giản hóa (pixel ở mức zoom yêu cầu)
+    GEOMETRY_DEFAULT_ZOOM = int(os.getenv('GEOMETRY_DEFAULT_ZOOM', 13))
     
     # API config
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', '*').split(',')
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from config import Config
+from thong_tin.distance_matrix import estimate_matrix
+from thong_tin.osrm_service import OSRMService
+from thuat_toan import batch_solver, worker_pool
+from thuat_toan.worker_pool import DeadlineExceeded
+
+POINTS = [{'lat': 21.0 + 0.01 * i, 'lng': 105.8 + 0.007 * (i % 3)} for i in range(6)]
+
+@pytest.fixture
+def inline(monkeypatch):
+    def no_pool():
+        raise AssertionError('batch must not use the pool when SOLVER_USE_PROCESS_POOL is off')
+
+    def matrix(points, info=None, **_):
+        index = list(range(len(points)))
+        return estimate_matrix(points, index, index)
+
+    monkeypatch.setattr(Config, 'SOLVER_USE_PROCESS_POOL', False)
+    monkeypatch.setattr(worker_pool, 'get_process_pool', no_pool)
+    monkeypatch.setattr(OSRMService, 'get_distance_matrix', staticmethod(matrix))
+
+def test_solves_inline_when_pool_disabled(inline):
+    results = batch_solver.solve_batch([POINTS[:4], POINTS[2:]], {})
+    assert len(results) == 2
+    for points, result in zip((POINTS[:4], POINTS[2:]), results):
+        assert sorted(result['route'][:-1]) == list(range(len(points)))
+
+def test_instances_share_request_start(inline, monkeypatch):
+    seen = []
+    monkeypatch.setattr(batch_solver, 'solve_matrix_task',
+                        lambda matrix, options: seen.append(options) or {'route': [0, 0], 'distance': 0})
+    batch_solver.solve_batch([POINTS[:3], POINTS[3:]], {'time_limit_ms': 500},
+                             deadline=None, started=123.0)
+    assert [options['started'] for options in seen] == [123.0, 123.0]
+
+def test_expired_deadline_raises(inline):
+    with pytest.raises(DeadlineExceeded):
+        batch_solver.solve_batch([POINTS[:3]], {}, deadline=1.0)
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+from thuat_toan.algorithms.branch_and_bound import branch_and_bound
+from thuat_toan.algorithms.held_karp import held_karp
+
+def test_three_points_asymmetric_picks_shorter_direction():
+    # 0 -> 1 -> 2 -> 0 dài 300, chiều ngược 0 -> 2 -> 1 -> 0 chỉ dài 3
+    matrix = [[0, 100, 1], [1, 0, 100], [100, 1, 0]]
+    result = branch_and_bound(matrix)
+    assert result['route'] == [0, 2, 1, 0]
+    assert result['distance'] == pytest.approx(3)
+    assert result['stop_reason'] == 'optimal'
+
+@pytest.mark.parametrize('n', [0, 1, 2])
+def test_trivial_sizes(n):
+    result = branch_and_bound(np.zeros((n, n)))
+    assert result['distance'] == 0
+    assert len(result['route']) == (n + 1 if n else 0)
+
+def test_matches_held_karp_on_asymmetric_matrix():
+    rng = np.random.default_rng(3)
+    matrix = rng.random((9, 9)) * 1000
+    np.fill_diagonal(matrix, 0)
+    assert branch_and_bound(matrix)['distance'] == pytest.approx(held_karp(matrix)['distance'], rel=1e-5)
@@ -0,0 +1,66 @@
+import itertools
+import numpy as np
+import pytest
+from config import Config
+from thong_tin.distance_matrix import estimate_matrix
+from thong_tin.osrm_service import OSRMService
+from thuat_toan.algorithms.decomposition import (
+    MIN_CLUSTER_SIZE, partition, path_from_tour, path_matrix, repair_seam
+)
+from thuat_toan.algorithms.held_karp import held_karp
+from thuat_toan.solver import RouteSolver
+
+def _points(n, seed):
+    rng = np.random.default_rng(seed)
+    return [{'lat': 21.0 + 0.1 * a, 'lng': 105.8 + 0.1 * b} for a, b in rng.random((n, 2))]
+
+def _matrix(points, info=None, **_):
+    index = list(range(len(points)))
+    return estimate_matrix(points, index, index)
+
+def _path_length(matrix, order):
+    return sum(float(matrix[a][b]) for a, b in zip(order, order[1:]))
+
+@pytest.mark.parametrize('seed', range(4))
+def test_repair_seam_is_optimal_and_keeps_window_ends(seed):
+    rng = np.random.default_rng(seed)
+    matrix = (rng.random((8, 8)) * 1000).astype(np.float32)
+
+    order, legs = repair_seam(matrix)
+    assert order[0] == 0 and order[-1] == 7
+    assert sorted(order) == list(range(8))
+    assert legs == pytest.approx([float(matrix[a][b]) for a, b in zip(order, order[1:])])
+
+    best = min(_path_length(matrix, (0,) + middle + (7,))
+               for middle in itertools.permutations(range(1, 7)))
+    assert sum(legs) == pytest.approx(best, rel=1e-6)
+
+def test_path_matrix_forces_path_from_entry_to_exit():
+    matrix = _matrix(_points(7, seed=1))
+    route = held_karp(path_matrix(matrix, 2, 5))['route']
+    path = path_from_tour(route, 7)
+    assert path[0] == 2 and path[-1] == 5
+    assert sorted(path) == list(range(7))
+
+def test_partition_covers_every_point_once():
+    points = _points(200, seed=2)
+    clusters, xy = partition(points, 30, seed=0)
+    assert sorted(i for cluster in clusters for i in cluster) == list(range(200))
+    assert all(len(cluster) >= MIN_CLUSTER_SIZE for cluster in clusters)
+    assert xy.shape == (200, 2)
+
+def test_decomposed_tour_is_valid_and_distance_includes_seams(monkeypatch):
+    monkeypatch.setattr(Config, 'SOLVER_USE_PROCESS_POOL', False)
+    monkeypatch.setattr(Config, 'DECOMPOSITION_CLUSTER_SIZE', 25)
+    monkeypatch.setattr(OSRMService, 'get_distance_matrix', staticmethod(_matrix))
+    points = _points(120, seed=3)
+
+    result = RouteSolver().solve_from_coordinates(points, decomposition=True, seed=1,
+                                                  time_limit_ms=300)
+    assert result['algorithm'] == 'decomposition'
+    route = result['route']
+    assert route[0] == route[-1] == 0
+    assert sorted(route[:-1]) == list(range(120))
+    # Chặng nối giữa các cụm được tính bằng khoảng cách thật, không phải ước lượng
+    full = _matrix(points).astype(np.float64)
+    assert result['distance'] == pytest.approx(full[route[:-1], route[1:]].sum() / 1000.0, abs=0.01)
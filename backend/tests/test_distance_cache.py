@@ -0,0 +1,95 @@
+import math
+import sqlite3
+import numpy as np
+import pytest
+from thong_tin import distance_cache
+from thong_tin.distance_cache import DistanceCache
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(distance_cache.time, 'time', clock.time)
+    return clock
+
+def _keys(count):
+    return [(i, i) for i in range(count)]
+
+def _rows(path):
+    with sqlite3.connect(path) as conn:
+        return set(conn.execute("SELECT o_lat, d_lat FROM distances").fetchall())
+
+def test_lookup_reads_memory_then_disk(tmp_path, clock):
+    path = str(tmp_path / 'cache.sqlite3')
+    keys = _keys(3)
+    DistanceCache(path=path).store([(keys[0], keys[1], 12.5), (keys[1], keys[0], None)])
+
+    # Instance mới: bộ nhớ trống, ô được đọc từ SQLite
+    matrix = DistanceCache(path=path).lookup(keys)
+    assert matrix.dtype == np.float32
+    assert matrix[0, 1] == 12.5
+    assert matrix[1, 0] == math.inf
+    assert matrix[0, 0] == 0
+    assert np.isnan(matrix[0, 2])
+
+def test_expired_cells_are_missing_and_deleted(tmp_path, clock):
+    path = str(tmp_path / 'cache.sqlite3')
+    cache = DistanceCache(path=path, ttl=10, expiry_interval=0)
+    keys = _keys(3)
+    cache.store([(keys[0], keys[1], 5.0)])
+
+    clock.now += 5
+    assert cache.lookup(keys)[0, 1] == 5.0
+
+    clock.now += 6
+    assert np.isnan(cache.lookup(keys)[0, 1])
+    assert np.isnan(DistanceCache(path=path, ttl=10).lookup(keys)[0, 1])
+
+    # Lần ghi sau xóa các dòng đã hết hạn trên đĩa
+    cache.store([(keys[1], keys[2], 7.0)])
+    assert _rows(path) == {(1, 2)}
+
+def test_evicts_oldest_cells_over_max_entries(tmp_path, clock):
+    path = str(tmp_path / 'cache.sqlite3')
+    cache = DistanceCache(path=path, max_entries=10)
+    keys = _keys(7)
+    batches = [[(keys[b], keys[j], float(j)) for j in range(7) if j != b] for b in range(3)]
+    for batch in batches:
+        cache.store(batch)
+        clock.now += 1
+
+    rows = _rows(path)
+    assert len(rows) <= 10
+    assert {(2, j) for j in range(7) if j != 2} <= rows
+    assert not any(origin == 0 for origin, _ in rows)
+
+def test_memory_tier_is_bounded_lru(clock):
+    cache = DistanceCache(memory_entries=2)
+    keys = _keys(4)
+    cache.store([(keys[0], keys[1], 1.0), (keys[0], keys[2], 2.0)])
+    # Tra cứu làm mới (0, 1), nên ô bị đẩy ra khi thêm (0, 3) là (0, 2)
+    assert cache.lookup(keys[:2])[0, 1] == 1.0
+    cache.store([(keys[0], keys[3], 3.0)])
+
+    matrix = cache.lookup(keys)
+    assert matrix[0, 1] == 1.0
+    assert np.isnan(matrix[0, 2])
+    assert matrix[0, 3] == 3.0
+
+def test_disk_hits_are_promoted_to_memory(tmp_path, clock):
+    path = str(tmp_path / 'cache.sqlite3')
+    keys = _keys(2)
+    DistanceCache(path=path).store([(keys[0], keys[1], 4.0)])
+
+    cache = DistanceCache(path=path)
+    assert cache.lookup(keys)[0, 1] == 4.0
+    # Lần sau đọc từ bộ nhớ, không cần SQLite
+    cache._conn.close()
+    cache._conn = None
+    assert cache.lookup(keys)[0, 1] == 4.0
@@ -0,0 +1,40 @@
+import json
+import numpy as np
+import pytest
+from thong_tin import distance_matrix
+from thong_tin.distance_matrix import _split_distances
+
+DISTANCES = [[0, 12.5, None], [7, 0, 3.25]]
+
+@pytest.mark.parametrize('content', [
+    json.dumps({'code': 'Ok', 'distances': DISTANCES, 'sources': []}).encode(),
+    json.dumps({'code': 'Ok', 'distances': DISTANCES, 'sources': []}, indent=2).encode(),
+    b'{"code":"Ok","distances" : [ [0,12.5,null] ,\n\t[7,0,3.25] \r\n ] ,"sources":[]}',
+])
+def test_split_distances_tolerates_whitespace(content):
+    data, distances = _split_distances(content)
+    assert data['code'] == 'Ok'
+    assert data['sources'] == []
+    np.testing.assert_array_equal(distances.reshape(2, 3), np.array(DISTANCES, dtype=np.float32))
+
+def test_split_distances_without_distances():
+    data, distances = _split_distances(b'{"code": "InvalidQuery", "message": "bad"}')
+    assert data['code'] == 'InvalidQuery'
+    assert distances is None
+
+def test_decode_osrm_table():
+    content = json.dumps({'code': 'Ok', 'distances': DISTANCES}, indent=1).encode()
+    code, message, distances = distance_matrix.decode_osrm_table(content, 2, 3)
+    assert code == 'Ok'
+    assert distances.dtype == np.float32
+    assert distances[0, 2] == np.inf
+    assert distances[1, 2] == pytest.approx(3.25)
+
+def test_estimate_matrix_uses_shared_haversine():
+    from thong_tin.geo import EARTH_RADIUS, haversine
+    points = [{'lat': '10.0', 'lng': '106.0'}, {'lat': 11.0, 'lng': 106.0}, {'lat': 10.0, 'lng': 107.0}]
+    estimate = distance_matrix.estimate_matrix(points, [0, 1], [0, 1, 2], detour=1.5)
+    assert estimate.shape == (2, 3)
+    # Một độ vĩ tuyến = pi / 180 * bán kính
+    assert estimate[0, 1] == pytest.approx(1.5 * np.pi / 180 * EARTH_RADIUS, rel=1e-6)
+    assert estimate[1, 2] == pytest.approx(1.5 * haversine(11.0, 106.0, 10.0, 107.0), rel=1e-6)
@@ -0,0 +1,35 @@
+import pytest
+from app import create_app
+from thong_tin.geometry_service import GeometryService
+
+@pytest.fixture
+def client(monkeypatch):
+    calls = []
+
+    def fake_geometry(points, zoom):
+        calls.append(zoom)
+        return {'polyline': '', 'distance': 1000.0,
+                'legs': [{'distance': 1000.0, 'fallback': False}]}
+
+    monkeypatch.setattr(GeometryService, 'get_route_geometry', fake_geometry)
+    client = create_app().test_client()
+    client.calls = calls
+    return client
+
+def _post(client, zoom_json):
+    body = '{"points": [{"lat": 21.0, "lng": 105.8}, {"lat": 21.01, "lng": 105.81}], "zoom": %s}' % zoom_json
+    return client.post('/api/route-geometry', data=body, content_type='application/json')
+
+@pytest.mark.parametrize('zoom', ['true', 'false', 'NaN', 'Infinity', '-Infinity', '-1', '22.5', '23', '"13"'])
+def test_invalid_zoom_is_rejected(client, zoom):
+    response = _post(client, zoom)
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+    assert client.calls == []
+
+@pytest.mark.parametrize('zoom', ['0', '13', '14.5', '22'])
+def test_valid_zoom_is_accepted(client, zoom):
+    response = _post(client, zoom)
+    assert response.status_code == 200
+    assert response.get_json()['success'] is True
+    assert client.calls == [float(zoom)]
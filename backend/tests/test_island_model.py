@@ -0,0 +1,45 @@
+from concurrent.futures import Future
+import numpy as np
+import pytest
+from thuat_toan import worker_pool
+from thuat_toan.algorithms.island_model import island_genetic_algorithm
+
+def _matrix(n, seed=0):
+    rng = np.random.default_rng(seed)
+    matrix = (rng.random((n, n)) * 1000).astype(np.float32)
+    np.fill_diagonal(matrix, 0)
+    return matrix
+
+def test_without_executor_runs_islands_in_process(monkeypatch):
+    def no_pool():
+        raise AssertionError('islands must not reach the shared pool without admission')
+
+    monkeypatch.setattr(worker_pool, 'get_process_pool', no_pool)
+    n = 12
+    result = island_genetic_algorithm(_matrix(n), list(range(n)), islands=3, population_size=10,
+                                      generations=6, migration_interval=3, seed=1)
+    assert sorted(result['route'][:-1]) == list(range(n))
+    assert result['route'][0] == result['route'][-1] == 0
+
+class FailingExecutor:
+    """Đảo đầu tiên lỗi, các đảo khác còn chờ"""
+    slots = 3
+
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, fn, *args, deadline=None):
+        future = Future()
+        if not self.futures:
+            future.set_exception(RuntimeError('island crashed'))
+        self.futures.append(future)
+        return future
+
+def test_epoch_error_cancels_outstanding_islands():
+    executor = FailingExecutor()
+    n = 12
+    with pytest.raises(RuntimeError):
+        island_genetic_algorithm(_matrix(n), list(range(n)), islands=3, population_size=10,
+                                 generations=6, migration_interval=3, seed=1, executor=executor)
+    assert len(executor.futures) == 3
+    assert all(f.cancelled() for f in executor.futures[1:])
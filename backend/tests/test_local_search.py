@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from thuat_toan.algorithms.local_search import _Tour, iterated_local_search, local_search
+
+def _asymmetric(n, seed):
+    rng = np.random.default_rng(seed)
+    points = rng.random((n, 2)) * 1000
+    dist = np.hypot(*(points[:, None, :] - points[None, :, :]).transpose(2, 0, 1))
+    # Đường một chiều: mỗi hướng có hệ số đường vòng riêng
+    dist *= rng.uniform(1.0, 1.6, size=(n, n))
+    np.fill_diagonal(dist, 0)
+    return dist.astype(np.float32)
+
+def _length(dist, route):
+    return float(np.asarray(dist, dtype=np.float64)[route, np.roll(route, -1)].sum())
+
+def test_tour_deltas_match_recomputed_length():
+    dist = _asymmetric(9, seed=1)
+    route = [0, 4, 2, 7, 1, 8, 3, 6, 5]
+    graph = dist.astype(np.float64).tolist()
+    base = _length(dist, route)
+    n = len(route)
+
+    for i in range(1, n):
+        for j in range(i + 1, n):
+            tour = _Tour(graph, route, dist)
+            delta = tour.reverse_delta(i, j)
+            tour.reverse(i, j)
+            assert tour.length() == pytest.approx(base + delta, abs=1e-3)
+            assert tour.length() == pytest.approx(_length(dist, tour.route), abs=1e-3)
+
+    for i in range(1, n):
+        for j in range(i, min(i + 3, n)):
+            for k in list(range(0, i - 1)) + list(range(j + 1, n)):
+                for reverse in (False, True):
+                    tour = _Tour(graph, route, dist)
+                    delta = tour.move_delta(i, j, k, reverse)
+                    tour.move(i, j, k, reverse)
+                    assert sorted(tour.route) == list(range(n))
+                    assert tour.length() == pytest.approx(base + delta, abs=1e-3)
+                    assert tour.length() == pytest.approx(_length(dist, tour.route), abs=1e-3)
+
+@pytest.mark.parametrize('seed', range(5))
+def test_local_search_never_increases_cost_on_asymmetric_matrix(seed):
+    dist = _asymmetric(40, seed)
+    route = np.random.default_rng(seed).permutation(40).tolist()
+
+    improved = local_search(dist, route)
+    assert improved[0] == route[0]
+    assert sorted(improved) == list(range(40))
+    assert _length(dist, improved) <= _length(dist, route) + 1e-3
+
+def test_iterated_local_search_keeps_start_and_reports_tour_cost():
+    dist = _asymmetric(60, seed=7)
+    dist[3, 10] = np.inf
+    points = list(range(60))
+    result = iterated_local_search(dist, points, seed=0, max_iterations=30)
+
+    route = result['route']
+    assert route[0] == route[-1] == 0
+    assert sorted(route[:-1]) == points
+    assert result['distance'] == pytest.approx(_length(dist, route[:-1]), rel=1e-6)
+    assert np.isfinite(result['distance'])
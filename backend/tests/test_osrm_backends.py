@@ -0,0 +1,54 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from thong_tin.osrm_backends import OSRMBackendPool
+
+class FakeResponse:
+    def __init__(self, url):
+        self.url = url
+        self.status_code = 200
+        self.body_read = False
+        self.closed = False
+
+    @property
+    def content(self):
+        self.body_read = True
+        return b'{}'
+
+    def close(self):
+        self.closed = True
+
+class FakeSession:
+    """Máy 'slow' trả header sau `delay` giây, các máy khác trả ngay"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.responses = []
+
+    def get(self, url, timeout=None, stream=False):
+        if url.startswith('http://slow'):
+            time.sleep(self.delay)
+        response = FakeResponse(url)
+        self.responses.append(response)
+        return response
+
+def test_losing_hedge_drops_body_and_is_counted_until_done():
+    pool = OSRMBackendPool(['http://slow', 'http://fast'], hedge_min=0.01, hedge_max=0.01,
+                           hedge_default=0.01, max_stragglers=1)
+    session = FakeSession(delay=0.2)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        response = pool.get(session, '/table', executor, timeout=5)
+        assert response.url == 'http://fast/table'
+        assert pool._stragglers_full()
+    slow = [r for r in session.responses if r.url.startswith('http://slow')]
+    assert slow and slow[0].closed and not slow[0].body_read
+    assert not pool._stragglers_full()
+
+def test_no_hedge_while_stragglers_are_at_the_limit():
+    pool = OSRMBackendPool(['http://slow', 'http://fast'], hedge_min=0.01, hedge_max=0.01,
+                           hedge_default=0.01, max_stragglers=0)
+    session = FakeSession(delay=0.05)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        response = pool.get(session, '/table', executor, timeout=5)
+    assert response.url == 'http://slow/table'
+    assert all(r.url.startswith('http://slow') for r in session.responses)
@@ -0,0 +1,91 @@
+import json
+import threading
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlsplit
+import numpy as np
+import pytest
+from config import Config
+from thong_tin import osrm_service
+from thong_tin.osrm_service import OSRMService
+
+N = 7
+# Ma trận "đường bộ" giả: kinh độ của điểm i là i, có vài ô không có đường đi
+DISTANCES = np.arange(N * N, dtype=np.float32).reshape(N, N) * 10.5
+DISTANCES[2, 5] = np.nan
+COORDINATES = [{'lat': 0, 'lng': i} for i in range(N)]
+
+class FakeOSRM:
+    """Trả lời Table API từ DISTANCES; `failures` lần gọi đầu trả None (mất kết nối)"""
+
+    def __init__(self, failures=0, status_code=200):
+        self.failures = failures
+        self.status_code = status_code
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        with self._lock:
+            self.calls += 1
+            if self.failures:
+                self.failures -= 1
+                return None
+        url = urlsplit(path)
+        points = [int(float(pair.split(',')[0])) for pair in url.path.rsplit('/', 1)[1].split(';')]
+        query = parse_qs(url.query)
+        sources = [int(k) for k in query['sources'][0].split(';')] if 'sources' in query else range(len(points))
+        destinations = [int(k) for k in query['destinations'][0].split(';')] \
+            if 'destinations' in query else range(len(points))
+        table = [[None if np.isnan(DISTANCES[points[s], points[d]]) else float(DISTANCES[points[s], points[d]])
+                  for d in destinations] for s in sources]
+        return SimpleNamespace(status_code=self.status_code,
+                               content=json.dumps({'code': 'Ok', 'distances': table}).encode())
+
+@pytest.fixture
+def osrm(monkeypatch):
+    fake = FakeOSRM()
+    monkeypatch.setattr(OSRMService, 'osrm_get', classmethod(lambda cls, path: fake.get(path)))
+    backends = SimpleNamespace(backends=[SimpleNamespace(state='closed')])
+    monkeypatch.setattr(OSRMService, 'get_backends', classmethod(lambda cls: backends))
+    monkeypatch.setattr(osrm_service.time, 'sleep', lambda seconds: None)
+    return fake
+
+def _expected(sources, destinations):
+    expected = DISTANCES[np.ix_(sources, destinations)].copy()
+    expected[np.isnan(expected)] = np.inf
+    return expected
+
+@pytest.mark.parametrize('sources, destinations', [
+    (list(range(N)), list(range(N))),
+    ([1, 3, 4, 6], [0, 2, 5]),
+    ([2], list(range(N))),
+])
+def test_tiled_matrix_equals_untiled(osrm, monkeypatch, sources, destinations):
+    monkeypatch.setattr(Config, 'OSRM_TILE_SIZE', 100)
+    untiled = OSRMService._fetch_table(COORDINATES, sources, destinations)
+    assert osrm.calls == 1
+
+    monkeypatch.setattr(Config, 'OSRM_TILE_SIZE', 2)
+    tiled = OSRMService._fetch_table(COORDINATES, sources, destinations)
+    assert osrm.calls > 1
+
+    np.testing.assert_array_equal(tiled, untiled)
+    np.testing.assert_array_equal(tiled, _expected(sources, destinations))
+    assert tiled.dtype == np.float32
+
+def test_tile_is_retried_after_connection_failure(osrm, monkeypatch):
+    monkeypatch.setattr(Config, 'OSRM_TILE_RETRIES', 2)
+    osrm.failures = 2
+    matrix = OSRMService._fetch_tile(COORDINATES, [0, 1], [2, 3])
+    assert osrm.calls == 3
+    np.testing.assert_array_equal(matrix, _expected([0, 1], [2, 3]))
+
+def test_tile_gives_up_after_retries(osrm, monkeypatch):
+    monkeypatch.setattr(Config, 'OSRM_TILE_RETRIES', 1)
+    osrm.failures = 5
+    assert OSRMService._fetch_tile(COORDINATES, [0, 1], [2, 3]) is None
+    assert osrm.calls == 2
+
+def test_failed_tile_fails_the_whole_table(osrm, monkeypatch):
+    monkeypatch.setattr(Config, 'OSRM_TILE_SIZE', 3)
+    osrm.status_code = 400
+    assert OSRMService._fetch_table(COORDINATES, list(range(N)), list(range(N))) is None
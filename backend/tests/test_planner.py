@@ -0,0 +1,24 @@
+import pytest
+from thuat_toan import planner
+
+CALIBRATION = {
+    'version': planner.CALIBRATION_VERSION,
+    'held_karp': 5e-9,
+    'ga_generation': 3e-4,
+    'ga_unit': 7e-8,
+    'ga_setup': 3e-6,
+    'ils_setup': 3e-6,
+    'ils_iteration': 4e-3
+}
+
+@pytest.fixture(autouse=True)
+def calibration(monkeypatch):
+    monkeypatch.setattr(planner, '_calibration', dict(CALIBRATION))
+
+@pytest.mark.parametrize('n', [1100, 5000])
+def test_large_n_does_not_overflow(n):
+    plan = planner.plan_solve(n, 2.0)
+    assert plan['algorithm'] == 'iterated_local_search'
+
+def test_small_n_uses_held_karp():
+    assert planner.plan_solve(10, 2.0)['algorithm'] == 'held_karp'
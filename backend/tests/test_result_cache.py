@@ -0,0 +1,57 @@
+import threading
+import time
+import pytest
+from thuat_toan.result_cache import ResultCache
+from thuat_toan.worker_pool import DeadlineExceeded
+
+def _start_leader(cache, key, compute):
+    errors = []
+
+    def run():
+        try:
+            cache.get_or_compute(key, compute)
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, errors
+
+def test_follower_recomputes_when_leader_deadline_expires():
+    cache = ResultCache()
+    key = ('points', ())
+    started = threading.Event()
+    release = threading.Event()
+
+    def leader_compute():
+        started.set()
+        release.wait(5)
+        raise DeadlineExceeded('leader deadline')
+
+    thread, errors = _start_leader(cache, key, leader_compute)
+    started.wait(5)
+    threading.Timer(0.05, release.set).start()
+    result, source = cache.get_or_compute(key, lambda: {'route': [0, 1, 0]},
+                                          deadline=time.time() + 5)
+    thread.join(5)
+    assert isinstance(errors[0], DeadlineExceeded)
+    assert result == {'route': [0, 1, 0]}
+    assert source == 'miss'
+
+def test_follower_gets_other_leader_errors():
+    cache = ResultCache()
+    key = ('points', ())
+    started = threading.Event()
+    release = threading.Event()
+
+    def leader_compute():
+        started.set()
+        release.wait(5)
+        raise ValueError('bad matrix')
+
+    thread, _ = _start_leader(cache, key, leader_compute)
+    started.wait(5)
+    threading.Timer(0.05, release.set).start()
+    with pytest.raises(ValueError):
+        cache.get_or_compute(key, lambda: {'route': [0, 1, 0]}, deadline=time.time() + 5)
+    thread.join(5)
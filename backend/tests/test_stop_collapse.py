@@ -0,0 +1,16 @@
+from thong_tin.stop_collapse import collapse_stops, expand_route
+
+def test_collapse_accepts_string_coordinates():
+    # Tọa độ gửi lên dưới dạng chuỗi (JSON từ form) không được làm lỗi haversine
+    points = [
+        {'lat': '10.7769', 'lng': '106.7009'},
+        {'lat': '10.77691', 'lng': '106.70091'},
+        {'lat': 10.7800, 'lng': 106.7100},
+    ]
+    reduced, groups = collapse_stops(points, radius=10)
+    assert groups == [[0, 1], [2]]
+    assert reduced == [points[0], points[2]]
+
+def test_expand_route_keeps_closed_tour():
+    groups = [[0, 1], [2]]
+    assert expand_route([0, 1, 0], groups) == [0, 1, 2, 0]
@@ -0,0 +1,80 @@
+import math
+import numpy as np
+import pytest
+from config import Config
+from thong_tin.distance_matrix import estimate_matrix
+from thuat_toan.algorithms.local_search import repair_tour
+from thuat_toan.solver import RouteSolver
+
+def _circle(count, radius=0.05):
+    return [{'lat': 21.0 + radius * math.cos(2 * math.pi * t / count),
+             'lng': 105.8 + radius * math.sin(2 * math.pi * t / count)} for t in range(count)]
+
+def _matrix(coordinates):
+    everyone = list(range(len(coordinates)))
+    return estimate_matrix(coordinates, everyone, everyone)
+
+def _cyclic_order(route, items):
+    """Thứ tự của `items` theo route, xoay để bắt đầu từ phần tử nhỏ nhất"""
+    order = [c for c in route if c in items]
+    start = order.index(min(order))
+    return order[start:] + order[:start]
+
+def test_repair_keeps_unchanged_order_and_inserts_new_stops():
+    old_points = _circle(40)
+    previous = {'points': old_points, 'route': list(range(40)) + [0]}
+
+    # Bỏ hai điểm cũ, thêm ba điểm mới nằm giữa các điểm kề nhau trên vòng tròn
+    removed = {7, 23}
+    added = [{'lat': 21.0 + 0.05 * math.cos(2 * math.pi * (t + 0.5) / 40),
+              'lng': 105.8 + 0.05 * math.sin(2 * math.pi * (t + 0.5) / 40)} for t in (3, 15, 31)]
+    kept = [p for t, p in enumerate(old_points) if t not in removed]
+    # Điểm xuất phát giữ ở chỉ số 0, các điểm còn lại xáo trộn
+    rest = kept[1:] + added
+    order = np.random.default_rng(0).permutation(len(rest))
+    coordinates = [kept[0]] + [rest[k] for k in order]
+
+    result = RouteSolver().repair_from_previous(_matrix(coordinates), coordinates, previous)
+    assert result is not None
+    assert result['algorithm'] == 'warm_start'
+    route = result['route']
+    assert route[0] == route[-1] == 0
+    assert sorted(route[:-1]) == list(range(len(coordinates)))
+
+    # Các điểm cũ còn lại giữ nguyên thứ tự trên vòng tròn
+    index_of = {(p['lat'], p['lng']): i for i, p in enumerate(coordinates)}
+    kept_indices = [index_of[(p['lat'], p['lng'])] for p in kept]
+    assert _cyclic_order(route[:-1], set(kept_indices)) == _cyclic_order(kept_indices, set(kept_indices))
+
+    # Điểm mới được chèn đúng giữa hai điểm cũ kề nó
+    position = {c: t for t, c in enumerate(route[:-1])}
+    for t, point in zip((3, 15, 31), added):
+        before = index_of[(old_points[t]['lat'], old_points[t]['lng'])]
+        after = index_of[(old_points[t + 1]['lat'], old_points[t + 1]['lng'])]
+        new = index_of[(point['lat'], point['lng'])]
+        assert position[new] == position[before] + 1
+        assert position[after] == position[new] + 1
+
+def test_repair_falls_back_for_small_or_heavily_changed_instances():
+    small = _circle(Config.HELD_KARP_MAX_N)
+    previous = {'points': small, 'route': list(range(len(small))) + [0]}
+    assert RouteSolver().repair_from_previous(_matrix(small), small, previous) is None
+
+    old_points = _circle(40)
+    previous = {'points': old_points, 'route': list(range(40)) + [0]}
+    # Hơn WARM_START_MAX_CHANGE điểm mới: giải lại từ đầu
+    coordinates = old_points[:20] + _circle(20, radius=0.08)
+    assert RouteSolver().repair_from_previous(_matrix(coordinates), coordinates, previous) is None
+
+def test_repair_tour_returns_valid_permutation_on_asymmetric_matrix():
+    rng = np.random.default_rng(3)
+    dist = (rng.random((30, 30)) * 1000).astype(np.float32)
+    np.fill_diagonal(dist, 0)
+    partial = [0] + rng.permutation(np.arange(1, 25)).tolist()
+
+    result = repair_tour(dist, partial, new_stops=list(range(25, 30)), touched=partial[3:5])
+    route = result['route']
+    assert route[0] == route[-1] == 0
+    assert sorted(route[:-1]) == list(range(30))
+    assert result['distance'] == pytest.approx(
+        float(dist.astype(np.float64)[route[:-1], route[1:]].sum()), rel=1e-6)
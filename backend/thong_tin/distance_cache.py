@@ -0,0 +1,184 @@
+import os
+import sqlite3
+import threading
+import time
+import logging
+import numpy as np
+from collections import OrderedDict
+from thong_tin.distance_matrix import empty_matrix
+
+logger = logging.getLogger(__name__)
+
+_INF = float('inf')
+_NAN = float('nan')
+
+class DistanceCache:
+    """
+    Cache khoảng cách theo từng ô (điểm đi, điểm đến), khóa là tọa độ đã lượng tử hóa.
+
+    - Tầng bộ nhớ: LRU giới hạn số ô
+    - Tầng đĩa: SQLite, có TTL và giới hạn số dòng (xóa các ô cũ nhất khi vượt)
+    - Hai khóa riêng: _lock chỉ giữ khi đọc / ghi LRU, _db_lock cho kết nối SQLite, nên
+      tra cứu bộ nhớ không phải chờ ghi đĩa
+    - Số dòng trên đĩa được đếm dần (cận trên: INSERT OR REPLACE đè dòng cũ vẫn được cộng),
+      chỉ COUNT(*) lại khi số đếm vượt max_entries; các ô hết hạn được xóa tối đa một lần
+      mỗi expiry_interval giây
+    """
+
+    def __init__(self, path=None, ttl=7 * 24 * 3600, max_entries=2_000_000,
+                 memory_entries=200_000, precision=5, expiry_interval=60.0):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.scale = 10 ** precision
+        self.expiry_interval = expiry_interval
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._conn = None
+        self._rows = 0
+        self._next_expiry = 0.0
+
+        if path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                self._conn = sqlite3.connect(path, check_same_thread=False)
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS distances ("
+                    " o_lat INTEGER, o_lng INTEGER, d_lat INTEGER, d_lng INTEGER,"
+                    " distance REAL, stored_at REAL,"
+                    " PRIMARY KEY (o_lat, o_lng, d_lat, d_lng)) WITHOUT ROWID"
+                )
+                self._conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_distances_stored_at ON distances (stored_at)"
+                )
+                self._conn.commit()
+                self._rows = self._conn.execute("SELECT COUNT(*) FROM distances").fetchone()[0]
+            except sqlite3.Error as e:
+                logger.error(f"Cannot open distance cache {path}: {str(e)}")
+                self._conn = None
+
+    def point_key(self, point):
+        """Lượng tử hóa tọa độ (mặc định 5 chữ số thập phân ~ 1m)"""
+        return (round(float(point['lat']) * self.scale), round(float(point['lng']) * self.scale))
+
+    def lookup(self, keys):
+        """
+        Tra cứu ma trận n x n cho danh sách khóa điểm.
+
+        Returns:
+            np.ndarray float32 (n, n): khoảng cách, +inf (không có đường đi) hoặc NaN (chưa có)
+        """
+        n = len(keys)
+        matrix = empty_matrix(n)
+        now = time.time()
+        expired_before = now - self.ttl
+
+        memory = self._memory
+        for i, origin in enumerate(keys):
+            # Ghép từng hàng bằng list rồi gán một lần (nhanh hơn gán từng ô NumPy);
+            # khóa chỉ giữ trong một hàng để store / lookup khác chen vào được
+            row = [_NAN] * n
+            with self._lock:
+                for j, dest in enumerate(keys):
+                    if origin == dest:
+                        row[j] = 0
+                        continue
+                    key = origin + dest
+                    entry = memory.get(key)
+                    if entry is None:
+                        continue
+                    value, stored_at = entry
+                    if stored_at < expired_before:
+                        del memory[key]
+                        continue
+                    memory.move_to_end(key)
+                    row[j] = _INF if value is None else value
+            matrix[i] = row
+
+        if self._conn is None:
+            return matrix
+
+        # Các ô còn thiếu: đọc từ SQLite theo từng điểm đi (ngoài khóa của LRU)
+        promoted = []
+        with self._db_lock:
+            for i, origin in enumerate(keys):
+                missing = {}
+                for j in np.flatnonzero(np.isnan(matrix[i])).tolist():
+                    missing.setdefault(keys[j], []).append(j)
+                if not missing:
+                    continue
+                try:
+                    rows = self._conn.execute(
+                        "SELECT d_lat, d_lng, distance, stored_at FROM distances"
+                        " WHERE o_lat = ? AND o_lng = ? AND stored_at >= ?",
+                        (origin[0], origin[1], expired_before)
+                    ).fetchall()
+                except sqlite3.Error as e:
+                    logger.error(f"Distance cache read failed: {str(e)}")
+                    break
+                for d_lat, d_lng, distance, stored_at in rows:
+                    columns = missing.get((d_lat, d_lng))
+                    if columns is None:
+                        continue
+                    matrix[i, columns] = _INF if distance is None else distance
+                    promoted.append((origin + (d_lat, d_lng), distance, stored_at))
+
+        if promoted:
+            with self._lock:
+                for key, value, stored_at in promoted:
+                    self._remember(key, value, stored_at)
+        return matrix
+
+    def store(self, cells):
+        """
+        Lưu các ô khoảng cách.
+
+        Args:
+            cells: iterable (origin_key, dest_key, distance), distance None = không có đường đi
+        """
+        now = time.time()
+        records = []
+        with self._lock:
+            for origin, dest, distance in cells:
+                if origin == dest:
+                    continue
+                self._remember(origin + dest, distance, now)
+                records.append(origin + dest + (distance, now))
+
+        if self._conn is None or not records:
+            return
+
+        with self._db_lock:
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO distances VALUES (?, ?, ?, ?, ?, ?)", records
+                )
+                self._rows += len(records)
+                if now >= self._next_expiry:
+                    self._next_expiry = now + self.expiry_interval
+                    expired = self._conn.execute(
+                        "DELETE FROM distances WHERE stored_at < ?", (now - self.ttl,))
+                    self._rows -= max(expired.rowcount, 0)
+                if self._rows > self.max_entries:
+                    # Số đếm là cận trên: đếm lại chính xác trước khi xóa
+                    self._rows = self._conn.execute("SELECT COUNT(*) FROM distances").fetchone()[0]
+                    if self._rows > self.max_entries:
+                        # Xóa các ô cũ nhất, giữ lại 90% dung lượng
+                        evicted = self._conn.execute(
+                            "DELETE FROM distances WHERE (o_lat, o_lng, d_lat, d_lng) IN ("
+                            " SELECT o_lat, o_lng, d_lat, d_lng FROM distances"
+                            " ORDER BY stored_at LIMIT ?)",
+                            (self._rows - int(self.max_entries * 0.9),)
+                        )
+                        self._rows -= max(evicted.rowcount, 0)
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Distance cache write failed: {str(e)}")
+
+    def _remember(self, key, value, stored_at):
+        self._memory[key] = (value, stored_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
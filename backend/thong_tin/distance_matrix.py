@@ -0,0 +1,75 @@
+
+# Ma trận khoảng cách dùng chung: một mảng NumPy float32 (n, n) liên tục, đơn vị mét
+# - +inf: không có đường đi
+# - NaN: ô chưa có (chỉ dùng tạm khi ghép ma trận từ cache / OSRM)
+
+import json
+import re
+import numpy as np
+from thong_tin.geo import haversine
+
+MATRIX_DTYPE = np.float32
+
+def empty_matrix(rows, cols=None):
+    """Ma trận rows x cols toàn ô chưa có (NaN)"""
+    return np.full((rows, rows if cols is None else cols), np.nan, dtype=MATRIX_DTYPE)
+
+def estimate_matrix(coordinates, sources, destinations, detour=1.0):
+    """
+    Ma trận ước lượng sources x destinations: khoảng cách haversine (mét) nhân hệ số
+    đường vòng `detour`, dùng khi không lấy được ma trận đường bộ
+    """
+    lat = np.array([float(p['lat']) for p in coordinates])
+    lng = np.array([float(p['lng']) for p in coordinates])
+    distances = haversine(lat[sources][:, None], lng[sources][:, None],
+                          lat[destinations][None, :], lng[destinations][None, :]) * detour
+    return distances.astype(MATRIX_DTYPE)
+
+def decode_osrm_table(content, rows, cols):
+    """
+    Đọc response của OSRM Table API thẳng từ bytes
+
+    Mảng 'distances' (phần lớn response) được đọc bằng np.fromstring, không tạo
+    list Python cho từng ô; phần còn lại (code, message, waypoint) đọc bằng json.
+
+    Returns:
+        (code, message, distances): distances là ma trận float32 rows x cols
+        (+inf = không có đường đi), None nếu response không có distances
+    """
+    data, distances = _split_distances(content)
+
+    if distances is None or distances.size != rows * cols:
+        return data.get('code'), data.get('message'), None
+    distances = distances.reshape(rows, cols)
+    distances[np.isnan(distances)] = np.inf
+    return data.get('code'), data.get('message'), distances
+
+# Đầu mảng distances và dấu đóng của hàng cuối (cho phép khoảng trắng giữa các ký tự)
+_DISTANCES_START = re.compile(rb'"distances"\s*:\s*\[')
+_DISTANCES_END = re.compile(rb'\]\s*\]')
+
+def _load_distances(content):
+    """Parse cả response, distances (list lồng nhau, null = NaN) chuyển sang float32"""
+    data = json.loads(content)
+    distances = data.get('distances')
+    if distances is not None:
+        distances = np.array(distances, dtype=MATRIX_DTYPE)
+    return data, distances
+
+def _split_distances(content):
+    """
+    Tách mảng distances khỏi response: (phần còn lại đã parse, mảng phẳng float32).
+    Response không đúng dạng mong đợi thì parse cả response bằng json
+    """
+    start = _DISTANCES_START.search(content)
+    end = _DISTANCES_END.search(content, start.end()) if start is not None else None
+    if end is None:
+        return _load_distances(content)
+    try:
+        data = json.loads(content[:start.start()] + b'"distances":0' + content[end.end():])
+    except ValueError:
+        return _load_distances(content)
+    if data.get('code') != 'Ok':
+        return data, None
+    values = re.sub(rb'[\[\]\s]', b'', content[start.end() - 1:end.end()]).replace(b'null', b'nan')
+    return data, np.fromstring(values, dtype=MATRIX_DTYPE, sep=',')
@@ -0,0 +1,15 @@
+# Khoảng cách trên mặt cầu dùng chung: ước lượng ma trận, đồ thị OSM, gộp điểm, polyline
+
+import numpy as np
+
+EARTH_RADIUS = 6371008.8  # bán kính trung bình của Trái Đất (mét)
+
+def haversine(lat1, lng1, lat2, lng2):
+    """
+    Khoảng cách đường tròn lớn (mét) giữa các điểm (độ); nhận số hoặc mảng numpy
+    (broadcast, ví dụ cột nguồn x hàng đích cho cả ma trận)
+    """
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    h = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
@@ -0,0 +1,172 @@
+
+# Hình dạng đường đi của tour: ghép từ geometry từng chặng (cache theo cặp điểm),
+# đơn giản hóa theo mức zoom và trả về dạng Encoded Polyline
+
+import threading
+import logging
+from collections import OrderedDict
+import numpy as np
+from config import Config
+from thong_tin.osrm_service import OSRMService
+from thong_tin.geo import haversine
+from thong_tin.polyline import douglas_peucker, encode, tolerance_for_zoom
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+MIN_ZOOM = 0
+MAX_ZOOM = 22  # dải zoom của tile bản đồ 0–22
+
+class GeometryService:
+    """
+    - Mỗi chặng (điểm đi, điểm đến) được cache riêng (LRU, GEOMETRY_CACHE_ENTRIES chặng),
+      nên vẽ lại tour sau khi sửa vài điểm chỉ cần lấy các chặng mới
+    - Các chặng còn thiếu liên tiếp nhau được lấy bằng một request OSRM Route API
+      (tối đa GEOMETRY_MAX_WAYPOINTS điểm mỗi request, gọi song song)
+    - Chặng lấy lỗi được thay bằng đoạn thẳng (không cache)
+    """
+
+    _legs = OrderedDict()
+    _lock = threading.Lock()
+
+    @classmethod
+    def leg_key(cls, a, b):
+        scale = 10 ** Config.OSRM_CACHE_PRECISION
+        return (round(float(a['lat']) * scale), round(float(a['lng']) * scale),
+                round(float(b['lat']) * scale), round(float(b['lng']) * scale))
+
+    @classmethod
+    def get_route_geometry(cls, points, zoom):
+        """
+        Args:
+            points: các điểm theo thứ tự đi (tour khép kín thì điểm cuối trùng điểm đầu)
+            zoom: mức zoom của bản đồ, quyết định sai số khi đơn giản hóa
+
+        Returns:
+            dict: polyline (Encoded Polyline, precision 5), distance (mét),
+                  legs [{'distance' (mét), 'fallback' (True nếu là đoạn thẳng)}]
+        """
+        zoom = min(max(int(zoom), MIN_ZOOM), MAX_ZOOM)
+        keys = [cls.leg_key(points[t], points[t + 1]) for t in range(len(points) - 1)]
+
+        legs = [None] * len(keys)
+        with cls._lock:
+            for t, key in enumerate(keys):
+                entry = cls._legs.get(key)
+                if entry is not None:
+                    cls._legs.move_to_end(key)
+                    legs[t] = entry
+        missing = [t for t, leg in enumerate(legs) if leg is None]
+        if missing:
+            logger.info(f"Route geometry: {len(keys) - len(missing)}/{len(keys)} legs cached, "
+                        f"fetching {len(missing)}")
+            cls._fetch_missing(points, keys, legs, missing)
+
+        path = []
+        total = 0.0
+        for t, leg in enumerate(legs):
+            coords = cls._simplified(leg, zoom)
+            path.append(coords if t == 0 else coords[1:])
+            total += leg['distance']
+        path = np.concatenate(path) if path else np.empty((0, 2))
+
+        return {
+            'polyline': encode(path),
+            'distance': total,
+            'legs': [{'distance': leg['distance'], 'fallback': leg.get('fallback', False)}
+                     for leg in legs]
+        }
+
+    @classmethod
+    def _simplified(cls, leg, zoom):
+        simplified = leg['simplified']
+        coords = simplified.get(zoom)
+        if coords is None:
+            lat = float(np.mean(leg['coords'][:, 0]))
+            tolerance = tolerance_for_zoom(zoom, lat, Config.GEOMETRY_TOLERANCE_PX)
+            coords = simplified[zoom] = douglas_peucker(leg['coords'], tolerance)
+        return coords
+
+    @classmethod
+    def _fetch_missing(cls, points, keys, legs, missing):
+        # Gom các chặng thiếu liên tiếp thành từng đoạn, mỗi đoạn tối đa (max_waypoints - 1) chặng
+        max_legs = max(Config.GEOMETRY_MAX_WAYPOINTS - 1, 1)
+        runs = []
+        for t in missing:
+            if runs and runs[-1][-1] == t - 1 and len(runs[-1]) < max_legs:
+                runs[-1].append(t)
+            else:
+                runs.append([t])
+
+        executor = OSRMService.get_executor()
+        futures = [executor.submit(cls._fetch_legs, points[run[0]:run[-1] + 2]) for run in runs]
+
+        fetched = []
+        for run, future in zip(runs, futures):
+            result = future.result()
+            for offset, t in enumerate(run):
+                if result is None:
+                    a, b = points[t], points[t + 1]
+                    coords = np.array([[a['lat'], a['lng']], [b['lat'], b['lng']]], dtype=np.float64)
+                    legs[t] = {
+                        'coords': coords,
+                        'distance': float(haversine(*coords[0], *coords[1])),
+                        'simplified': {},
+                        'fallback': True
+                    }
+                else:
+                    legs[t] = result[offset]
+                    fetched.append((keys[t], legs[t]))
+
+        with cls._lock:
+            for key, leg in fetched:
+                cls._legs[key] = leg
+                cls._legs.move_to_end(key)
+            while len(cls._legs) > Config.GEOMETRY_CACHE_ENTRIES:
+                cls._legs.popitem(last=False)
+
+    @classmethod
+    def _fetch_legs(cls, waypoints):
+        """
+        Gọi OSRM Route API qua các waypoint liên tiếp, tách geometry theo từng chặng
+        (ghép geometry của các step trong chặng)
+
+        Returns:
+            list các chặng {'coords' (k, 2) [lat, lng], 'distance', 'simplified'}, None nếu lỗi
+        """
+        coords_str = ";".join(f"{p['lng']},{p['lat']}" for p in waypoints)
+        path = (f"/route/v1/driving/{coords_str}"
+                f"?overview=false&steps=true&geometries=geojson")
+        try:
+            response = OSRMService.osrm_get(path)
+            if response is None:
+                return None
+            if response.status_code != 200:
+                logger.error(f"OSRM Route Request Failed: {response.status_code}")
+                metrics.OSRM_FAILURES.inc(reason=f"http_{response.status_code}")
+                return None
+            data = response.json()
+            if data.get('code') != 'Ok' or not data.get('routes'):
+                logger.error(f"OSRM Route Error: {data.get('message') or data.get('code')}")
+                metrics.OSRM_FAILURES.inc(reason='error_code')
+                return None
+        except Exception as e:
+            logger.error(f"Error calling OSRM Route API: {str(e)}")
+            metrics.OSRM_FAILURES.inc(reason=type(e).__name__)
+            return None
+
+        legs = []
+        for leg, (a, b) in zip(data['routes'][0]['legs'], zip(waypoints, waypoints[1:])):
+            coords = [c for step in leg.get('steps', []) for c in step['geometry']['coordinates']]
+            if len(coords) < 2:
+                coords = [[a['lng'], a['lat']], [b['lng'], b['lat']]]
+            coords = np.array(coords, dtype=np.float64)[:, ::-1]
+            # Các step nối nhau tại một điểm chung: bỏ các điểm lặp liên tiếp
+            duplicate = np.zeros(len(coords), dtype=bool)
+            duplicate[1:] = (coords[1:] == coords[:-1]).all(axis=1)
+            legs.append({
+                'coords': np.ascontiguousarray(coords[~duplicate]),
+                'distance': float(leg['distance']),
+                'simplified': {}
+            })
+        return legs if len(legs) == len(waypoints) - 1 else None
@@ -0,0 +1,99 @@
+import os
+import threading
+import time
+import logging
+import numpy as np
+from config import Config
+from thong_tin.distance_matrix import MATRIX_DTYPE
+from thong_tin.osm_graph import OSMGraph
+
+logger = logging.getLogger(__name__)
+
+class MatrixProvider:
+    """
+    Nguồn ma trận khoảng cách dùng bởi OSRMService.get_distance_matrix
+
+    cacheable: kết quả có được lưu vào DistanceCache không
+    (nguồn cục bộ đủ nhanh nên không cần cache)
+    """
+
+    name = 'base'
+    cacheable = True
+
+    def fetch_table(self, coordinates, sources, destinations):
+        """
+        Args:
+            coordinates: List các dict {'lat': float, 'lng': float}
+            sources, destinations: chỉ số trong coordinates
+
+        Returns:
+            np.ndarray float32: len(sources) x len(destinations) (mét, +inf nếu không có
+            đường đi, xem thong_tin/distance_matrix.py), None nếu lỗi
+        """
+        raise NotImplementedError
+
+class LocalOSMProvider(MatrixProvider):
+    """
+    Tính ma trận trong tiến trình trên đồ thị đường bộ đọc từ file OSM cục bộ:
+    snap điểm vào node gần nhất rồi chạy Dijkstra nhiều nguồn
+    """
+
+    name = 'osm'
+    cacheable = False
+
+    def __init__(self, path, network_type='drive'):
+        self.path = path
+        self.network_type = network_type
+        self._graph = None
+        self._lock = threading.Lock()
+
+    def get_graph(self):
+        with self._lock:
+            if self._graph is None:
+                started = time.time()
+                self._graph = OSMGraph.load(self.path, self.network_type)
+                logger.info(f"Loaded OSM graph {self.path} ({self.network_type}): "
+                            f"{self._graph.num_nodes} nodes, {len(self._graph.indices)} edges "
+                            f"in {time.time() - started:.2f}s")
+        return self._graph
+
+    def fetch_table(self, coordinates, sources, destinations):
+        try:
+            graph = self.get_graph()
+        except Exception as e:
+            logger.error(f"Error loading OSM graph: {str(e)}")
+            return None
+
+        snapped = {}
+        for i in set(sources) | set(destinations):
+            node, offset = graph.snap(coordinates[i]['lat'], coordinates[i]['lng'])
+            if node is None:
+                logger.warning(f"Point {i} is too far from the road network, treated as unreachable")
+            snapped[i] = (node, offset)
+
+        rows = [bi for bi, i in enumerate(sources) if snapped[i][0] is not None]
+        cols = [bj for bj, j in enumerate(destinations) if snapped[j][0] is not None]
+        matrix = np.full((len(sources), len(destinations)), np.inf, dtype=MATRIX_DTYPE)
+        if rows and cols:
+            block = graph.distances([snapped[sources[bi]][0] for bi in rows],
+                                    [snapped[destinations[bj]][0] for bj in cols])
+            # Cộng đoạn từ tọa độ gốc tới node đã snap ở hai đầu
+            row_offsets = np.array([snapped[sources[bi]][1] for bi in rows])
+            col_offsets = np.array([snapped[destinations[bj]][1] for bj in cols])
+            matrix[np.ix_(rows, cols)] = block + row_offsets[:, None] + col_offsets[None, :]
+        same = np.asarray(sources)[:, None] == np.asarray(destinations)[None, :]
+        matrix[same] = 0
+        return matrix
+
+def create_local_provider():
+    """
+    LocalOSMProvider theo Config (USE_OSM, OSM_GRAPH_PATH, OSM_NETWORK_TYPE),
+    None nếu tắt hoặc chưa có file đồ thị
+    """
+    if not Config.USE_OSM:
+        return None
+    if not os.path.exists(Config.OSM_GRAPH_PATH):
+        logger.warning(f"OSM graph file {Config.OSM_GRAPH_PATH} not found ({Config.OSM_PLACE}), "
+                       f"using OSRM API")
+        return None
+    return LocalOSMProvider(Config.OSM_GRAPH_PATH, Config.OSM_NETWORK_TYPE)
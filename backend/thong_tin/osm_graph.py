@@ -0,0 +1,280 @@
+import heapq
+import logging
+import math
+import os
+import xml.etree.ElementTree as ET
+import numpy as np
+from thong_tin.geo import EARTH_RADIUS, haversine
+
+try:
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import connected_components, dijkstra as csgraph_dijkstra
+except ImportError:  # scipy là tùy chọn, không có thì dùng Dijkstra thuần Python
+    csr_matrix = None
+
+logger = logging.getLogger(__name__)
+
+GRID_DEGREES = 0.005  # kích thước ô lưới của chỉ mục không gian (~550m)
+MAX_SNAP_RINGS = 20  # bán kính tìm node gần nhất tối đa (số vòng ô lưới)
+SCIPY_SOURCE_CHUNK = 16  # số nguồn mỗi lần gọi csgraph.dijkstra (giới hạn bộ nhớ)
+
+_DRIVE = {
+    'motorway', 'motorway_link', 'trunk', 'trunk_link', 'primary', 'primary_link',
+    'secondary', 'secondary_link', 'tertiary', 'tertiary_link', 'unclassified',
+    'residential', 'living_street', 'service', 'road',
+}
+_WALK = (_DRIVE - {'motorway', 'motorway_link', 'trunk', 'trunk_link'}) | {
+    'footway', 'pedestrian', 'path', 'steps', 'track', 'cycleway',
+}
+_BIKE = (_DRIVE - {'motorway', 'motorway_link'}) | {'cycleway', 'path', 'track'}
+
+# Loại đường (tag highway) được dùng cho từng OSM_NETWORK_TYPE, None: mọi loại
+NETWORK_HIGHWAYS = {'drive': _DRIVE, 'walk': _WALK, 'bike': _BIKE, 'all': None}
+
+_ONEWAY_TRUE = {'yes', 'true', '1'}
+_NO_ACCESS = {'no', 'private'}
+
+def _way_directions(tags, network_type):
+    """
+    Returns:
+        (forward, backward): đường có đi được theo chiều vẽ / chiều ngược lại không
+    """
+    if network_type == 'walk':
+        return True, True
+    if network_type == 'bike' and tags.get('oneway:bicycle') == 'no':
+        return True, True
+
+    oneway = tags.get('oneway')
+    if oneway in ('-1', 'reverse'):
+        return False, True
+    if oneway in _ONEWAY_TRUE:
+        return True, False
+    if oneway is None and (tags.get('highway') in ('motorway', 'motorway_link')
+                           or tags.get('junction') in ('roundabout', 'circular')):
+        return True, False
+    return True, True
+
+def _parse_osm(path, network_type):
+    """
+    Đọc file .osm (XML), chỉ giữ các way là đường đi được theo network_type
+
+    Returns:
+        (lat, lng, edges_u, edges_v): tọa độ node và danh sách cạnh có hướng
+    """
+    allowed = NETWORK_HIGHWAYS.get(network_type, _DRIVE)
+    coords = {}
+    node_ids = {}
+    lat, lng, edges_u, edges_v = [], [], [], []
+
+    for _, elem in ET.iterparse(path, events=('end',)):
+        if elem.tag == 'node':
+            coords[int(elem.get('id'))] = (float(elem.get('lat')), float(elem.get('lon')))
+            elem.clear()
+        elif elem.tag == 'way':
+            tags = {t.get('k'): t.get('v') for t in elem.iter('tag')}
+            highway = tags.get('highway')
+            usable = (highway is not None
+                      and (allowed is None or highway in allowed)
+                      and tags.get('access') not in _NO_ACCESS
+                      and tags.get('area') != 'yes')
+            if usable:
+                forward, backward = _way_directions(tags, network_type)
+                refs = [int(nd.get('ref')) for nd in elem.iter('nd')]
+                refs = [ref for ref in refs if ref in coords]
+                indices = []
+                for ref in refs:
+                    if ref not in node_ids:
+                        node_ids[ref] = len(lat)
+                        lat.append(coords[ref][0])
+                        lng.append(coords[ref][1])
+                    indices.append(node_ids[ref])
+                for a, b in zip(indices, indices[1:]):
+                    if forward:
+                        edges_u.append(a)
+                        edges_v.append(b)
+                    if backward:
+                        edges_u.append(b)
+                        edges_v.append(a)
+            elem.clear()
+
+    return (np.array(lat), np.array(lng),
+            np.array(edges_u, dtype=np.int64), np.array(edges_v, dtype=np.int64))
+
+class OSMGraph:
+    """
+    Đồ thị đường bộ dạng CSR (indptr, indices, weights = chiều dài cạnh, mét)
+    kèm chỉ mục lưới để snap tọa độ vào node gần nhất
+    """
+
+    def __init__(self, lat, lng, indptr, indices, weights):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lng = np.asarray(lng, dtype=np.float64)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.num_nodes = len(self.lat)
+
+        self._csr = None
+        if csr_matrix is not None:
+            self._csr = csr_matrix((self.weights, self.indices, self.indptr),
+                                   shape=(self.num_nodes, self.num_nodes))
+        self._lists = None
+        self._build_index()
+
+    @classmethod
+    def from_edges(cls, lat, lng, edges_u, edges_v):
+        """Dựng CSR từ danh sách cạnh: bỏ vòng lặp, giữ cạnh ngắn nhất giữa 2 node"""
+        lat = np.asarray(lat, dtype=np.float64)
+        lng = np.asarray(lng, dtype=np.float64)
+        keep = edges_u != edges_v
+        u, v = edges_u[keep], edges_v[keep]
+        w = haversine(lat[u], lng[u], lat[v], lng[v])
+
+        order = np.lexsort((w, v, u))
+        u, v, w = u[order], v[order], w[order]
+        first = np.ones(len(u), dtype=bool)
+        first[1:] = (u[1:] != u[:-1]) | (v[1:] != v[:-1])
+        u, v, w = u[first], v[first], w[first]
+
+        indptr = np.zeros(len(lat) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(u, minlength=len(lat)), out=indptr[1:])
+        return cls(lat, lng, indptr, v, w)
+
+    @classmethod
+    def from_osm(cls, path, network_type='drive'):
+        return cls.from_edges(*_parse_osm(path, network_type))
+
+    @classmethod
+    def load(cls, path, network_type='drive'):
+        """
+        Đọc đồ thị từ file .osm, dùng lại bản CSR đã biên dịch (<path>.<network_type>.npz)
+        nếu bản đó mới hơn file .osm
+        """
+        compiled = f"{path}.{network_type}.npz"
+        if os.path.exists(compiled) and os.path.getmtime(compiled) >= os.path.getmtime(path):
+            data = np.load(compiled)
+            return cls(data['lat'], data['lng'], data['indptr'], data['indices'], data['weights'])
+
+        graph = cls.from_osm(path, network_type)
+        try:
+            graph.save(compiled)
+        except OSError as e:
+            logger.warning(f"Cannot save compiled OSM graph {compiled}: {str(e)}")
+        return graph
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            np.savez(f, lat=self.lat, lng=self.lng, indptr=self.indptr,
+                     indices=self.indices, weights=self.weights)
+
+    def _build_index(self):
+        """
+        Chỉ mục lưới: các node ứng viên sắp xếp theo mã ô, tra bằng searchsorted.
+        Chỉ snap vào thành phần liên thông mạnh lớn nhất (nếu có scipy),
+        nếu không thì vào các node có cả cạnh vào và cạnh ra
+        """
+        if self._csr is not None and self.num_nodes:
+            _, labels = connected_components(self._csr, directed=True, connection='strong')
+            candidates = np.flatnonzero(labels == np.bincount(labels).argmax())
+        else:
+            out_degree = np.diff(self.indptr)
+            in_degree = np.bincount(self.indices, minlength=self.num_nodes)
+            candidates = np.flatnonzero((out_degree > 0) & (in_degree > 0))
+
+        keys = self._cell_key(np.floor(self.lat[candidates] / GRID_DEGREES),
+                              np.floor(self.lng[candidates] / GRID_DEGREES))
+        order = np.argsort(keys, kind='stable')
+        self._cell_keys = keys[order]
+        self._cell_nodes = candidates[order]
+
+    @staticmethod
+    def _cell_key(row, col):
+        return (np.asarray(row, dtype=np.int64) + 20000) * 100000 + (np.asarray(col, dtype=np.int64) + 40000)
+
+    def _cell_nodes_at(self, rows, cols):
+        keys = self._cell_key(rows, cols)
+        starts = np.searchsorted(self._cell_keys, keys, side='left')
+        ends = np.searchsorted(self._cell_keys, keys, side='right')
+        return np.concatenate([self._cell_nodes[s:e] for s, e in zip(starts, ends)])
+
+    def snap(self, lat, lng):
+        """
+        Returns:
+            (node, offset): node gần nhất và khoảng cách từ tọa độ tới node (mét),
+            (None, None) nếu không có node nào trong bán kính tìm kiếm
+        """
+        row0 = int(math.floor(lat / GRID_DEGREES))
+        col0 = int(math.floor(lng / GRID_DEGREES))
+        # Khoảng cách tối thiểu (mét) tới một ô cách r vòng
+        ring_meters = GRID_DEGREES * math.pi / 180 * EARTH_RADIUS * max(math.cos(math.radians(lat)), 0.01)
+
+        best_node, best_dist = None, math.inf
+        for ring in range(MAX_SNAP_RINGS + 1):
+            if (ring - 1) * ring_meters > best_dist:
+                break
+            if ring == 0:
+                rows, cols = np.array([row0]), np.array([col0])
+            else:
+                side = np.arange(-ring, ring + 1)
+                inner = np.arange(-ring + 1, ring)
+                rows = np.concatenate([np.full(len(side), -ring), np.full(len(side), ring), inner, inner]) + row0
+                cols = np.concatenate([side, side, np.full(len(inner), -ring), np.full(len(inner), ring)]) + col0
+            nodes = self._cell_nodes_at(rows, cols)
+            if len(nodes) == 0:
+                continue
+            dists = haversine(lat, lng, self.lat[nodes], self.lng[nodes])
+            k = int(np.argmin(dists))
+            if dists[k] < best_dist:
+                best_node, best_dist = int(nodes[k]), float(dists[k])
+
+        if best_node is None:
+            return None, None
+        return best_node, best_dist
+
+    def distances(self, sources, destinations):
+        """
+        Khoảng cách đường đi ngắn nhất từ mỗi node nguồn tới mỗi node đích
+
+        Returns:
+            np.ndarray (len(sources), len(destinations)), inf nếu không có đường đi
+        """
+        unique_sources, source_rows = np.unique(np.asarray(sources, dtype=np.int64), return_inverse=True)
+        destinations = np.asarray(destinations, dtype=np.int64)
+        result = np.empty((len(unique_sources), len(destinations)))
+
+        if self._csr is not None:
+            for start in range(0, len(unique_sources), SCIPY_SOURCE_CHUNK):
+                chunk = unique_sources[start:start + SCIPY_SOURCE_CHUNK]
+                rows = csgraph_dijkstra(self._csr, directed=True, indices=chunk)
+                result[start:start + len(chunk)] = rows[:, destinations]
+        else:
+            targets = set(destinations.tolist())
+            for r, source in enumerate(unique_sources.tolist()):
+                dist = self._dijkstra(source, targets)
+                result[r] = [dist.get(d, math.inf) for d in destinations.tolist()]
+
+        return result[source_rows]
+
+    def _dijkstra(self, source, targets):
+        """Dijkstra một nguồn trên CSR, dừng khi mọi node đích đã được chốt"""
+        if self._lists is None:
+            self._lists = (self.indptr.tolist(), self.indices.tolist(), self.weights.astype(float).tolist())
+        indptr, indices, weights = self._lists
+
+        dist = {source: 0.0}
+        settled = set()
+        remaining = set(targets)
+        heap = [(0.0, source)]
+        while heap and remaining:
+            d, u = heapq.heappop(heap)
+            if u in settled:
+                continue
+            settled.add(u)
+            remaining.discard(u)
+            for k in range(indptr[u], indptr[u + 1]):
+                v = indices[k]
+                nd = d + weights[k]
+                if nd < dist.get(v, math.inf):
+                    dist[v] = nd
+                    heapq.heappush(heap, (nd, v))
+        return {v: dist[v] for v in settled}
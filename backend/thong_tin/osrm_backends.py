@@ -0,0 +1,218 @@
+
+# Nhiều máy chủ OSRM: đo độ trễ từng máy theo cửa sổ trượt, gửi request dự phòng (hedge)
+# sang máy kế tiếp khi máy đầu chậm hơn p95 của nó, ngắt mạch (circuit breaker) máy hay lỗi
+
+import threading
+import time
+import logging
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+import numpy as np
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Số mẫu tối thiểu trước khi dùng p95 làm ngưỡng hedge
+MIN_LATENCY_SAMPLES = 20
+
+class OSRMBackend:
+    """
+    Một máy chủ OSRM:
+    - latencies: thời gian các request thành công gần nhất (cửa sổ `window` mẫu)
+    - Mạch đóng (closed): nhận request. Lỗi liên tiếp `failure_threshold` lần -> mạch mở
+      (open) trong `cooldown` giây, không nhận request. Hết cooldown -> nửa mở (half_open):
+      cho đúng một request thăm dò, thành công thì đóng mạch, lỗi thì mở lại
+    """
+
+    def __init__(self, url, window=100, failure_threshold=3, cooldown=30.0):
+        self.url = url.rstrip('/')
+        self.failure_threshold = max(failure_threshold, 1)
+        self.cooldown = cooldown
+        self._latencies = deque(maxlen=max(window, 1))
+        self._failures = 0
+        self._open_until = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now):
+        if self._open_until is None:
+            return 'closed'
+        return 'open' if now < self._open_until or self._probing else 'half_open'
+
+    def acquire(self):
+        """Máy có nhận request này không (ở trạng thái nửa mở chỉ một request được thăm dò)"""
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == 'half_open':
+                self._probing = True
+                return True
+            return state == 'closed'
+
+    def release(self):
+        """Trả lại lượt thăm dò đã nhận qua acquire() mà không gửi request"""
+        with self._lock:
+            self._probing = False
+
+    def p95(self):
+        """p95 độ trễ (giây) trong cửa sổ, None nếu chưa đủ MIN_LATENCY_SAMPLES mẫu"""
+        with self._lock:
+            if len(self._latencies) < MIN_LATENCY_SAMPLES:
+                return None
+            return float(np.percentile(self._latencies, 95))
+
+    def record_success(self, latency):
+        with self._lock:
+            self._latencies.append(latency)
+            self._failures = 0
+            if self._open_until is not None:
+                logger.info(f"OSRM backend {self.url}: circuit closed")
+            self._open_until = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                if self._open_until is None or self._probing:
+                    logger.warning(f"OSRM backend {self.url}: circuit opened for {self.cooldown:.0f}s "
+                                   f"after {self._failures} failures")
+                    metrics.OSRM_CIRCUIT_OPEN.inc(backend=self.url)
+                self._open_until = time.monotonic() + self.cooldown
+                self._probing = False
+
+class OSRMBackendPool:
+    """
+    Gửi request tới danh sách máy chủ theo thứ tự ưu tiên (thứ tự cấu hình, bỏ qua máy
+    đang ngắt mạch). Máy đầu chưa trả lời sau ngưỡng hedge (p95 của máy đó, trong khoảng
+    [hedge_min, hedge_max]) thì gửi thêm một bản sang máy kế tiếp, lấy kết quả về trước;
+    máy lỗi thì chuyển ngay sang máy kế tiếp.
+    Khi đã có kết quả, request thua không đọc body; trong lúc còn chờ header nó vẫn giữ
+    một luồng, nên đang có max_stragglers request thua như vậy thì không hedge thêm
+    """
+
+    def __init__(self, urls, window=100, failure_threshold=3, cooldown=30.0,
+                 hedge_min=0.05, hedge_max=2.0, hedge_default=1.0, max_stragglers=None):
+        self.backends = [OSRMBackend(url, window, failure_threshold, cooldown)
+                         for url in urls if url.strip()]
+        self.hedge_min = hedge_min
+        self.hedge_max = hedge_max
+        self.hedge_default = hedge_default
+        self.max_stragglers = max_stragglers
+        self._stragglers = 0
+        self._lock = threading.Lock()
+
+    def hedge_delay(self, backend):
+        """Thời gian chờ máy `backend` trước khi gửi request dự phòng (giây)"""
+        p95 = backend.p95()
+        delay = self.hedge_default if p95 is None else p95
+        return min(max(delay, self.hedge_min), self.hedge_max)
+
+    def get(self, session, path, executor, timeout):
+        """
+        GET `path` (ví dụ '/table/v1/driving/...') qua các máy chủ
+
+        Args:
+            executor: thread pool chạy các request (request dự phòng chạy song song)
+            timeout: timeout của mỗi request (giây)
+
+        Returns:
+            Response đầu tiên được máy chủ trả lời (kể cả lỗi 4xx do request),
+            None nếu mọi máy đều lỗi / đang ngắt mạch
+        """
+        candidates = iter(self.backends)
+        pending = {}
+        finished = threading.Event()
+
+        def launch():
+            for backend in candidates:
+                if backend.acquire():
+                    future = executor.submit(self._attempt, session, backend, path, timeout,
+                                             finished)
+                    pending[future] = backend
+                    return backend
+            return None
+
+        primary = launch()
+        if primary is None:
+            return None
+        can_hedge = len(self.backends) > 1
+        raced = False
+        while pending:
+            done, _ = wait(list(pending), timeout=self.hedge_delay(primary) if can_hedge else None,
+                           return_when=FIRST_COMPLETED)
+            if not done:
+                # Máy đầu chậm hơn p95 của nó: gửi thêm một bản sang máy kế tiếp
+                can_hedge = False
+                if self._stragglers_full():
+                    metrics.OSRM_HEDGES.inc(outcome='skipped')
+                elif launch() is not None:
+                    raced = True
+                    metrics.OSRM_HEDGES.inc(outcome='sent')
+                continue
+            for future in done:
+                backend = pending.pop(future)
+                response = future.result()
+                if response is not None:
+                    if raced:
+                        metrics.OSRM_HEDGES.inc(
+                            outcome='primary' if backend is primary else 'hedge')
+                    self._abandon(pending, finished)
+                    return response
+            if not pending:
+                # Mọi request đang chạy đều lỗi: chuyển sang máy kế tiếp
+                can_hedge = False
+                launch()
+        return None
+
+    def _stragglers_full(self):
+        with self._lock:
+            return self.max_stragglers is not None and self._stragglers >= self.max_stragglers
+
+    def _abandon(self, pending, finished):
+        """Đã có kết quả: các request còn lại bỏ body khi có header, được đếm tới khi xong"""
+        finished.set()
+        for future in pending:
+            with self._lock:
+                self._stragglers += 1
+            future.add_done_callback(self._straggler_done)
+
+    def _straggler_done(self, future):
+        with self._lock:
+            self._stragglers -= 1
+
+    @staticmethod
+    def _attempt(session, backend, path, timeout, finished):
+        """
+        Một request tới một máy; lỗi mạng / 5xx / 429 được tính là lỗi của máy.
+        Body chỉ được đọc khi `finished` chưa bật (chưa request nào khác thắng)
+        """
+        if finished.is_set():
+            backend.release()
+            return None
+        started = time.perf_counter()
+        try:
+            response = session.get(backend.url + path, timeout=timeout, stream=True)
+            if response.status_code >= 500 or response.status_code == 429:
+                response.close()
+                logger.error(f"OSRM {backend.url} request failed: {response.status_code}")
+                metrics.OSRM_FAILURES.inc(reason=f"http_{response.status_code}")
+                backend.record_failure()
+                return None
+            if finished.is_set():
+                # Thua request dự phòng: độ trễ tính tới header, đóng kết nối bỏ body
+                response.close()
+                backend.record_success(time.perf_counter() - started)
+                return None
+            response.content  # đọc body trong luồng này (stream=True chỉ chờ header)
+        except Exception as e:
+            logger.error(f"Error calling OSRM {backend.url}: {str(e)}")
+            metrics.OSRM_FAILURES.inc(reason=type(e).__name__)
+            backend.record_failure()
+            return None
+        backend.record_success(time.perf_counter() - started)
+        return response
@@ -1,48 +1,362 @@
+import threading
+import time
 import requests
+import numpy as np
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import Config
+from thong_tin.distance_cache import DistanceCache
+from thong_tin.distance_matrix import MATRIX_DTYPE, decode_osrm_table, empty_matrix, estimate_matrix
+from thong_tin.matrix_provider import MatrixProvider, create_local_provider
+from thong_tin.osrm_backends import OSRMBackendPool
+from utils import metrics
 
 logger = logging.getLogger(__name__)
 
+_INF = float('inf')
+
 class OSRMService:
     """
     Service để tương tác với OSRM API
     """
-    
-    OSRM_BASE_URL = "http://router.project-osrm.org"
-    
-    @staticmethod
-    def get_distance_matrix(coordinates):
+
+    _cache = None
+    _cache_lock = threading.Lock()
+    _session = None
+    _executor = None
+    _hedge_executor = None
+    _backends = None
+    _session_lock = threading.Lock()
+    _provider = None
+    _provider_lock = threading.Lock()
+
+    @classmethod
+    def get_provider(cls):
+        """
+        Nguồn ma trận đang dùng: đồ thị OSM cục bộ nếu được cấu hình, nếu không là OSRM Table API
+        """
+        with cls._provider_lock:
+            if cls._provider is None:
+                cls._provider = create_local_provider() or OSRMTableProvider()
+        return cls._provider
+
+    @classmethod
+    def set_provider(cls, provider):
+        """Thay nguồn ma trận (None: chọn lại theo Config ở lần gọi sau)"""
+        with cls._provider_lock:
+            cls._provider = provider
+
+    @classmethod
+    def get_cache(cls):
+        """
+        Cache khoảng cách dùng chung (khởi tạo lần đầu khi cần)
+        Trả về None nếu cache bị tắt trong Config
         """
-        Lấy ma trận khoảng cách từ OSRM
-        
+        if not Config.OSRM_CACHE_ENABLED:
+            return None
+        with cls._cache_lock:
+            if cls._cache is None:
+                cls._cache = DistanceCache(
+                    path=Config.OSRM_CACHE_PATH,
+                    ttl=Config.OSRM_CACHE_TTL,
+                    max_entries=Config.OSRM_CACHE_MAX_ENTRIES,
+                    memory_entries=Config.OSRM_CACHE_MEMORY_ENTRIES,
+                    precision=Config.OSRM_CACHE_PRECISION
+                )
+        return cls._cache
+
+    @classmethod
+    def get_distance_matrix(cls, coordinates, known=None, info=None):
+        """
+        Lấy ma trận khoảng cách từ nguồn đang dùng (OSRM hoặc đồ thị OSM cục bộ)
+        Các ô đã có trong cache được dùng lại, chỉ gọi OSRM cho các hàng/cột còn thiếu
+        Nguồn lỗi (ví dụ mọi máy chủ OSRM đều lỗi / đang ngắt mạch) thì các ô còn thiếu được
+        ước lượng theo đường chim bay (OSRM_FALLBACK_ENABLED), không lưu vào cache
+
         Args:
             coordinates: List các dict {'lat': float, 'lng': float}
-            
+            known: (points, matrix) của một lời giải trước, các ô giữa những điểm
+                không đổi được lấy lại từ đây
+            info: dict (tùy chọn), được gán info['estimated'] = True nếu có ô ước lượng
+
         Returns:
-            List[List[float]]: Ma trận khoảng cách (mét)
+            np.ndarray float32 (n, n): Ma trận khoảng cách (mét, +inf = không có đường đi)
             Nếu lỗi trả về None
         """
         if not coordinates:
             return None
-            
-        coords_str = ";".join([f"{p['lng']},{p['lat']}" for p in coordinates])
-        
-        url = f"{OSRMService.OSRM_BASE_URL}/table/v1/driving/{coords_str}?annotations=distance"
-        
-        try:
-            logger.info(f"Calling OSRM API: {url}")
-            response = requests.get(url, timeout=40)
-            
+
+        n = len(coordinates)
+        provider = cls.get_provider()
+        cache = cls.get_cache() if provider.cacheable else None
+        if cache is None and known is None:
+            everything = list(range(n))
+            block = cls._timed_fetch(provider, coordinates, everything, everything)
+            if block is None:
+                block = cls._estimate(coordinates, everything, everything, info)
+            return block
+
+        if cache is not None:
+            keys = [cache.point_key(p) for p in coordinates]
+            matrix = cache.lookup(keys)
+        else:
+            keys = None
+            matrix = empty_matrix(n)
+        if known is not None:
+            cls._fill_known(coordinates, matrix, *known)
+
+        missing = int(np.isnan(matrix).sum())
+        metrics.MATRIX_CACHE_HIT_RATIO.observe(1.0 - missing / (n * n))
+        metrics.MATRIX_CELLS.inc(n * n - missing, source='cache')
+
+        blocks = cls._missing_blocks(matrix)
+        if not blocks:
+            logger.info(f"Distance matrix for {n} points served from cache")
+            return matrix
+
+        cells = []
+        for rows, cols in blocks:
+            logger.info(f"Distance cache miss: fetching {len(rows)}x{len(cols)} cells of {n}x{n}")
+            block = cls._timed_fetch(provider, coordinates, rows, cols)
+            if block is None:
+                block = cls._estimate(coordinates, rows, cols, info)
+                if block is None:
+                    return None
+                matrix[np.ix_(rows, cols)] = block
+                continue
+            matrix[np.ix_(rows, cols)] = block
+            if keys is not None:
+                for i, values in zip(rows, block.tolist()):
+                    origin = keys[i]
+                    cells.extend((origin, keys[j], value if value != _INF else None)
+                                 for j, value in zip(cols, values))
+        if cells:
+            cache.store(cells)
+
+        return matrix
+
+    @staticmethod
+    def _timed_fetch(provider, coordinates, sources, destinations):
+        started = time.perf_counter()
+        block = provider.fetch_table(coordinates, sources, destinations)
+        metrics.MATRIX_FETCH_TIME.observe(time.perf_counter() - started, provider=provider.name)
+        if block is not None:
+            metrics.MATRIX_CELLS.inc(len(sources) * len(destinations), source='fetch')
+        return block
+
+    @staticmethod
+    def _estimate(coordinates, sources, destinations, info):
+        """Khối ước lượng theo đường chim bay khi nguồn lỗi, None nếu tắt OSRM_FALLBACK_ENABLED"""
+        if not Config.OSRM_FALLBACK_ENABLED:
+            return None
+        logger.warning(f"Distance source unavailable: estimating {len(sources)}x{len(destinations)} "
+                       f"cells from straight-line distance")
+        if info is not None:
+            info['estimated'] = True
+        metrics.MATRIX_CELLS.inc(len(sources) * len(destinations), source='estimate')
+        block = estimate_matrix(coordinates, sources, destinations, Config.OSRM_FALLBACK_DETOUR)
+        same = np.asarray(sources)[:, None] == np.asarray(destinations)[None, :]
+        block[same] = 0
+        return block
+
+    @staticmethod
+    def _fill_known(coordinates, matrix, known_points, known_matrix):
+        """Điền các ô còn thiếu giữa những điểm trùng tọa độ với lời giải trước"""
+        index = {}
+        for k, p in enumerate(known_points):
+            index.setdefault((float(p['lat']), float(p['lng'])), k)
+        mapped = [(i, index.get((float(p['lat']), float(p['lng']))))
+                  for i, p in enumerate(coordinates)]
+        mapped = [(i, k) for i, k in mapped if k is not None]
+        if not mapped:
+            return
+        new_index, old_index = (list(v) for v in zip(*mapped))
+        cells = np.ix_(new_index, new_index)
+        current = matrix[cells]
+        known_values = np.asarray(known_matrix, dtype=MATRIX_DTYPE)[np.ix_(old_index, old_index)]
+        matrix[cells] = np.where(np.isnan(current), known_values, current)
+
+    @staticmethod
+    def _missing_blocks(matrix):
+        """
+        Chia các ô còn thiếu (NaN) thành các khối (rows, cols) cần gọi OSRM:
+        - Điểm mới (thiếu phần lớn hàng hoặc cột): lấy cả hàng và cả cột của chúng
+        - Các ô lẻ còn lại: một khối hàng x cột bao phủ chúng
+        """
+        n = len(matrix)
+        missing = np.isnan(matrix)
+        row_missing = missing.sum(axis=1)
+        col_missing = missing.sum(axis=0)
+
+        everything = list(range(n))
+        heavy = ((2 * row_missing >= n - 1) | (2 * col_missing >= n - 1)) & (row_missing + col_missing > 0)
+        if heavy.all():
+            return [(everything, everything)]
+
+        blocks = []
+        others = np.flatnonzero(~heavy)
+        heavy = np.flatnonzero(heavy).tolist()
+        if heavy:
+            blocks.append((heavy, everything))
+            if len(others):
+                blocks.append((others.tolist(), heavy))
+
+        inner = missing[np.ix_(others, others)]
+        rows = others[inner.any(axis=1)]
+        if len(rows):
+            cols = others[inner[inner.any(axis=1)].any(axis=0)]
+            blocks.append((rows.tolist(), cols.tolist()))
+
+        return blocks
+
+    @classmethod
+    def _get_session(cls):
+        """Session dùng chung (keep-alive, connection pool) cho mọi request OSRM"""
+        with cls._session_lock:
+            if cls._session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=Config.OSRM_MAX_WORKERS,
+                    pool_maxsize=Config.OSRM_MAX_WORKERS
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                cls._session = session
+        return cls._session
+
+    @classmethod
+    def get_executor(cls):
+        """Thread pool giới hạn số request OSRM (tile, chặng geometry) được gọi đồng thời"""
+        with cls._session_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=Config.OSRM_MAX_WORKERS,
+                    thread_name_prefix="osrm-tile"
+                )
+        return cls._executor
+
+    @classmethod
+    def get_backends(cls):
+        """Danh sách máy chủ OSRM (OSRM_BACKENDS) kèm độ trễ và trạng thái ngắt mạch"""
+        with cls._session_lock:
+            if cls._backends is None:
+                cls._backends = OSRMBackendPool(
+                    Config.OSRM_BACKENDS,
+                    window=Config.OSRM_LATENCY_WINDOW,
+                    failure_threshold=Config.OSRM_CIRCUIT_FAILURES,
+                    cooldown=Config.OSRM_CIRCUIT_COOLDOWN,
+                    hedge_min=Config.OSRM_HEDGE_MIN_MS / 1000.0,
+                    hedge_max=Config.OSRM_HEDGE_MAX_MS / 1000.0,
+                    hedge_default=Config.OSRM_HEDGE_DEFAULT_MS / 1000.0,
+                    max_stragglers=Config.OSRM_MAX_WORKERS
+                )
+            if cls._hedge_executor is None:
+                # Riêng với thread pool của tile: mỗi tile có thể chờ hai request cùng lúc;
+                # request thua còn chạy bị giới hạn ở OSRM_MAX_WORKERS (max_stragglers)
+                cls._hedge_executor = ThreadPoolExecutor(
+                    max_workers=2 * Config.OSRM_MAX_WORKERS,
+                    thread_name_prefix="osrm-request"
+                )
+        return cls._backends
+
+    @classmethod
+    def osrm_get(cls, path):
+        """
+        GET `path` (ví dụ '/route/v1/driving/...') qua các máy chủ OSRM: hedge sang máy
+        kế tiếp khi máy đầu chậm hơn p95, bỏ qua máy đang ngắt mạch
+
+        Returns:
+            Response (status < 500), None nếu không máy nào trả lời
+        """
+        backends = cls.get_backends()
+        return backends.get(cls._get_session(), path, cls._hedge_executor, Config.OSRM_TIMEOUT)
+
+    @classmethod
+    def _fetch_table(cls, coordinates, sources, destinations):
+        """
+        Lấy ma trận con sources x destinations, chia thành các tile
+        (tối đa OSRM_TILE_SIZE hàng x OSRM_TILE_SIZE cột) gọi song song rồi ghép lại
+
+        Returns:
+            np.ndarray float32: len(sources) x len(destinations), None nếu lỗi
+        """
+        tile = max(Config.OSRM_TILE_SIZE, 1)
+        tiles = [(r, c) for r in range(0, len(sources), tile)
+                 for c in range(0, len(destinations), tile)]
+
+        def run(r, c):
+            return cls._fetch_tile(coordinates, sources[r:r + tile], destinations[c:c + tile])
+
+        if len(tiles) == 1:
+            return run(*tiles[0])
+
+        logger.info(f"Fetching {len(sources)}x{len(destinations)} matrix in {len(tiles)} tiles")
+        executor = cls.get_executor()
+        futures = {executor.submit(run, r, c): (r, c) for r, c in tiles}
+
+        matrix = empty_matrix(len(sources), len(destinations))
+        for future in as_completed(futures):
+            r, c = futures[future]
+            block = future.result()
+            if block is None:
+                for other in futures:
+                    other.cancel()
+                return None
+            matrix[r:r + block.shape[0], c:c + block.shape[1]] = block
+
+        return matrix
+
+    @classmethod
+    def _fetch_tile(cls, coordinates, sources, destinations):
+        """
+        Gọi OSRM Table API cho một tile, thử lại khi lỗi mạng / lỗi server
+        Chỉ gửi tọa độ của các điểm cần thiết kèm tham số sources/destinations
+        """
+        needed = sorted(set(sources) | set(destinations))
+        local = {idx: k for k, idx in enumerate(needed)}
+
+        coords_str = ";".join([f"{coordinates[i]['lng']},{coordinates[i]['lat']}" for i in needed])
+
+        path = f"/table/v1/driving/{coords_str}?annotations=distance"
+        if len(needed) != len(sources) or len(needed) != len(destinations):
+            path += "&sources=" + ";".join(str(local[i]) for i in sources)
+            path += "&destinations=" + ";".join(str(local[j]) for j in destinations)
+
+        backends = cls.get_backends()
+        for attempt in range(Config.OSRM_TILE_RETRIES + 1):
+            if attempt:
+                if all(backend.state == 'open' for backend in backends.backends):
+                    # Mọi máy đều đang ngắt mạch: không chờ thử lại
+                    break
+                time.sleep(0.5 * 2 ** (attempt - 1))
+            logger.info(f"Calling OSRM API: {path}")
+            response = cls.osrm_get(path)
+            if response is None:
+                continue
+
             if response.status_code == 200:
-                data = response.json()
-                if data['code'] == 'Ok':
-                    return data['distances']
-                else:
-                    logger.error(f"OSRM Error: {data.get('message')}")
-            else:
-                logger.error(f"OSRM Request Failed: {response.status_code}")
-                
-        except Exception as e:
-            logger.error(f"Error calling OSRM: {str(e)}")
-            
+                try:
+                    code, message, distances = decode_osrm_table(
+                        response.content, len(sources), len(destinations))
+                except ValueError as e:
+                    code, message, distances = 'InvalidResponse', str(e), None
+                if code == 'Ok' and distances is not None:
+                    return distances
+                logger.error(f"OSRM Error: {message or code}")
+                metrics.OSRM_FAILURES.inc(reason='error_code')
+                return None
+
+            logger.error(f"OSRM Request Failed: {response.status_code}")
+            metrics.OSRM_FAILURES.inc(reason=f"http_{response.status_code}")
+            return None
+
         return None
+
+class OSRMTableProvider(MatrixProvider):
+    """Nguồn ma trận mặc định: OSRM Table API (chia tile, gọi song song)"""
+
+    name = 'osrm'
+    cacheable = True
+
+    def fetch_table(self, coordinates, sources, destinations):
+        return OSRMService._fetch_table(coordinates, sources, destinations)
@@ -0,0 +1,89 @@
+
+# Đơn giản hóa (Douglas-Peucker) và mã hóa đường đi (Encoded Polyline của Google)
+
+import math
+import numpy as np
+from thong_tin.geo import EARTH_RADIUS
+
+# Số mét trên một pixel ở xích đạo, zoom 0 (tile 256px của Web Mercator)
+METERS_PER_PIXEL_Z0 = 156543.03392
+
+def tolerance_for_zoom(zoom, lat, pixels=1.0):
+    """Sai số cho phép (mét) tương ứng `pixels` pixel ở mức zoom và vĩ độ cho trước"""
+    return pixels * METERS_PER_PIXEL_Z0 * math.cos(math.radians(lat)) / (2 ** zoom)
+
+def _project(coords):
+    """Chiếu [lat, lng] sang mặt phẳng (mét, equirectangular quanh vĩ độ trung bình)"""
+    lat0 = math.radians(float(np.mean(coords[:, 0])))
+    x = np.radians(coords[:, 1]) * math.cos(lat0) * EARTH_RADIUS
+    y = np.radians(coords[:, 0]) * EARTH_RADIUS
+    return x, y
+
+def douglas_peucker(coords, tolerance):
+    """
+    Giữ lại các điểm sao cho đường đã đơn giản cách đường gốc không quá tolerance (mét)
+
+    Args:
+        coords: mảng (k, 2) [lat, lng]
+    Returns:
+        mảng (m, 2), luôn giữ điểm đầu và điểm cuối
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    if len(coords) <= 2 or tolerance <= 0:
+        return coords
+    x, y = _project(coords)
+    keep = np.zeros(len(coords), dtype=bool)
+    keep[0] = keep[-1] = True
+
+    stack = [(0, len(coords) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        dx = x[last] - x[first]
+        dy = y[last] - y[first]
+        px = x[first + 1:last] - x[first]
+        py = y[first + 1:last] - y[first]
+        length = math.hypot(dx, dy)
+        if length == 0:
+            distances = np.hypot(px, py)
+        else:
+            distances = np.abs(px * dy - py * dx) / length
+        k = int(np.argmax(distances))
+        if distances[k] > tolerance:
+            split = first + 1 + k
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+
+    return coords[keep]
+
+def encode(coords, precision=5):
+    """Mã hóa danh sách [lat, lng] theo thuật toán Encoded Polyline"""
+    if len(coords) == 0:
+        return ''
+    ints = np.round(np.asarray(coords, dtype=np.float64) * 10 ** precision).astype(np.int64)
+    deltas = np.diff(ints, axis=0, prepend=np.zeros((1, 2), dtype=np.int64))
+    chunks = []
+    for value in deltas.ravel().tolist():
+        value = ~(value << 1) if value < 0 else value << 1
+        while value >= 0x20:
+            chunks.append(chr((0x20 | (value & 0x1f)) + 63))
+            value >>= 5
+        chunks.append(chr(value + 63))
+    return ''.join(chunks)
+
+def decode(encoded, precision=5):
+    """Giải mã Encoded Polyline thành danh sách [lat, lng]"""
+    values = []
+    value = shift = 0
+    for char in encoded:
+        byte = ord(char) - 63
+        value |= (byte & 0x1f) << shift
+        shift += 5
+        if byte < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value = shift = 0
+    factor = 10 ** precision
+    coords = np.cumsum(np.array(values, dtype=np.int64).reshape(-1, 2), axis=0) / factor
+    return coords.tolist()
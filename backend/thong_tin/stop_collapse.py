@@ -0,0 +1,71 @@
+
+# Gộp các điểm trùng / gần trùng nhau (cùng tòa nhà, cách nhau vài mét) thành một điểm
+# trước khi giải, rồi trải route trở lại chỉ số điểm gốc
+
+import math
+from thong_tin.geo import haversine
+
+METERS_PER_DEGREE = 111320.0
+
+def collapse_stops(points, radius):
+    """
+    Gộp mỗi điểm vào điểm đại diện đầu tiên (theo thứ tự gốc) cách nó không quá radius mét;
+    radius = 0 chỉ gộp các điểm trùng tọa độ. Các điểm đại diện giữ thứ tự xuất hiện nên
+    điểm 0 (điểm xuất phát) luôn là đại diện 0
+
+    Returns:
+        (reduced, groups): danh sách điểm đại diện, groups[k] = các chỉ số gốc gộp vào điểm k
+    """
+    reduced = []
+    groups = []
+    if radius <= 0:
+        index = {}
+        for i, p in enumerate(points):
+            key = (float(p['lat']), float(p['lng']))
+            k = index.get(key)
+            if k is None:
+                k = index[key] = len(reduced)
+                reduced.append(p)
+                groups.append([])
+            groups[k].append(i)
+        return reduced, groups
+
+    # Tọa độ từ request có thể là chuỗi: chuyển sang float một lần
+    coords = [(float(p['lat']), float(p['lng'])) for p in points]
+    # Lưới ô vuông cạnh radius (mét): chỉ so với đại diện trong 3 x 3 ô xung quanh
+    lat0 = math.radians(sum(lat for lat, _ in coords) / len(coords))
+    x_scale = METERS_PER_DEGREE * math.cos(lat0) / radius
+    y_scale = METERS_PER_DEGREE / radius
+    cells = {}
+    centers = []
+    for i, (p, (lat, lng)) in enumerate(zip(points, coords)):
+        cx = math.floor(lng * x_scale)
+        cy = math.floor(lat * y_scale)
+        match = None
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for k in cells.get((cx + dx, cy + dy), ()):
+                    if (match is None or k < match) and haversine(*centers[k], lat, lng) <= radius:
+                        match = k
+        if match is None:
+            match = len(reduced)
+            reduced.append(p)
+            centers.append((lat, lng))
+            groups.append([])
+            cells.setdefault((cx, cy), []).append(match)
+        groups[match].append(i)
+    return reduced, groups
+
+def expand_route(route, groups):
+    """
+    Route trên các điểm đại diện -> route trên chỉ số gốc: mỗi điểm đại diện được thay
+    bằng cả nhóm của nó (đi liền nhau); route khép kín vẫn kết thúc ở điểm xuất phát
+    """
+    route = list(route)
+    closed = len(route) > 1 and route[0] == route[-1]
+    if closed:
+        route = route[:-1]
+    expanded = [i for k in route for i in groups[k]]
+    if closed:
+        expanded.append(expanded[0])
+    return expanded
@@ -1,5 +1,6 @@
 from thuat_toan.algorithms.genetic_algorithm import genetic_algorithm
 from thuat_toan.algorithms.held_karp import held_karp
+from thuat_toan.algorithms.island_model import island_genetic_algorithm
 
-__all__ = ['genetic_algorithm', 'held_karp']
+__all__ = ['genetic_algorithm', 'held_karp', 'island_genetic_algorithm']
 
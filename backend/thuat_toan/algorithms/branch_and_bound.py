@@ -0,0 +1,225 @@
+
+# Nhánh cận (branch-and-bound) cho bài cỡ vừa: lời giải chính xác với bộ nhớ O(N^2),
+# cận dưới Held-Karp (cây khung + nhân tử Lagrange trên bậc các điểm)
+
+import time
+from itertools import permutations
+import numpy as np
+from thuat_toan.algorithms.local_search import iterated_local_search
+from thuat_toan.algorithms.matrix import finite_costs, to_cost_array
+
+# Sai số khi so sánh cận dưới với lời giải tốt nhất (mét)
+EPS = 1e-6
+# Số vòng subgradient ở gốc / ở mỗi nút con (nút con bắt đầu từ nhân tử của nút cha)
+ROOT_ASCENT_ITERATIONS = 100
+NODE_ASCENT_ITERATIONS = 10
+
+def _spanning_tree(weights, nodes, pi):
+    """
+    Cây khung nhỏ nhất (Prim) trên các điểm `nodes` với trọng số weights[i][j] + pi[i] + pi[j]
+
+    Returns:
+        (tổng trọng số đã cộng nhân tử, bậc của từng điểm theo thứ tự nodes)
+    """
+    k = len(nodes)
+    degree = [0] * k
+    if k < 2:
+        return 0.0, degree
+    row = weights[nodes[0]]
+    offset = pi[nodes[0]]
+    best = [row[v] + offset + pi[v] for v in nodes]
+    parent = [0] * k
+    in_tree = [False] * k
+    in_tree[0] = True
+    total = 0.0
+    for _ in range(k - 1):
+        j = -1
+        value = float('inf')
+        for t in range(k):
+            if not in_tree[t] and best[t] < value:
+                value = best[t]
+                j = t
+        in_tree[j] = True
+        node = nodes[j]
+        total += value
+        degree[j] += 1
+        degree[parent[j]] += 1
+        row = weights[node]
+        offset = pi[node]
+        for t in range(k):
+            if not in_tree[t]:
+                candidate = row[nodes[t]] + offset + pi[nodes[t]]
+                if candidate < best[t]:
+                    best[t] = candidate
+                    parent[t] = j
+    return total, degree
+
+def _path_bound(weights, last, remaining, pi, upper, iterations):
+    """
+    Cận dưới cho phần còn lại của tour: đường đi Hamilton từ `last` qua mọi điểm trong
+    `remaining` rồi về điểm 0. Đường đi như vậy là một cây khung có bậc 1 ở hai đầu và
+    bậc 2 ở các điểm giữa; nới lỏng ràng buộc bậc bằng nhân tử Lagrange pi (tối ưu bằng
+    subgradient) cho cận L(pi) = MST(w + pi) - sum(pi * bậc yêu cầu)
+
+    Returns:
+        (cận dưới, nhân tử pi đã cập nhật)
+    """
+    nodes = [last, 0] + remaining
+    target = [1, 1] + [2] * len(remaining)
+    pi = list(pi)
+    best = -float('inf')
+    step = 2.0
+    for _ in range(iterations):
+        total, degree = _spanning_tree(weights, nodes, pi)
+        bound = total - sum(pi[v] * target[t] for t, v in enumerate(nodes))
+        best = max(best, bound)
+        if best >= upper - EPS:
+            break
+        slack = [degree[t] - target[t] for t in range(len(nodes))]
+        norm = sum(s * s for s in slack)
+        if norm == 0:
+            # Cây khung chính là một đường đi Hamilton: cận đã chặt
+            break
+        amount = step * (upper - bound) / norm
+        for t, v in enumerate(nodes):
+            pi[v] += amount * slack[t]
+        step *= 0.9
+    return best, pi
+
+def _tree_bound(weights, n, pi, upper, iterations):
+    """Cận dưới 1-tree cho cả tour (ở gốc): cây khung trên 1..n-1 + hai cạnh rẻ nhất từ 0"""
+    nodes = list(range(1, n))
+    pi = list(pi)
+    best = -float('inf')
+    step = 2.0
+    for _ in range(iterations):
+        total, degree = _spanning_tree(weights, nodes, pi)
+        cheapest = sorted(nodes, key=lambda v: weights[0][v] + pi[v])[:2]
+        total += sum(weights[0][v] + pi[v] for v in cheapest) + 2 * pi[0]
+        # degree[v] là bậc của điểm v (nodes = 1..n-1)
+        degree = [2] + degree
+        for v in cheapest:
+            degree[v] += 1
+        bound = total - 2 * sum(pi)
+        best = max(best, bound)
+        if best >= upper - EPS:
+            break
+        norm = sum((d - 2) ** 2 for d in degree)
+        if norm == 0:
+            break
+        amount = step * (upper - bound) / norm
+        for v in range(n):
+            pi[v] += amount * (degree[v] - 2)
+        step *= 0.95
+    return best, pi
+
+def branch_and_bound(matrix, time_limit=None, cancel_event=None, upper_route=None):
+    """
+    Nhánh cận tìm kiếm theo chiều sâu: mở rộng đường đi từ điểm 0, mỗi nút con được
+    cắt nếu (chiều dài đã đi + cận dưới phần còn lại) >= lời giải tốt nhất
+
+    - Lời giải ban đầu (cận trên): ILS ngắn, hoặc upper_route nếu có
+    - Cận dưới Held-Karp trên ma trận đối xứng min(c[i][j], c[j][i]): mọi tour có hướng
+      đều không ngắn hơn tour vô hướng tương ứng trên ma trận này nên cận vẫn hợp lệ
+      khi ma trận bất đối xứng (đường một chiều)
+    - Bộ nhớ O(N^2): chỉ giữ các nút con chưa xét trên ngăn xếp
+
+    Args:
+        time_limit: thời gian tối đa (giây); hết giờ thì trả về lời giải tốt nhất và
+            khoảng cách tối ưu (gap) tính từ cận dưới nhỏ nhất của các nút chưa xét
+
+    Returns:
+        dict: route (quay về điểm 0), distance, lower_bound, gap (0 nếu đã chứng minh
+              tối ưu), nodes (số nút đã mở rộng), stop_reason ('optimal', 'time_limit', 'cancelled')
+    """
+    dist = to_cost_array(matrix)
+    n = len(dist)
+    if n < 4:
+        # Quá ít điểm để rẽ nhánh: xét hết các tour (N = 3 có hai chiều đi, khác nhau
+        # khi ma trận bất đối xứng)
+        routes = [[0, *rest] for rest in permutations(range(1, n))] if n else [[]]
+        lengths = [float(dist[r, np.roll(r, -1)].sum()) if n > 1 else 0 for r in routes]
+        best = int(np.argmin(lengths))
+        route = routes[best]
+        return {
+            'route': route + route[:1],
+            'distance': lengths[best],
+            'lower_bound': 0.0,
+            'gap': 0.0,
+            'nodes': 0,
+            'stop_reason': 'optimal'
+        }
+
+    started = time.monotonic()
+    deadline = started + time_limit if time_limit is not None else None
+    costs = finite_costs(dist)
+    lookup = costs.tolist()
+    weights = np.minimum(costs, costs.T).tolist()
+
+    if upper_route is None:
+        upper_route = iterated_local_search(
+            costs, list(range(n)), seed=0, max_iterations=10 * n, stall_iterations=2 * n,
+            time_limit=None if time_limit is None else time_limit / 2,
+            cancel_event=cancel_event)['route']
+    best_route = list(upper_route[:n])
+    upper = sum(lookup[a][b] for a, b in zip(best_route, best_route[1:] + best_route[:1]))
+
+    root_bound, root_pi = _tree_bound(weights, n, [0.0] * n, upper, ROOT_ASCENT_ITERATIONS)
+
+    # Mỗi phần tử: (cận dưới, chiều dài đã đi, đường đi, nhân tử của nút cha)
+    stack = [(root_bound, 0.0, [0], root_pi)]
+    nodes = 0
+    stop_reason = 'optimal'
+    while stack:
+        if cancel_event is not None and cancel_event.is_set():
+            stop_reason = 'cancelled'
+            break
+        if deadline is not None and time.monotonic() >= deadline:
+            stop_reason = 'time_limit'
+            break
+
+        bound, length, path, pi = stack.pop()
+        if bound >= upper - EPS:
+            continue
+        nodes += 1
+        last = path[-1]
+        visited = set(path)
+        remaining = [v for v in range(1, n) if v not in visited]
+
+        children = []
+        for v in sorted(remaining, key=lookup[last].__getitem__):
+            child_length = length + lookup[last][v]
+            rest = [u for u in remaining if u != v]
+            if len(rest) <= 1:
+                # Chỉ còn một cách đi: tính thẳng chiều dài tour
+                tail = [v] + rest + [0]
+                total = length + sum(lookup[a][b] for a, b in zip([last] + tail, tail))
+                if total < upper - EPS:
+                    upper = total
+                    best_route = path + tail[:-1]
+                continue
+            child_bound, child_pi = _path_bound(weights, v, rest, pi, upper - child_length,
+                                                NODE_ASCENT_ITERATIONS)
+            child_bound += child_length
+            if child_bound < upper - EPS:
+                children.append((child_bound, child_length, path + [v], child_pi))
+
+        # Nút con có cận nhỏ nhất được xét trước (ở đỉnh ngăn xếp)
+        children.sort(key=lambda child: child[0], reverse=True)
+        stack.extend(children)
+
+    if stop_reason == 'optimal':
+        lower_bound = upper
+    else:
+        # Mọi lời giải tốt hơn đều nằm trong một nút chưa xét trên ngăn xếp
+        lower_bound = min([upper] + [max(entry[0], root_bound) for entry in stack])
+        if lower_bound >= upper - EPS:
+            stop_reason = 'optimal'
+    return {
+        'route': best_route + best_route[:1],
+        'distance': float(dist[best_route, np.roll(best_route, -1)].sum()),
+        'lower_bound': float(lower_bound),
+        'gap': float((upper - lower_bound) / upper) if upper > 0 else 0.0,
+        'nodes': nodes,
+        'stop_reason': stop_reason
+    }
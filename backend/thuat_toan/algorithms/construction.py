@@ -0,0 +1,162 @@
+
+# Các heuristic xây dựng lời giải ban đầu (dùng để gieo quần thể GA)
+
+import numpy as np
+from thuat_toan.algorithms.matrix import finite_costs
+
+def _rotate_to(tour, start):
+    tour = np.asarray(tour)
+    k = int(np.flatnonzero(tour == start)[0])
+    return np.concatenate([tour[k:], tour[:k]])
+
+def nearest_neighbor_tour(costs, start=0):
+    """Láng giềng gần nhất: luôn đi tới điểm chưa thăm gần nhất"""
+    n = len(costs)
+    visited = np.zeros(n, dtype=bool)
+    tour = np.empty(n, dtype=np.intp)
+    current = start
+    for t in range(n):
+        tour[t] = current
+        visited[current] = True
+        if t < n - 1:
+            row = np.where(visited, np.inf, costs[current])
+            current = int(np.argmin(row))
+    return tour
+
+def greedy_edge_tour(costs):
+    """
+    Greedy edge (có hướng): duyệt cạnh theo chiều dài tăng dần, nhận cạnh nếu
+    không làm điểm nào có quá 1 cạnh ra / 1 cạnh vào và không tạo chu trình con
+    """
+    n = len(costs)
+    succ = np.full(n, -1)
+    has_pred = np.zeros(n, dtype=bool)
+    # Mỗi đoạn đường đi lưu đầu/cuối để kiểm tra chu trình con trong O(1)
+    head_of = list(range(n))  # cuối đoạn -> đầu đoạn
+    tail_of = list(range(n))  # đầu đoạn -> cuối đoạn
+
+    order = np.argsort(costs, axis=None, kind='stable')
+    edges = 0
+    for flat in order.tolist():
+        if edges == n - 1:
+            break
+        u, v = divmod(flat, n)
+        if u == v or succ[u] != -1 or has_pred[v]:
+            continue
+        # u là cuối một đoạn, v là đầu một đoạn; nối nếu khác đoạn
+        head = head_of[u]
+        if head == v:
+            continue
+        tail = tail_of[v]
+        succ[u] = v
+        has_pred[v] = True
+        head_of[tail] = head
+        tail_of[head] = tail
+        edges += 1
+
+    start = int(np.flatnonzero(~has_pred)[0])
+    tour = np.empty(n, dtype=np.intp)
+    current = start
+    for t in range(n):
+        tour[t] = current
+        current = succ[current]
+    return tour
+
+def insertion_tour(costs, start=0, farthest=False):
+    """
+    Cheapest insertion (mặc định) hoặc farthest insertion: chọn điểm chèn rẻ nhất
+    (hoặc xa tour nhất) rồi chèn vào vị trí làm tăng chiều dài ít nhất.
+    Với mỗi điểm chưa chèn lưu vị trí chèn tốt nhất (cạnh đi ra từ best_after),
+    sau mỗi lần chèn chỉ so sánh với 2 cạnh mới, trừ các điểm có cạnh tốt nhất vừa bị
+    thay thì tính lại trên toàn tour, nên tổng chi phí xấp xỉ O(n^2)
+    """
+    n = len(costs)
+    succ = np.full(n, start)
+    remaining = np.ones(n, dtype=bool)
+    remaining[start] = False
+    # Khoảng cách nhỏ nhất từ tour tới từng điểm (dùng cho farthest insertion)
+    nearest = costs[start].copy()
+    best_cost = costs[start] + costs[:, start]
+    best_after = np.full(n, start)
+
+    for _ in range(n - 1):
+        candidates = np.flatnonzero(remaining)
+        if farthest:
+            city = int(candidates[np.argmax(nearest[candidates])])
+        else:
+            city = int(candidates[np.argmin(best_cost[candidates])])
+
+        a = int(best_after[city])
+        b = int(succ[a])
+        succ[a] = city
+        succ[city] = b
+        remaining[city] = False
+        np.minimum(nearest, costs[city], out=nearest)
+
+        rest = np.flatnonzero(remaining)
+        if not len(rest):
+            break
+        stale = best_after[rest] == a
+
+        # So sánh với 2 cạnh mới a -> city và city -> b
+        for u, v in ((a, city), (city, b)):
+            added = costs[u, rest] + costs[rest, v] - costs[u, v]
+            better = added < best_cost[rest]
+            best_cost[rest[better]] = added[better]
+            best_after[rest[better]] = u
+
+        # Cạnh a -> b không còn: tính lại trên toàn tour cho các điểm đã chọn cạnh đó
+        stale_nodes = rest[stale]
+        if len(stale_nodes):
+            tour_nodes = np.flatnonzero(~remaining)
+            nexts = succ[tour_nodes]
+            added = (costs[np.ix_(tour_nodes, stale_nodes)] + costs[np.ix_(stale_nodes, nexts)].T
+                     - costs[tour_nodes, nexts][:, None])
+            pos = np.argmin(added, axis=0)
+            best_cost[stale_nodes] = added[pos, np.arange(len(stale_nodes))]
+            best_after[stale_nodes] = tour_nodes[pos]
+
+    tour = np.empty(n, dtype=np.intp)
+    current = start
+    for t in range(n):
+        tour[t] = current
+        current = succ[current]
+    return tour
+
+def seed_tours(dist, points, count, rng):
+    """
+    Sinh tối đa count tour tốt (không trùng nhau) cho các điểm trong points, bắt đầu
+    bằng points[0]: greedy edge, cheapest insertion, farthest insertion, rồi láng
+    giềng gần nhất từ điểm xuất phát và từ các điểm ngẫu nhiên
+
+    Returns:
+        np.ndarray (m, len(points)), m <= count
+    """
+    points = np.asarray(points, dtype=np.intp)
+    n = len(points)
+    if count <= 0 or n < 3:
+        return np.empty((0, n), dtype=np.intp)
+
+    costs = finite_costs(np.asarray(dist)[np.ix_(points, points)])
+
+    builders = [
+        lambda: greedy_edge_tour(costs),
+        lambda: insertion_tour(costs),
+        lambda: insertion_tour(costs, farthest=True),
+        lambda: nearest_neighbor_tour(costs, 0),
+    ]
+    starts = rng.permutation(np.arange(1, n))
+    builders += [lambda s=int(s): nearest_neighbor_tour(costs, s) for s in starts]
+
+    tours = []
+    seen = set()
+    for build in builders:
+        if len(tours) >= count:
+            break
+        tour = _rotate_to(build(), 0)
+        key = tour.tobytes()
+        if key not in seen:
+            seen.add(key)
+            tours.append(points[tour])
+
+    return np.array(tours, dtype=np.intp)
@@ -0,0 +1,162 @@
+
+# Phân cụm trước, xếp lộ trình sau (cluster-first, route-second) cho bài rất nhiều điểm:
+# các hàm thuần tính toán; việc lấy ma trận và giải từng cụm nằm ở RouteSolver
+
+import math
+import numpy as np
+from thuat_toan.algorithms.construction import insertion_tour
+from thuat_toan.algorithms.matrix import finite_costs
+from thuat_toan.algorithms.held_karp import held_karp
+from thuat_toan.algorithms.local_search import local_search
+
+# Cụm nhỏ hơn mức này được gộp vào cụm gần nhất (mỗi cụm cần đủ điểm cho 2 cửa sổ nối)
+MIN_CLUSTER_SIZE = 4
+# Số điểm tối đa mỗi bên chỗ nối được sắp lại (cửa sổ 2 * SEAM_SIDE điểm + 1 điểm giả cho Held-Karp)
+SEAM_SIDE = 7
+
+def auto_cluster_size(n, workers, max_size):
+    """
+    Kích thước cụm: đủ nhỏ để mỗi cụm giải nhanh (<= max_size), đủ lớn để không
+    có nhiều cụm hơn cần thiết khi đã chia đều cho các worker
+    """
+    return max(min(max_size, math.ceil(n / max(workers, 1))), MIN_CLUSTER_SIZE * 2)
+
+def _project(coordinates):
+    """[{'lat', 'lng'}] -> mảng (n, 2) trên mặt phẳng (độ, equirectangular quanh vĩ độ trung bình)"""
+    xy = np.array([[float(p['lng']), float(p['lat'])] for p in coordinates], dtype=np.float64)
+    xy[:, 0] *= math.cos(math.radians(float(xy[:, 1].mean())))
+    return xy
+
+def _kmeans(xy, k, rng, iterations=20):
+    """k-means (khởi tạo k-means++) trên mảng điểm (n, 2), trả về nhãn cụm của từng điểm"""
+    n = len(xy)
+    centers = np.empty((k, 2))
+    centers[0] = xy[rng.integers(n)]
+    closest = ((xy - centers[0]) ** 2).sum(axis=1)
+    for c in range(1, k):
+        total = closest.sum()
+        index = rng.choice(n, p=closest / total) if total > 0 else rng.integers(n)
+        centers[c] = xy[index]
+        closest = np.minimum(closest, ((xy - centers[c]) ** 2).sum(axis=1))
+
+    labels = None
+    for _ in range(iterations):
+        distances = ((xy[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        new_labels = distances.argmin(axis=1)
+        if labels is not None and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros((k, 2))
+        np.add.at(sums, labels, xy)
+        filled = counts > 0
+        centers[filled] = sums[filled] / counts[filled, None]
+    return labels
+
+def partition(coordinates, size, seed=None):
+    """
+    Chia các điểm thành các cụm theo vị trí (k-means với k = n / size); cụm lớn hơn
+    1.5 * size được chia tiếp, cụm quá nhỏ được gộp vào cụm có tâm gần nhất
+
+    Returns:
+        (clusters, xy): danh sách các list chỉ số điểm, tọa độ đã chiếu
+    """
+    xy = _project(coordinates)
+    rng = np.random.default_rng(seed)
+
+    pending = [np.arange(len(xy))]
+    clusters = []
+    while pending:
+        indices = pending.pop()
+        if len(indices) <= size * 1.5:
+            clusters.append(indices)
+            continue
+        labels = _kmeans(xy[indices], math.ceil(len(indices) / size), rng)
+        parts = [indices[labels == c] for c in range(labels.max() + 1)]
+        parts = [part for part in parts if len(part)]
+        if len(parts) == 1:
+            clusters.append(indices)
+        else:
+            pending.extend(parts)
+
+    clusters.sort(key=len)
+    while len(clusters) > 1 and len(clusters[0]) < MIN_CLUSTER_SIZE:
+        small = clusters.pop(0)
+        center = xy[small].mean(axis=0)
+        nearest = min(range(len(clusters)),
+                      key=lambda c: ((xy[clusters[c]].mean(axis=0) - center) ** 2).sum())
+        clusters[nearest] = np.concatenate([clusters[nearest], small])
+        clusters.sort(key=len)
+    return [cluster.tolist() for cluster in clusters], xy
+
+def order_clusters(centroids):
+    """Thứ tự đi qua các cụm: tour ngắn nhất qua tâm các cụm (khoảng cách trên mặt phẳng)"""
+    k = len(centroids)
+    if k <= 3:
+        return list(range(k))
+    costs = np.sqrt(((centroids[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2))
+    if k <= 12:
+        return held_karp(costs)['route'][:-1]
+    costs = finite_costs(costs)
+    return local_search(costs.tolist(), insertion_tour(costs).tolist(), costs=costs)
+
+def choose_endpoints(clusters, order, xy):
+    """
+    Điểm vào / điểm ra của mỗi cụm theo thứ tự đi: điểm ra là điểm gần tâm cụm kế tiếp
+    nhất, điểm vào là điểm gần điểm ra của cụm trước nhất (khác điểm ra của chính cụm)
+
+    Returns:
+        list (entry, exit) theo thứ tự order
+    """
+    k = len(order)
+    centroids = [xy[clusters[c]].mean(axis=0) for c in order]
+    exits = []
+    for t, c in enumerate(order):
+        members = clusters[c]
+        target = centroids[(t + 1) % k]
+        exits.append(members[int(((xy[members] - target) ** 2).sum(axis=1).argmin())])
+
+    endpoints = []
+    for t, c in enumerate(order):
+        members = [i for i in clusters[c] if i != exits[t]] or clusters[c]
+        source = xy[exits[t - 1]]
+        entry = members[int(((xy[members] - source) ** 2).sum(axis=1).argmin())]
+        endpoints.append((entry, exits[t]))
+    return endpoints
+
+def path_matrix(matrix, entry, exit):
+    """
+    Ma trận để giải bài đường đi Hamilton từ entry tới exit bằng solver tour: thêm một
+    điểm giả (chỉ số cuối) chỉ nối được exit -> điểm giả -> entry với chi phí 0
+    """
+    m = len(matrix)
+    extended = np.full((m + 1, m + 1), np.inf, dtype=np.asarray(matrix).dtype)
+    extended[:m, :m] = matrix
+    extended[m, m] = 0
+    extended[exit, m] = 0
+    extended[m, entry] = 0
+    return extended
+
+def path_from_tour(route, dummy):
+    """Cắt tour (có điểm giả) thành đường đi: bắt đầu ngay sau điểm giả"""
+    route = list(route)
+    if len(route) > 1 and route[0] == route[-1]:
+        route = route[:-1]
+    k = route.index(dummy)
+    return route[k + 1:] + route[:k]
+
+def repair_seam(matrix):
+    """
+    Sắp lại tối ưu (Held-Karp) các điểm giữa của một cửa sổ quanh chỗ nối hai cụm,
+    giữ nguyên điểm đầu và điểm cuối cửa sổ
+
+    Returns:
+        (thứ tự mới các chỉ số 0..w-1, chiều dài từng chặng theo thứ tự đó)
+    """
+    w = len(matrix)
+    route = held_karp(path_matrix(matrix, 0, w - 1))['route']
+    order = path_from_tour(route, w)
+    if order[0] != 0 or order[-1] != w - 1:
+        order = list(range(w))
+    legs = [float(matrix[a][b]) for a, b in zip(order, order[1:])]
+    return order, legs
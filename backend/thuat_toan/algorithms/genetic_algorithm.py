@@ -1,7 +1,8 @@
 # Thuật toán Genetic Algorithm (GA) 
-import random
-import math
-from typing import List, Tuple
+import time
+import numpy as np
+from thuat_toan.algorithms.construction import seed_tours
+from thuat_toan.algorithms.matrix import finite_costs, to_cost_array
 
 def calculate_route_distance(matrix, route):
     """
@@ -34,84 +35,276 @@ def calculate_route_distance(matrix, route):
     
     return total_distance
 
-def create_initial_population(points, population_size):
-    population = []
+def create_initial_population(points, population_size, rng, seeds=None):
+    """
+    Quần thể lưu dưới dạng mảng 2 chiều (population_size x n),
+    cột 0 luôn là điểm xuất phát.
+    seeds: các tour dựng sẵn (mảng m x n) thay cho m cá thể ngẫu nhiên đầu tiên
+    """
+    points = np.asarray(points, dtype=np.intp)
+    population = np.empty((population_size, len(points)), dtype=np.intp)
     
     # Giữ điểm đầu tiên cố định (start point)
-    start_point = points[0]
-    other_points = points[1:]
+    population[:, 0] = points[0]
+    population[:, 1:] = rng.permuted(np.tile(points[1:], (population_size, 1)), axis=1)
     
-    for _ in range(population_size):
-        shuffled = other_points.copy()
-        random.shuffle(shuffled)
-        route = [start_point] + shuffled
-        population.append(route)
+    if seeds is not None and len(seeds):
+        count = min(len(seeds), population_size)
+        population[:count] = seeds[:count]
     
     return population
 
-def fitness(matrix, route):
-    distance = calculate_route_distance(matrix, route)
-    if distance == float('inf'):
-        return 0
-    return 1 / (distance + 1)
+def polish_tours(lookup, tours, neighbors, improve=None):
+    """
+    Áp dụng toán tử cải thiện (mặc định 2-opt) cho từng tour gieo sẵn: mỗi tour hội tụ
+    về một cực tiểu địa phương riêng
+    """
+    improve = improve or two_opt
+    for i in range(len(tours)):
+        tours[i] = improve(lookup, tours[i].tolist(), neighbors)
+    return tours
+
+def improvement_operator(name, dist, lookup=None):
+    """
+    Toán tử cải thiện áp dụng cho cá thể tốt nhất mỗi thế hệ:
+    'two_opt' (mặc định) hoặc 'local_search' (LK-step + Or-opt, xem local_search.py)
+
+    Returns:
+        (lookup, improve): ma trận dạng list và hàm improve(lookup, route, neighbors)
+    """
+    if name == 'local_search':
+        from thuat_toan.algorithms.local_search import local_search
+        costs = finite_costs(dist)
+        return costs.tolist(), lambda graph, route, neighbors: local_search(
+            graph, route, neighbors, costs=costs)
+    return (lookup if lookup is not None else dist.tolist()), two_opt
 
-def selection(population, fitness_scores, num_parents):
-    parents = []
+def seed_count(population_size, seed_fraction):
+    """Số cá thể được gieo bằng heuristic xây dựng (phần còn lại ngẫu nhiên)"""
+    seed_fraction = min(max(seed_fraction or 0.0, 0.0), 1.0)
+    return int(round(population_size * seed_fraction))
+
+def tour_lengths(dist, population):
+    """
+    Tính chiều dài (quay về điểm xuất phát) của toàn bộ quần thể bằng một phép gather
+    trên ma trận khoảng cách
+    """
+    lengths = dist[population[:, :-1], population[:, 1:]].sum(axis=1, dtype=np.float64)
+    lengths += dist[population[:, -1], population[:, 0]]
+    return lengths
+
+def selection(distances, num_parents, rng, tournament_size=3):
+    """
+    Tournament selection: mỗi lượt chọn ngẫu nhiên tournament_size cá thể, lấy cá thể
+    có quãng đường ngắn nhất. Trả về chỉ số các cá thể cha mẹ.
+    """
+    tournament_size = min(tournament_size, len(distances))
+    tournaments = rng.integers(0, len(distances), size=(num_parents, tournament_size))
+    winners = np.argmin(distances[tournaments], axis=1)
+    return tournaments[np.arange(num_parents), winners]
+
+def _order_crossover(segment_src, fill_src, start, end, num_nodes, out):
+    # Giữ đoạn [start, end) của segment_src, các vị trí còn lại điền theo thứ tự của fill_src
+    rows, n = segment_src.shape
+    row_idx = np.arange(rows)[:, None]
+    seg_rest = segment_src[:, 1:]
+    fill_rest = fill_src[:, 1:]
     
-    for _ in range(num_parents):
-        # Chọn 3 cá thể ngẫu nhiên, lấy tốt nhất
-        tournament_size = 3
-        tournament = random.sample(list(zip(population, fitness_scores)), 
-                                   min(tournament_size, len(population)))
-        winner = max(tournament, key=lambda x: x[1])
-        parents.append(winner[0])
+    cols = np.arange(n - 1)
+    in_segment = (cols >= start[:, None]) & (cols < end[:, None])
     
-    return parents
-
-def crossover(parent1, parent2):
-    if len(parent1) < 3:
-        return parent1.copy(), parent2.copy()
+    taken = np.zeros((rows, num_nodes), dtype=bool)
+    taken[row_idx, seg_rest] = in_segment
+    keep = ~taken[row_idx, fill_rest]
     
-    # Điểm đầu luôn giữ nguyên
-    start_point = parent1[0]
-    p1_rest = parent1[1:]
-    p2_rest = parent2[1:]
+    out[:, 0] = segment_src[:, 0]
+    out_rest = out[:, 1:]
+    out_rest[in_segment] = seg_rest[in_segment]
+    out_rest[~in_segment] = fill_rest[keep]
+
+def crossover(parents1, parents2, rng, num_nodes, out):
+    """
+    Order crossover theo lô: mỗi cặp (parents1[i], parents2[i]) sinh 2 con ghi vào
+    out[i] và out[len(parents1) + i]. Điểm đầu luôn giữ nguyên.
+    """
+    pairs, n = parents1.shape
+    if n < 3:
+        out[:pairs] = parents1
+        out[pairs:] = parents2
+        return out
     
-    # Chọn 2 điểm cắt ngẫu nhiên
-    if len(p1_rest) < 2:
-        return parent1.copy(), parent2.copy()
+    # Chọn 2 điểm cắt ngẫu nhiên (dùng chung cho cả 2 con)
+    start = rng.integers(0, n - 1, size=pairs)
+    end = rng.integers(start + 1, n)
     
-    start = random.randint(0, len(p1_rest) - 1)
-    end = random.randint(start + 1, len(p1_rest))
+    _order_crossover(parents1, parents2, start, end, num_nodes, out[:pairs])
+    _order_crossover(parents2, parents1, start, end, num_nodes, out[pairs:])
+    return out
+
+def mutate(population, mutation_rate, rng):
+    """
+    Mutation: đổi chỗ 2 điểm ngẫu nhiên (trừ điểm đầu), thực hiện tại chỗ trên mảng
+    """
+    rows_count, n = population.shape
+    if n <= 3:
+        return population
     
-    # Tạo child1
-    segment1 = p1_rest[start:end]
-    remaining1 = [x for x in p2_rest if x not in segment1]
-    child1 = [start_point] + remaining1[:start] + segment1 + remaining1[start:]
+    rows = np.flatnonzero(rng.random(rows_count) < mutation_rate)
+    idx1 = rng.integers(0, n - 1, size=len(rows))
+    idx2 = (idx1 + rng.integers(1, n - 1, size=len(rows))) % (n - 1)
+    idx1 += 1
+    idx2 += 1
     
-    # Tạo child2
-    segment2 = p2_rest[start:end]
-    remaining2 = [x for x in p1_rest if x not in segment2]
-    child2 = [start_point] + remaining2[:start] + segment2 + remaining2[start:]
+    swapped = population[rows, idx1]
+    population[rows, idx1] = population[rows, idx2]
+    population[rows, idx2] = swapped
     
-    return child1, child2
+    return population
 
-def mutate(route, mutation_rate=0.1):
+def evolve(dist, population, generations, mutation_rate, elite_size, rng,
+           lookup=None, neighbors=None, time_limit=None, stall_generations=None,
+           stall_time=None, on_generation=None, cancel_event=None, improve=None, trace=None):
     """
-    Mutation: đổi chỗ 2 điểm ngẫu nhiên (trừ điểm đầu)
+    Chạy GA (kèm 2-opt cho cá thể tốt nhất) trên một quần thể cho trước
+
+    Args:
+        dist: ma trận khoảng cách NumPy (inf = không có đường)
+        population: mảng (P, n), cột 0 là điểm xuất phát
+        lookup, neighbors: ma trận dạng list và danh sách láng giềng cho 2-opt
+            (tính từ dist nếu không truyền vào)
+        time_limit: thời gian tối đa (giây), None = không giới hạn
+        stall_generations / stall_time: dừng sớm khi không cải thiện sau số thế hệ /
+            số giây này (None hoặc 0 = tắt)
+        on_generation: callback(generation, best_route, best_distance) sau mỗi thế hệ
+        cancel_event: threading.Event, dừng khi được set
+        improve: toán tử cải thiện improve(lookup, route, neighbors), mặc định two_opt
+        trace: list (tùy chọn), mỗi thế hệ thêm một bản ghi hội tụ (xem _trace_generation)
+
+    Returns:
+        dict: population, route / distance (cá thể tốt nhất đã gặp),
+              generations (số thế hệ đã chạy), stop_reason
+              ('max_generations' | 'time_limit' | 'stagnation' | 'cancelled')
     """
-    if random.random() < mutation_rate and len(route) > 3:
-        idx1, idx2 = random.sample(range(1, len(route)), 2)
-        route[idx1], route[idx2] = route[idx2], route[idx1]
+    if lookup is None:
+        lookup = dist.tolist()
+    if neighbors is None:
+        neighbors = build_neighbor_lists(dist)
+    if improve is None:
+        improve = two_opt
     
-    return route
+    population_size = len(population)
+    elite_size = min(max(elite_size, 0), population_size)
+    num_children = population_size - elite_size
+    num_pairs = (num_children + 1) // 2
+    
+    next_population = np.empty_like(population)
+    children = np.empty((2 * num_pairs, population.shape[1]), dtype=population.dtype)
+    
+    best_route = None
+    best_distance = float('inf')
+    
+    started = time.monotonic()
+    deadline = started + time_limit if time_limit is not None else None
+    last_improved_generation = 0
+    last_improved_at = started
+    stop_reason = 'max_generations'
+    generation = 0
+    
+    # Vòng lặp qua các thế hệ
+    while generation < generations:
+        distances = tour_lengths(dist, population)
+        order = np.argsort(distances, kind='stable')
+        
+        if distances[order[0]] < best_distance:
+            best_route = population[order[0]].copy()
+            best_distance = float(distances[order[0]])
+            last_improved_generation = generation
+            last_improved_at = time.monotonic()
+        
+        next_population[:elite_size] = population[order[:elite_size]]
+        
+        if num_pairs:
+            parents = selection(distances, 2 * num_pairs, rng)
+            crossover(population[parents[:num_pairs]], population[parents[num_pairs:]],
+                      rng, len(dist), children)
+            next_population[elite_size:] = children[:num_children]
+            mutate(next_population[elite_size:], mutation_rate, rng)
+        
+        # 2-OPT Local Search (Memetic Algorithm)
+        # Áp dụng 2-opt cho cá thể tốt nhất của thế hệ mới để tinh chỉnh
+        if trace is None:
+            next_population[0] = improve(lookup, next_population[0].tolist(), neighbors)
+        else:
+            improve_started = time.perf_counter()
+            next_population[0] = improve(lookup, next_population[0].tolist(), neighbors)
+            trace.append(_trace_generation(generation + 1, population, distances, order,
+                                           best_distance, time.perf_counter() - improve_started))
+        
+        population, next_population = next_population, population
+        generation += 1
+        
+        if on_generation is not None:
+            on_generation(generation, best_route, best_distance)
+        
+        # Điều kiện dừng sớm (anytime): bị hủy, hết thời gian hoặc hội tụ
+        if cancel_event is not None and cancel_event.is_set():
+            stop_reason = 'cancelled'
+            break
+        now = time.monotonic()
+        if deadline is not None and now >= deadline:
+            stop_reason = 'time_limit'
+            break
+        if stall_generations and generation - last_improved_generation >= stall_generations:
+            stop_reason = 'stagnation'
+            break
+        if stall_time and now - last_improved_at >= stall_time:
+            stop_reason = 'stagnation'
+            break
+    
+    # Đánh giá thế hệ cuối (bao gồm cá thể vừa được 2-opt)
+    distances = tour_lengths(dist, population)
+    best_idx = int(np.argmin(distances))
+    if distances[best_idx] < best_distance:
+        best_route = population[best_idx].copy()
+        best_distance = float(distances[best_idx])
+    
+    return {
+        'population': population,
+        'route': best_route,
+        'distance': best_distance,
+        'generations': generation,
+        'stop_reason': stop_reason
+    }
+
+def _trace_generation(generation, population, distances, order, best_distance, improve_seconds):
+    """
+    Bản ghi hội tụ của một thế hệ: khoảng cách tốt nhất / trung bình, độ đa dạng
+    (tỉ lệ cạnh trung bình không trùng với cá thể tốt nhất) và thời gian 2-opt
+    """
+    n = population.shape[1]
+    # succ[p, r]: điểm đi sau điểm nhỏ thứ r trong cá thể p (mọi cá thể là hoán vị của cùng tập điểm)
+    succ = np.empty_like(population)
+    np.put_along_axis(succ, np.argsort(population, axis=1), np.roll(population, -1, axis=1), axis=1)
+    shared = (succ == succ[order[0]]).sum(axis=1)
+    finite = distances[np.isfinite(distances)]
+    return {
+        'generation': generation,
+        'best_distance': best_distance,
+        'mean_distance': float(finite.mean()) if len(finite) else None,
+        'diversity': round(float(1.0 - shared.mean() / n), 4),
+        'improve_ms': round(improve_seconds * 1000.0, 3)
+    }
 
 def genetic_algorithm(graph, points, population_size=50, generations=100, 
-                     mutation_rate=0.1, elite_size=5):
+                     mutation_rate=0.1, elite_size=5, seed=None, time_limit=None,
+                     stall_generations=None, stall_time=None, on_generation=None,
+                     cancel_event=None, seed_fraction=0.0, improvement='two_opt', trace=None):
     if len(points) < 2:
         return {
             'route': points,
-            'distance': 0
+            'distance': 0,
+            'generations': 0,
+            'stop_reason': 'trivial'
         }
     
     if len(points) == 2:
@@ -121,96 +314,140 @@ def genetic_algorithm(graph, points, population_size=50, generations=100,
              dist = graph[points[0]][points[1]]
              return {
                 'route': points + [points[0]], # Quay về đầu
-                'distance': dist * 2
+                'distance': dist * 2,
+                'generations': 0,
+                'stop_reason': 'trivial'
              }
         except:
              return {
                 'route': points,
-                'distance': 0
+                'distance': 0,
+                'generations': 0,
+                'stop_reason': 'trivial'
              }
     
-    population = create_initial_population(points, population_size)
-    
-    best_route = None
-    best_distance = float('inf')
+    rng = np.random.default_rng(seed)
+    dist = to_cost_array(graph)
+    population_size = max(population_size, 1)
+    # Gieo một phần quần thể bằng các tour heuristic (NN, greedy edge, insertion)
+    lookup, improve = improvement_operator(improvement, dist)
+    neighbors = build_neighbor_lists(dist)
+    seeds = seed_tours(dist, points, seed_count(population_size, seed_fraction), rng)
+    population = create_initial_population(points, population_size, rng,
+                                           polish_tours(lookup, seeds, neighbors, improve))
     
-    # Vòng lặp qua các thế hệ
-    for generation in range(generations):
-        fitness_scores = [fitness(graph, route) for route in population]
-        
-        best_idx = fitness_scores.index(max(fitness_scores))
-        current_best = population[best_idx]
-        current_distance = calculate_route_distance(graph, current_best)
-        
-        if current_distance < best_distance:
-            best_route = current_best.copy()
-            best_distance = current_distance
-        
-        new_population = []
-        
-        elite_indices = sorted(range(len(fitness_scores)), 
-                               key=lambda i: fitness_scores[i], 
-                               reverse=True)[:elite_size]
-        for idx in elite_indices:
-            new_population.append(population[idx].copy())
-        
-        while len(new_population) < population_size:
-            parents = selection(population, fitness_scores, 2)
-            
-            child1, child2 = crossover(parents[0], parents[1])
-            
-            child1 = mutate(child1, mutation_rate)
-            child2 = mutate(child2, mutation_rate)
-            
-            new_population.append(child1)
-            if len(new_population) < population_size:
-                new_population.append(child2)
-        
-        # 2-OPT Local Search (Memetic Algorithm)
-        # Áp dụng 2-opt cho cá thể tốt nhất của thế hệ mới để tinh chỉnh
-        if new_population:
-            best_in_new_pop = new_population[0] 
-            new_population[0] = two_opt(graph, best_in_new_pop)
-
-        population = new_population[:population_size]
+    result = evolve(
+        dist, population, generations, mutation_rate, elite_size, rng,
+        lookup=lookup, neighbors=neighbors, improve=improve,
+        time_limit=time_limit, stall_generations=stall_generations, stall_time=stall_time,
+        on_generation=on_generation, cancel_event=cancel_event, trace=trace
+    )
+    best_route = result['route']
     
-    final_route = best_route if best_route else points
+    final_route = best_route.tolist() if best_route is not None else list(points)
     if final_route and final_route[0] == points[0]:
-         final_route = list(final_route) 
          final_route.append(final_route[0])
          
     return {
         'route': final_route,
-        'distance': best_distance
+        'distance': result['distance'],
+        'generations': result['generations'],
+        'stop_reason': result['stop_reason']
     }
 
-def two_opt(graph, route):
+def build_neighbor_lists(graph, k=8):
+    """
+    Danh sách k láng giềng gần nhất của mỗi điểm (theo khoảng cách đi ra),
+    dùng làm tập ứng viên cho 2-Opt
+    """
+    costs = to_cost_array(graph, copy=True)
+    np.fill_diagonal(costs, np.inf)
+    k = min(k, len(costs) - 1)
+    if k <= 0:
+        return [[] for _ in range(len(costs))]
+    # argpartition O(n^2) rồi chỉ sắp xếp k ứng viên của mỗi hàng
+    nearest = np.argpartition(costs, k - 1, axis=1)[:, :k]
+    order = np.argsort(np.take_along_axis(costs, nearest, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(nearest, order, axis=1).tolist()
+
+def _update_prefix_costs(graph, route, forward, backward, start=1):
+    """
+    forward[t]: tổng chiều dài route[0] -> route[t] theo chiều đi
+    backward[t]: tổng chiều dài route[t] -> route[0] theo chiều ngược lại
+    (ma trận OSRM không đối xứng nên cần cả hai chiều).
+    Chỉ tính lại từ vị trí start trở đi.
+    """
+    for t in range(max(start, 1), len(route)):
+        u, v = route[t - 1], route[t]
+        forward[t] = forward[t - 1] + graph[u][v]
+        backward[t] = backward[t - 1] + graph[v][u]
+
+def two_opt(graph, route, neighbors=None, k=8):
     """
     Thuật toán tìm kiếm cục bộ 2-Opt để gỡ các nút thắt (un-crossing edges)
+
+    - Mỗi nước đi được đánh giá O(1): 4 cạnh thay đổi + chiều ngược của đoạn bị
+      đảo (đọc từ mảng tổng tiền tố)
+    - Chỉ xét các ứng viên trong danh sách k láng giềng gần nhất
+    - Don't-look bits: chỉ xét lại các điểm nằm ở đầu mút của cạnh vừa thay đổi
+    - Đảo đoạn trực tiếp trên route, điểm đầu (route[0]) luôn giữ nguyên
     """
-    best_route = route
-    # Giới hạn số lần thử để đảm bảo hiệu năng
-    improved = True
-    count = 0
-    max_count = 50 
-    
-    while improved and count < max_count:
-        improved = False
-        count += 1
-        
-        for i in range(1, len(route) - 2):
-            for j in range(i + 1, len(route) - 1):
-                if j - i == 1: continue
-                
-                new_route = route[:]
-                new_route[i:j+1] = route[i:j+1][::-1] 
-                
-                dist_current = calculate_route_distance(graph, route)
-                dist_new = calculate_route_distance(graph, new_route)
-                
-                if dist_new < dist_current:
-                    route = new_route
-                    improved = True
-                    best_route = route
-                    
-    return best_route
+    n = len(route)
+    route = list(route)
+    if n < 4:
+        return route
+
+    if neighbors is None:
+        neighbors = build_neighbor_lists(graph, k)
+
+    pos = {city: t for t, city in enumerate(route)}
+    forward = [0] * n
+    backward = [0] * n
+    _update_prefix_costs(graph, route, forward, backward)
+
+    def move_delta(p, q):
+        # Đảo đoạn route[p+1..q]: (a,b) + (c,e) -> (a,c) + (b,e)
+        a, b, c = route[p], route[p + 1], route[q]
+        e = route[(q + 1) % n]
+        old = graph[a][b] + (forward[q] - forward[p + 1]) + graph[c][e]
+        new = graph[a][c] + (backward[q] - backward[p + 1]) + graph[b][e]
+        return new - old
+
+    active = list(route)
+    in_queue = set(active)
+
+    while active:
+        city = active.pop()
+        in_queue.discard(city)
+        i = pos[city]
+        best = None
+
+        for other in neighbors[city]:
+            j = pos[other]
+            # Nối city -> other (thay cạnh đi ra của city) hoặc other -> city
+            # (thay cạnh đi vào của city)
+            for p, q in ((i, j), ((i - 1) % n, (j - 1) % n)):
+                if p > q:
+                    p, q = q, p
+                if q - p < 2:
+                    continue
+                delta = move_delta(p, q)
+                if delta < -1e-9 and (best is None or delta < best[0]):
+                    best = (delta, p, q)
+
+        if best is None:
+            continue
+
+        _, p, q = best
+        touched = (route[p], route[p + 1], route[q], route[(q + 1) % n])
+        route[p + 1:q + 1] = route[p + 1:q + 1][::-1]
+        for t in range(p + 1, q + 1):
+            pos[route[t]] = t
+        _update_prefix_costs(graph, route, forward, backward, p + 1)
+
+        for c in touched:
+            if c not in in_queue:
+                active.append(c)
+                in_queue.add(c)
+
+    return route
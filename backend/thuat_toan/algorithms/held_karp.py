@@ -1,72 +1,74 @@
 
-import itertools
+import numpy as np
+from thuat_toan.algorithms.matrix import to_cost_array
 
 def held_karp(matrix):
     """
-    Thuật toán Held-Karp
+    Thuật toán Held-Karp (Quy hoạch động trên tập con)
+
+    Bảng chi phí lưu trong mảng NumPy phẳng cost[mask, k] (mask là tập các điểm
+    1..n-1 đã đi qua, k là điểm cuối), bảng cha lưu trong mảng int8.
+    Mỗi lớp tập con (cùng số phần tử) được tính bằng phép min vector hóa.
     """
-    n = len(matrix)
-    
-    C = {}
+    dist = to_cost_array(matrix)
+    n = len(dist)
+
+    if n < 2:
+        return {'route': list(range(n)), 'distance': 0}
+
+    # Chỉ số 0..m-1 trong mask tương ứng với điểm 1..n-1
+    m = n - 1
+    num_masks = 1 << m
+    inner = dist[1:, 1:]
+
+    cost = np.full((num_masks, m), np.inf)
+    parent = np.full((num_masks, m), -1, dtype=np.int8)
+
+    bits = 1 << np.arange(m)
+    cost[bits, np.arange(m)] = dist[0, 1:]
 
-    for k in range(1, n):
-        mask = (1 << k) | 1 
-        C[(mask, k)] = (matrix[0][k], 0)
+    # Gom các mask theo số phần tử để xử lý từng lớp
+    masks = np.arange(num_masks)
+    popcount = np.zeros(num_masks, dtype=np.int8)
+    for k in range(m):
+        popcount += (masks >> k) & 1
+    order = np.argsort(popcount, kind='stable')
+    layer_ends = np.cumsum(np.bincount(popcount, minlength=m + 1))
 
-    for s in range(3, n + 1):
-        for subset in itertools.combinations(range(1, n), s - 1):
-            mask = 1
-            for bit in subset:
-                mask |= (1 << bit)
-            
-            for k in subset:
-                prev_mask = mask & ~(1 << k)
-                
-                min_dist = float('inf')
-                parent = -1
-                
-                for m in subset:
-                    if m == k: continue
-                    
-                    if (prev_mask, m) in C:
-                        dist = C[(prev_mask, m)][0] + matrix[m][k]
-                        if dist < min_dist:
-                            min_dist = dist
-                            parent = m
-                
-                if parent != -1:
-                    C[(mask, k)] = (min_dist, parent)
+    for s in range(2, m + 1):
+        layer = order[layer_ends[s - 1]:layer_ends[s]]
+        for k in range(m):
+            with_k = layer[(layer >> k) & 1 == 1]
+            prev = with_k ^ (1 << k)
+            candidates = cost[prev] + inner[:, k]
+            best = np.argmin(candidates, axis=1)
+            cost[with_k, k] = candidates[np.arange(len(with_k)), best]
+            parent[with_k, k] = best
 
-    full_mask = (1 << n) - 1
-    min_tour_dist = float('inf')
-    last_node = -1
-    
-    for k in range(1, n):
-        if (full_mask, k) in C:
-            dist = C[(full_mask, k)][0] + matrix[k][0]
-            if dist < min_tour_dist:
-                min_tour_dist = dist
-                last_node = k
-                
-    if last_node == -1:
+    full_mask = num_masks - 1
+    tour_costs = cost[full_mask] + dist[1:, 0]
+    last = int(np.argmin(tour_costs))
+    min_tour_dist = tour_costs[last]
+
+    if not np.isfinite(min_tour_dist):
         # Trường hợp không tìm thấy đường đi
         return {'route': list(range(n)), 'distance': 0}
-        
+
     path = []
     curr_mask = full_mask
-    curr_node = last_node
-    
-    while curr_node != 0:
-        path.append(curr_node)
-        _, prev_node = C[(curr_mask, curr_node)]
-        curr_mask = curr_mask & ~(1 << curr_node)
-        curr_node = prev_node
-        
+    curr = last
+
+    while curr != -1:
+        path.append(curr + 1)
+        prev = int(parent[curr_mask, curr])
+        curr_mask &= ~(1 << curr)
+        curr = prev
+
     path.append(0)
     path.reverse()
     path.append(0)
-    
+
     return {
         'route': path,
-        'distance': min_tour_dist
+        'distance': float(min_tour_dist)
     }
@@ -0,0 +1,209 @@
+# Island model: nhiều quần thể GA độc lập chạy song song, định kỳ trao đổi cá thể tốt nhất
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from thuat_toan.algorithms.genetic_algorithm import (
+    build_neighbor_lists, create_initial_population, evolve, genetic_algorithm,
+    improvement_operator, polish_tours, seed_count, tour_lengths
+)
+from thuat_toan.algorithms.construction import seed_tours
+from thuat_toan.algorithms.matrix import to_cost_array
+from thuat_toan.worker_pool import pool_size, wait_result
+
+# Ma trận đã gắn vào trong tiến trình worker: tên shared memory -> (shm, dist, neighbors)
+# Chỉ giữ mảng NumPy (view trên shared memory + danh sách láng giềng), không giữ bản list
+_attached = {}
+_MAX_ATTACHED = 4
+
+def _attach_matrix(name, shape, dtype):
+    entry = _attached.get(name)
+    if entry is None:
+        # Tiến trình cha sở hữu và giải phóng vùng nhớ, worker chỉ đọc
+        shm = shared_memory.SharedMemory(name=name)
+        dist = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        entry = (shm, dist, build_neighbor_lists(dist))
+        while len(_attached) >= _MAX_ATTACHED:
+            old_name = next(iter(_attached))
+            _attached.pop(old_name)[0].close()
+        _attached[name] = entry
+    return entry[1], None, entry[2]
+
+def _run_island(matrix_ref, population, rng_state, generations, mutation_rate, elite_size,
+                time_limit=None, improvement='two_opt'):
+    """
+    Chạy một đảo trong `generations` thế hệ
+
+    Args:
+        matrix_ref: (tên shared memory, shape, dtype) khi chạy trong process pool,
+            hoặc (dist, lookup, neighbors) khi chạy tuần tự trong tiến trình hiện tại
+            (lookup None: improvement_operator tự tạo từ dist)
+    """
+    if isinstance(matrix_ref[0], str):
+        dist, lookup, neighbors = _attach_matrix(*matrix_ref)
+    else:
+        dist, lookup, neighbors = matrix_ref
+
+    rng = np.random.Generator(np.random.PCG64())
+    rng.bit_generator.state = rng_state
+
+    lookup, improve = improvement_operator(improvement, dist, lookup)
+    result = evolve(
+        dist, population, generations, mutation_rate, elite_size, rng,
+        lookup=lookup, neighbors=neighbors, time_limit=time_limit, improve=improve
+    )
+    return result, rng.bit_generator.state
+
+def _migrate(populations, dist, migration_size):
+    """
+    Trao đổi theo vòng: migration_size cá thể tốt nhất của đảo i thay thế
+    các cá thể kém nhất của đảo i+1
+    """
+    k = len(populations)
+    lengths = [tour_lengths(dist, population) for population in populations]
+    migrants = [populations[i][np.argsort(lengths[i], kind='stable')[:migration_size]].copy()
+                for i in range(k)]
+    for i in range(k):
+        target = (i + 1) % k
+        worst = np.argsort(lengths[target], kind='stable')[::-1][:len(migrants[i])]
+        populations[target][worst] = migrants[i]
+
+def _run_epoch(executor, args, deadline):
+    """Gửi các đảo của một epoch lên executor; lỗi / quá hạn thì hủy các đảo chưa chạy"""
+    futures = []
+    try:
+        for a in args:
+            futures.append(executor.submit(_run_island, *a, deadline=deadline))
+        return [wait_result(future, deadline) for future in futures]
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+
+def island_genetic_algorithm(graph, points, islands=4, population_size=50, generations=100,
+                             mutation_rate=0.1, elite_size=5, migration_interval=50,
+                             migration_size=2, seed=None, time_limit=None,
+                             stall_generations=None, stall_time=None, on_generation=None,
+                             cancel_event=None, seed_fraction=0.0, improvement='two_opt',
+                             executor=None, deadline=None):
+    """
+    Island model GA
+
+    - Mỗi đảo có quần thể và seed riêng (sinh từ SeedSequence(seed))
+    - Ma trận khoảng cách được đặt một lần vào shared memory cho các worker
+    - Mỗi migration_interval thế hệ, các đảo trao đổi cá thể tốt nhất theo vòng
+    - Kết quả gộp theo thứ tự đảo nên luôn xác định với cùng seed
+    - time_limit áp dụng cho cả lần chạy; điều kiện hội tụ (stall_*), on_generation và
+      cancel_event được xử lý trên lời giải tốt nhất toàn cục sau mỗi lần trao đổi
+    - executor: Admission của request (các chỗ đã giữ trên process pool), mỗi đảo chạy
+      trên một chỗ; None = các đảo chạy tuần tự trong tiến trình hiện tại (trong worker,
+      hoặc khi request không giữ chỗ trên pool) và chia nhau thời gian còn lại mỗi epoch
+    - deadline: thời điểm (time.time()) phải có kết quả của mỗi epoch; quá hạn hoặc một
+      đảo lỗi thì hủy các đảo còn chờ và raise (DeadlineExceeded khi quá hạn)
+    """
+    if islands <= 1 or len(points) <= 3:
+        return genetic_algorithm(graph, points, population_size, generations,
+                                 mutation_rate, elite_size, seed=seed, time_limit=time_limit,
+                                 stall_generations=stall_generations, stall_time=stall_time,
+                                 on_generation=on_generation, cancel_event=cancel_event,
+                                 seed_fraction=seed_fraction, improvement=improvement)
+
+    started = time.monotonic()
+
+    dist = to_cost_array(graph)
+    seeds = np.random.SeedSequence(seed).spawn(islands)
+    rngs = [np.random.default_rng(s) for s in seeds]
+    population_size = max(population_size, 1)
+    # Mỗi đảo gieo tour heuristic bằng rng riêng (NN từ các điểm xuất phát khác nhau)
+    num_seeds = seed_count(population_size, seed_fraction)
+    lookup, improve = improvement_operator(improvement, dist) if num_seeds else (None, None)
+    neighbors = build_neighbor_lists(dist) if num_seeds else None
+    populations = [
+        create_initial_population(points, population_size, rng,
+                                  polish_tours(lookup, seed_tours(dist, points, num_seeds, rng),
+                                               neighbors, improve))
+        for rng in rngs
+    ]
+    rng_states = [rng.bit_generator.state for rng in rngs]
+
+    best_route = None
+    best_distance = float('inf')
+    migration_interval = max(migration_interval, 1)
+
+    shm = None
+    if executor is None:
+        # Không có chỗ trên pool: chạy tuần tự các đảo (cùng kết quả)
+        matrix_ref = (dist, lookup or dist.tolist(), neighbors or build_neighbor_lists(dist))
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=max(dist.nbytes, 1))
+        np.ndarray(dist.shape, dtype=dist.dtype, buffer=shm.buf)[:] = dist
+        matrix_ref = (shm.name, dist.shape, dist.dtype.str)
+    # Số lượt mỗi epoch: các đảo vượt quá số chỗ được giữ phải chờ lượt sau
+    parallel = 1 if executor is None else min(getattr(executor, 'slots', None) or pool_size(), islands)
+    rounds = -(-islands // parallel)
+
+    done = 0
+    last_improved_generation = 0
+    last_improved_at = started
+    stop_reason = 'max_generations'
+
+    try:
+        while True:
+            epoch = min(migration_interval, generations - done)
+            remaining = None
+            if time_limit is not None:
+                remaining = max(time_limit - (time.monotonic() - started), 0)
+                # Các đảo chạy thành nhiều lượt: chia thời gian còn lại để không vượt time_limit
+                remaining /= rounds
+            args = [(matrix_ref, populations[i], rng_states[i], epoch, mutation_rate, elite_size,
+                     remaining, improvement) for i in range(islands)]
+            if executor is None:
+                results = [_run_island(*a) for a in args]
+            else:
+                results = _run_epoch(executor, args, deadline)
+
+            epoch_generations = 0
+            for i, (result, state) in enumerate(results):
+                populations[i] = result['population']
+                rng_states[i] = state
+                epoch_generations = max(epoch_generations, result['generations'])
+                if result['distance'] < best_distance:
+                    best_route = result['route']
+                    best_distance = result['distance']
+                    last_improved_generation = done
+                    last_improved_at = time.monotonic()
+
+            done += epoch_generations
+            if on_generation is not None:
+                on_generation(done, best_route, best_distance)
+            now = time.monotonic()
+            if done >= generations:
+                break
+            if cancel_event is not None and cancel_event.is_set():
+                stop_reason = 'cancelled'
+                break
+            if time_limit is not None and now - started >= time_limit:
+                stop_reason = 'time_limit'
+                break
+            if stall_generations and done - last_improved_generation >= stall_generations:
+                stop_reason = 'stagnation'
+                break
+            if stall_time and now - last_improved_at >= stall_time:
+                stop_reason = 'stagnation'
+                break
+            if migration_size > 0:
+                _migrate(populations, dist, migration_size)
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+    final_route = best_route.tolist() if best_route is not None else list(points)
+    if final_route and final_route[0] == points[0]:
+        final_route.append(final_route[0])
+
+    return {
+        'route': final_route,
+        'distance': best_distance,
+        'generations': done,
+        'stop_reason': stop_reason
+    }
@@ -0,0 +1,391 @@
+
+# Tìm kiếm cục bộ cho bài toán lớn (500+ điểm): Or-opt và chuỗi 2-opt kiểu Lin-Kernighan
+
+import time
+import numpy as np
+from thuat_toan.algorithms.construction import greedy_edge_tour, insertion_tour
+from thuat_toan.algorithms.genetic_algorithm import build_neighbor_lists, calculate_route_distance
+from thuat_toan.algorithms.matrix import finite_costs, to_cost_array
+
+EPS = 1e-9
+
+class _Tour:
+    """
+    Tour có điểm đầu cố định cùng vị trí từng điểm và tổng tiền tố hai chiều:
+    forward[t] = chiều dài route[0] -> route[t], backward[t] = chiều dài route[t] -> route[0]
+    (ma trận không đối xứng nên đảo một đoạn làm đổi chi phí bên trong đoạn)
+    """
+
+    def __init__(self, graph, route, costs=None):
+        self.graph = graph
+        self.costs = np.asarray(graph) if costs is None else costs
+        self.n = len(route)
+        self.route = list(route)
+        self.pos = [0] * len(self.costs)
+        self.forward = np.zeros(self.n)
+        self.backward = np.zeros(self.n)
+        self._refresh(0, self.n - 1)
+
+    def _refresh(self, lo, hi):
+        # Tính lại vị trí và tổng tiền tố trong [lo, hi] (vector hóa trên mảng costs);
+        # phần sau hi chỉ dịch một hằng số
+        route, pos = self.route, self.pos
+        forward, backward = self.forward, self.backward
+        lo = max(lo, 1)
+        hi = min(hi + 1, self.n - 1)
+        pos[route[0]] = 0
+        for t in range(lo, hi + 1):
+            pos[route[t]] = t
+        if lo > hi:
+            return
+        seg = np.array(route[lo - 1:hi + 1])
+        # Cộng dồn bằng float64 (costs có thể là float32)
+        new_forward = forward[lo - 1] + np.cumsum(self.costs[seg[:-1], seg[1:]], dtype=np.float64)
+        new_backward = backward[lo - 1] + np.cumsum(self.costs[seg[1:], seg[:-1]], dtype=np.float64)
+        # Vị trí hi (ngay sau đoạn) mang độ lệch chung cho toàn bộ phần phía sau
+        forward[hi + 1:] += new_forward[-1] - forward[hi]
+        backward[hi + 1:] += new_backward[-1] - backward[hi]
+        forward[lo:hi + 1] = new_forward
+        backward[lo:hi + 1] = new_backward
+
+    def length(self):
+        return float(self.forward[-1]) + self.graph[self.route[-1]][self.route[0]]
+
+    def reverse_delta(self, i, j):
+        """Thay đổi chiều dài khi đảo đoạn route[i..j] (1 <= i < j <= n-1)"""
+        graph, route = self.graph, self.route
+        a, s, e = route[i - 1], route[i], route[j]
+        b = route[(j + 1) % self.n]
+        old = graph[a][s] + (self.forward[j] - self.forward[i]) + graph[e][b]
+        new = graph[a][e] + (self.backward[j] - self.backward[i]) + graph[s][b]
+        return new - old
+
+    def reverse(self, i, j):
+        self.route[i:j + 1] = self.route[i:j + 1][::-1]
+        self._refresh(i, j)
+
+    def move_delta(self, i, j, k, reverse):
+        """
+        Thay đổi chiều dài khi chuyển đoạn route[i..j] (1 <= i <= j) vào giữa route[k] và
+        route[k+1] (k nằm ngoài [i-1, j]), có thể đảo chiều đoạn
+        """
+        graph, route, n = self.graph, self.route, self.n
+        a, s, e = route[i - 1], route[i], route[j]
+        b = route[(j + 1) % n]
+        x, y = route[k], route[(k + 1) % n]
+        removed = graph[a][s] + graph[e][b] + graph[x][y]
+        if reverse:
+            # Chi phí bên trong đoạn đổi từ chiều đi sang chiều ngược lại
+            inner = (self.backward[j] - self.backward[i]) - (self.forward[j] - self.forward[i])
+            return graph[a][b] + graph[x][e] + graph[s][y] + inner - removed
+        return graph[a][b] + graph[x][s] + graph[e][y] - removed
+
+    def move(self, i, j, k, reverse):
+        segment = self.route[i:j + 1]
+        if reverse:
+            segment.reverse()
+        if k > j:
+            self.route[i:k + 1] = self.route[j + 1:k + 1] + segment
+            self._refresh(i, k)
+        else:
+            self.route[k + 1:j + 1] = segment + self.route[k + 1:i]
+            self._refresh(k + 1, j)
+
+def _lk_step(tour, city, neighbors, max_depth):
+    """
+    Chuỗi 2-opt kiểu Lin-Kernighan bắt đầu từ cạnh city -> succ(city):
+    mỗi bước đảo đoạn bắt đầu ngay sau city sao cho cạnh mới succ -> t3 có trong danh sách
+    láng giềng, tiếp tục khi lợi ích từng phần (chưa tính cạnh đóng) còn dương.
+    Giữ lại tiền tố tốt nhất của chuỗi, hoàn tác phần còn lại.
+
+    Returns:
+        list các điểm bị ảnh hưởng nếu tour được cải thiện, ngược lại None
+    """
+    graph, route, pos, n = tour.graph, tour.route, tour.pos, tour.n
+    p = pos[city]
+    if p >= n - 2:
+        return None
+
+    applied = []
+    used = set()
+    total = 0.0
+    best_total = -EPS
+    best_depth = 0
+
+    for _ in range(max_depth):
+        t2 = route[p + 1]
+        best = None
+        for t3 in neighbors[t2]:
+            q = pos[t3] - 1
+            if q <= p + 1 or t3 in used:
+                continue
+            delta = tour.reverse_delta(p + 1, q)
+            # Lợi ích từng phần (chưa tính cạnh đóng city -> route[q]) phải lớn hơn mức
+            # cải thiện tốt nhất đã đạt được thì mới còn hy vọng đi sâu hơn
+            partial = -(total + delta) + graph[city][route[q]]
+            if partial > -best_total and (best is None or delta < best[0]):
+                best = (delta, q, t3)
+        if best is None:
+            break
+
+        delta, q, t3 = best
+        tour.reverse(p + 1, q)
+        applied.append(q)
+        used.add(t3)
+        total += delta
+        if total < best_total:
+            best_total = total
+            best_depth = len(applied)
+
+    # Hoàn tác các bước sau tiền tố tốt nhất (đảo lại theo thứ tự ngược)
+    for q in reversed(applied[best_depth:]):
+        tour.reverse(p + 1, q)
+    if not best_depth:
+        return None
+
+    touched = {city, route[p + 1]}
+    for q in applied[:best_depth]:
+        touched.add(route[q])
+        touched.add(route[(q + 1) % n])
+    return list(touched)
+
+def _or_opt_step(tour, city, neighbors, max_segment):
+    """
+    Or-opt: chuyển đoạn 1..max_segment điểm bắt đầu hoặc kết thúc tại city tới trước một
+    láng giềng của đầu mút (giữ chiều hoặc đảo chiều), chọn nước đi tốt nhất.
+    Danh sách láng giềng đã sắp xếp nên dừng duyệt khi cạnh mới dài hơn phần lợi ích
+    có được khi gỡ đoạn ra khỏi tour
+    """
+    graph, route, pos, n = tour.graph, tour.route, tour.pos, tour.n
+    c = pos[city]
+    if c == 0:
+        return None
+
+    best = None
+    for length in range(1, max_segment + 1):
+        for i, j in ((c, c + length - 1), (c - length + 1, c)):
+            if i < 1 or j > n - 1:
+                continue
+            a, s, e = route[i - 1], route[i], route[j]
+            b = route[(j + 1) % n]
+            gain = graph[a][s] + graph[e][b] - graph[a][b]
+            reverse_gain = gain - ((tour.backward[j] - tour.backward[i])
+                                   - (tour.forward[j] - tour.forward[i]))
+            # Chèn trước láng giềng o: cạnh mới e -> o (giữ chiều) hoặc s -> o (đảo chiều)
+            for end, reverse, limit in ((e, False, gain), (s, True, reverse_gain)):
+                if reverse and length == 1:
+                    break
+                for other in neighbors[end]:
+                    if graph[end][other] >= limit:
+                        break
+                    k = pos[other] - 1
+                    if k < 0 or (i - 1 <= k <= j):
+                        continue
+                    delta = tour.move_delta(i, j, k, reverse)
+                    if delta < -EPS and (best is None or delta < best[0]):
+                        best = (delta, i, j, k, reverse)
+            if length == 1:
+                break
+
+    if best is None:
+        return None
+    _, i, j, k, reverse = best
+    touched = {route[i - 1], route[(j + 1) % n], route[k], route[(k + 1) % n]}
+    touched.update(route[i:j + 1])
+    tour.move(i, j, k, reverse)
+    return list(touched)
+
+def improve_tour(tour, neighbors, active=None, max_depth=3, max_segment=3, deadline=None,
+                 cancel_event=None):
+    """
+    Lặp LK-step và Or-opt với don't-look bits cho tới khi không còn cải thiện
+    active: các điểm cần xét ban đầu (mặc định: tất cả)
+    """
+    queue = list(tour.route if active is None else active)
+    in_queue = set(queue)
+    checks = 0
+    while queue:
+        checks += 1
+        if checks % 256 == 0:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            if cancel_event is not None and cancel_event.is_set():
+                break
+        city = queue.pop()
+        in_queue.discard(city)
+        touched = _lk_step(tour, city, neighbors, max_depth)
+        if touched is None:
+            touched = _or_opt_step(tour, city, neighbors, max_segment)
+        if touched is None:
+            continue
+        for c in touched:
+            if c not in in_queue:
+                queue.append(c)
+                in_queue.add(c)
+    return tour
+
+def local_search(graph, route, neighbors=None, k=8, max_depth=3, max_segment=3, costs=None):
+    """
+    Cải thiện một tour (route[0] cố định) bằng LK-step + Or-opt, trả về route mới (list).
+    Dùng được như toán tử cải thiện trong GA thay cho two_opt.
+
+    costs: graph dạng mảng NumPy (hữu hạn) nếu đã có sẵn, tránh chuyển đổi lại mỗi lần gọi
+    """
+    route = list(route)
+    if len(route) < 4:
+        return route
+    if costs is None:
+        costs = finite_costs(to_cost_array(graph))
+        graph = costs.tolist()
+    if neighbors is None:
+        neighbors = build_neighbor_lists(costs, k)
+    tour = _Tour(graph, route, costs)
+    improve_tour(tour, neighbors, max_depth=max_depth, max_segment=max_segment)
+    return tour.route
+
+def _double_bridge(tour, rng, max_segment_length=50):
+    """
+    Nhiễu double-bridge cục bộ (không đảo chiều, hợp lệ với ma trận bất đối xứng):
+    A B C D -> A C B D với B, C là hai đoạn liền nhau ngắn
+    """
+    n = tour.n
+    length_b = int(rng.integers(1, min(max_segment_length, (n - 1) // 2) + 1))
+    length_c = int(rng.integers(1, min(max_segment_length, (n - 1) // 2) + 1))
+    a = int(rng.integers(1, n - length_b - length_c + 1))
+    b, c = a + length_b, a + length_b + length_c
+    route = tour.route
+    touched = [route[a - 1], route[a], route[b - 1], route[b], route[c - 1], route[c % n]]
+    route[a:c] = route[b:c] + route[a:b]
+    tour._refresh(a, c - 1)
+    return touched
+
+def iterated_local_search(graph, points, seed=None, k=10, max_depth=3, max_segment=3,
+                          max_iterations=None, time_limit=None, stall_iterations=None,
+                          on_iteration=None, cancel_event=None):
+    """
+    Giải TSP lớn: tour xây dựng (greedy edge / cheapest insertion) -> LK-step + Or-opt,
+    sau đó lặp nhiễu double-bridge + tìm kiếm cục bộ quanh các điểm bị nhiễu, chỉ nhận
+    lời giải tốt hơn
+
+    Args:
+        max_iterations: số lần nhiễu tối đa (None = không giới hạn, cần time_limit
+            hoặc stall_iterations)
+        time_limit: thời gian tối đa (giây)
+        stall_iterations: dừng khi không cải thiện sau số lần nhiễu này
+        on_iteration: callback(iteration, best_route, best_distance)
+
+    Returns:
+        dict: route (quay về điểm đầu), distance, generations (số lần nhiễu), stop_reason
+    """
+    points = list(points)
+    n = len(points)
+    if n < 4:
+        return {
+            'route': points + points[:1],
+            'distance': calculate_route_distance(graph, points) if n > 1 else 0,
+            'generations': 0,
+            'stop_reason': 'trivial'
+        }
+
+    started = time.monotonic()
+    deadline = started + time_limit if time_limit is not None else None
+    rng = np.random.default_rng(seed)
+
+    # Ma trận con theo points (chỉ số cục bộ 0..n-1), inf thay bằng giá trị lớn hữu hạn
+    dist = to_cost_array(graph)
+    costs = finite_costs(dist[np.ix_(points, points)])
+    lookup = costs.tolist()
+    neighbors = build_neighbor_lists(costs, k)
+
+    best_tour = None
+    for build in (greedy_edge_tour, insertion_tour):
+        start = build(costs)
+        first = int(np.flatnonzero(start == 0)[0])
+        candidate = _Tour(lookup, np.concatenate([start[first:], start[:first]]).tolist(), costs)
+        improve_tour(candidate, neighbors, max_depth=max_depth, max_segment=max_segment,
+                     deadline=deadline, cancel_event=cancel_event)
+        if best_tour is None or candidate.length() < best_tour.length():
+            best_tour = candidate
+    best_route = list(best_tour.route)
+    best_distance = best_tour.length()
+    tour = best_tour
+
+    iteration = 0
+    last_improved = 0
+    stop_reason = 'max_generations'
+    while True:
+        if cancel_event is not None and cancel_event.is_set():
+            stop_reason = 'cancelled'
+            break
+        if deadline is not None and time.monotonic() >= deadline:
+            stop_reason = 'time_limit'
+            break
+        if max_iterations is not None and iteration >= max_iterations:
+            break
+        if stall_iterations and iteration - last_improved >= stall_iterations:
+            stop_reason = 'stagnation'
+            break
+        if max_iterations is None and deadline is None and not stall_iterations:
+            break
+
+        iteration += 1
+        touched = _double_bridge(tour, rng)
+        improve_tour(tour, neighbors, active=touched, max_depth=max_depth,
+                     max_segment=max_segment, deadline=deadline, cancel_event=cancel_event)
+        distance = tour.length()
+        if distance < best_distance - EPS:
+            best_route = list(tour.route)
+            best_distance = distance
+            last_improved = iteration
+        else:
+            tour = _Tour(lookup, best_route, costs)
+
+        if on_iteration is not None:
+            on_iteration(iteration, [points[c] for c in best_route], best_distance)
+
+    route = [points[c] for c in best_route]
+    return {
+        'route': route + route[:1],
+        'distance': float(dist[route, np.roll(route, -1)].sum()),
+        'generations': iteration,
+        'stop_reason': stop_reason
+    }
+
+def repair_tour(graph, partial_route, new_stops, touched=(), k=8, max_depth=3, max_segment=3):
+    """
+    Sửa một tour cũ thay vì giải lại từ đầu (warm start):
+    chèn các điểm mới vào vị trí rẻ nhất, rồi tìm kiếm cục bộ chỉ quanh vùng bị thay đổi
+    (các điểm mới, các điểm nằm cạnh chỗ điểm cũ bị gỡ ra và láng giềng của chúng)
+
+    Args:
+        partial_route: các điểm còn giữ theo thứ tự cũ, bắt đầu bằng điểm xuất phát
+        new_stops: các điểm chưa có trong tour
+        touched: các điểm cần xét lại (ví dụ đầu mút của chỗ vừa gỡ điểm)
+
+    Returns:
+        dict: route (quay về điểm đầu), distance
+    """
+    dist = to_cost_array(graph)
+    costs = finite_costs(dist)
+    route = list(partial_route)
+
+    for city in new_stops:
+        t = np.asarray(route)
+        t_next = np.roll(t, -1)
+        added = costs[t, city] + costs[city, t_next] - costs[t, t_next]
+        route.insert(int(np.argmin(added)) + 1, int(city))
+
+    if len(route) >= 4:
+        neighbors = build_neighbor_lists(costs, k)
+        active = set(int(c) for c in new_stops) | set(int(c) for c in touched)
+        for city in list(active):
+            active.update(neighbors[city])
+        tour = _Tour(costs.tolist(), route, costs)
+        improve_tour(tour, neighbors, active=list(active), max_depth=max_depth,
+                     max_segment=max_segment)
+        route = tour.route
+
+    return {
+        'route': route + route[:1],
+        'distance': float(dist[route, np.roll(route, -1)].sum())
+    }
@@ -0,0 +1,40 @@
+# Tiện ích chuyển đổi ma trận khoảng cách sang mảng NumPy cho các thuật toán
+import numpy as np
+from thong_tin.distance_matrix import MATRIX_DTYPE
+
+
+def to_cost_array(matrix, dtype=None, copy=False):
+    """
+    Chuyển ma trận khoảng cách (list lồng nhau hoặc ndarray) sang mảng NumPy 2 chiều.
+    Các ô không có đường đi (None/NaN từ OSRM) được thay bằng +inf.
+
+    dtype None: ndarray số thực giữ nguyên kiểu (ma trận float32 dùng chung được dùng
+    trực tiếp, không chép sang float64), list chuyển sang MATRIX_DTYPE.
+    Chỉ tạo bản sao khi phải đổi kiểu, có ô NaN, hoặc copy=True (người gọi sẽ ghi vào mảng)
+    """
+    if dtype is None:
+        is_float = isinstance(matrix, np.ndarray) and matrix.dtype.kind == 'f'
+        dtype = matrix.dtype if is_float else MATRIX_DTYPE
+    costs = np.asarray(matrix, dtype=dtype)
+    if costs.ndim != 2 or costs.shape[0] != costs.shape[1]:
+        raise ValueError("Ma trận khoảng cách phải là ma trận vuông")
+    missing = np.isnan(costs)
+    if missing.any():
+        costs = np.where(missing, np.inf, costs).astype(dtype, copy=False)
+    elif copy and costs is matrix:
+        costs = costs.copy()
+    return costs
+
+
+def finite_costs(dist):
+    """
+    Ma trận chi phí hữu hạn cho các heuristic / tìm kiếm cục bộ: ô inf (không có đường)
+    được thay bằng một giá trị rất lớn nhưng hữu hạn để tránh inf - inf.
+    Giữ kiểu của ma trận (float32), chỉ tạo bản sao khi có ô inf
+    """
+    costs = np.asarray(dist)
+    finite = np.isfinite(costs)
+    if finite.all():
+        return costs
+    big = (costs[finite].max() if finite.any() else 1.0) * len(costs) + 1.0
+    return np.where(finite, costs, big).astype(costs.dtype, copy=False)
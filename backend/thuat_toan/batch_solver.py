@@ -0,0 +1,128 @@
+
+# Giải nhiều bài toán nhỏ trong một request: gộp điểm trùng, lấy ma trận một lần, giải song song
+
+import time
+from typing import Any, Dict, List
+import numpy as np
+from thong_tin.osrm_service import OSRMService
+from config import Config
+from thuat_toan.solver import mark_estimated, record_solve_metrics, solve_matrix_task
+from thuat_toan.worker_pool import (
+    Admission, DeadlineExceeded, in_worker_process, pool_size, wait_result
+)
+from utils.logger import logger
+
+def _point_key(point):
+    return (float(point['lat']), float(point['lng']))
+
+def _sub_matrix(matrix, indices):
+    return matrix[np.ix_(indices, indices)]
+
+def solve_batch(instances: List[List[Dict[str, float]]], options: Dict[str, Any],
+                deadline: float = None, started: float = None) -> List[Dict[str, Any]]:
+    """
+    Args:
+        instances: danh sách các tập điểm (mỗi tập đã được validate)
+        options: tham số của RouteSolver.solve_from_matrix dùng chung cho mọi bài toán
+        deadline: thời hạn của request (time.time()); quá hạn -> DeadlineExceeded
+        started: thời điểm bắt đầu request (mặc định: lúc gọi); time_limit_ms / planner của
+            mọi bài toán tính từ thời điểm này nên bài xếp lượt sau chỉ còn phần thời gian còn lại
+
+    SOLVER_USE_PROCESS_POOL bật: giữ tới một chỗ trong pool cho mỗi bài toán (tối đa số
+    worker, ít nhất một chỗ, không còn chỗ -> PoolSaturated); các bài toán xếp lượt trên
+    các chỗ đó. Tắt (hoặc đang ở trong worker): giải lần lượt trong tiến trình hiện tại
+
+    Returns:
+        List kết quả theo đúng thứ tự instances ({'error': ...} nếu bài toán đó lỗi)
+    """
+    if started is None:
+        started = time.time()
+    options = dict(options, started=started, deadline=deadline)
+    if not Config.SOLVER_USE_PROCESS_POOL or in_worker_process():
+        return _solve_batch(instances, options, deadline, None)
+    with Admission(count=min(len(instances), pool_size()), minimum=1) as slot:
+        return _solve_batch(instances, options, deadline, slot)
+
+def _run_inline(matrix, options, deadline):
+    """Giải một bài trong tiến trình hiện tại; đã quá hạn thì không bắt đầu"""
+    if deadline is not None and time.time() >= deadline:
+        raise DeadlineExceeded("Không giải xong trong thời hạn của request.")
+    return solve_matrix_task(matrix, options)
+
+def _solve_batch(instances, options, deadline, slot):
+    # 1. Gộp các tọa độ trùng nhau giữa các bài toán
+    unique_points = []
+    key_index = {}
+    instance_indices = []
+    for points in instances:
+        indices = []
+        for point in points:
+            key = _point_key(point)
+            if key not in key_index:
+                key_index[key] = len(unique_points)
+                unique_points.append({'lat': key[0], 'lng': key[1]})
+            indices.append(key_index[key])
+        instance_indices.append(indices)
+
+    # 2. Lấy ma trận: một ma trận gộp, hoặc từng bài toán nếu ma trận gộp lớn hơn nhiều
+    # so với tổng các ma trận con (các bài toán ít điểm chung)
+    start_osrm = time.time()
+    combined_cells = len(unique_points) ** 2
+    separate_cells = sum(len(indices) ** 2 for indices in instance_indices)
+    matrices = []
+    infos = []
+    if combined_cells <= 4 * separate_cells:
+        info = {}
+        matrix = OSRMService.get_distance_matrix(unique_points, info=info)
+        for indices in instance_indices:
+            matrices.append(_sub_matrix(matrix, indices) if matrix is not None else None)
+            infos.append(info)
+    else:
+        for points in instances:
+            info = {}
+            matrices.append(OSRMService.get_distance_matrix(points, info=info))
+            infos.append(info)
+    logger.info(f"Batch of {len(instances)} instances ({len(unique_points)} unique points): "
+                f"matrix time {time.time() - start_osrm:.4f}s")
+
+    # 3. Giải song song trên các chỗ của request trong process pool
+    # (slot None: giải lần lượt trong tiến trình hiện tại)
+    start_algo = time.time()
+    futures = []
+    try:
+        if slot is not None:
+            for matrix in matrices:
+                futures.append(slot.submit(solve_matrix_task, matrix, options, deadline=deadline)
+                               if matrix is not None else None)
+
+        results = []
+        for index, matrix in enumerate(matrices):
+            if matrix is None:
+                results.append({
+                    'route': [],
+                    'distance': 0,
+                    'message': 'Lỗi kết nối OSRM (Không lấy được dữ liệu bản đồ). Vui lòng thử lại.'
+                })
+                continue
+            try:
+                if slot is None:
+                    result = _run_inline(matrix, options, deadline)
+                else:
+                    result = wait_result(futures[index], deadline)
+                record_solve_metrics(result, len(matrix))
+                if infos[index].get('estimated'):
+                    mark_estimated(result)
+                results.append(result)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                logger.error(f"Batch instance {index} failed: {str(e)}")
+                results.append({'error': str(e)})
+    except DeadlineExceeded:
+        for future in futures:
+            if future is not None:
+                future.cancel()
+        raise
+    logger.info(f"Batch algorithm time: {time.time() - start_algo:.4f}s")
+
+    return results
@@ -0,0 +1,137 @@
+
+# Quản lý các job giải bài toán chạy nền (hàng đợi, tiến độ, hủy, lưu kết quả có hạn)
+
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from utils.logger import logger
+
+FINISHED_STATUSES = ('succeeded', 'failed', 'cancelled')
+
+class JobStoreFull(Exception):
+    """Kho job đã đầy các job chưa hoàn thành"""
+
+class Job:
+    def __init__(self, job_id: str, params: Dict[str, Any]):
+        self.id = job_id
+        self.params = params
+        self.status = 'queued'
+        self.progress: Dict[str, Any] = {}
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.cancel_event = threading.Event()
+        self.future = None
+        # Mỗi lần trạng thái / tiến độ thay đổi, version tăng và các luồng SSE được đánh thức
+        self.version = 0
+        self.changed = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def update(self, **fields):
+        with self.changed:
+            for key, value in fields.items():
+                setattr(self, key, value)
+            self.version += 1
+            self.changed.notify_all()
+
+    def report_progress(self, update: Dict[str, Any]):
+        with self.changed:
+            self.progress = {**self.progress, **update}
+            self.version += 1
+            self.changed.notify_all()
+
+    def wait_for_change(self, seen_version: int, timeout: float) -> int:
+        """Chờ đến khi version khác seen_version (hoặc hết timeout), trả về version hiện tại"""
+        with self.changed:
+            self.changed.wait_for(lambda: self.version != seen_version, timeout=timeout)
+            return self.version
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self.changed:
+            return {
+                'job_id': self.id,
+                'status': self.status,
+                'progress': dict(self.progress),
+                'result': self.result,
+                'error': self.error,
+                'created_at': self.created_at,
+                'finished_at': self.finished_at
+            }
+
+class JobManager:
+    """
+    - Job được xếp hàng trên thread pool giới hạn (max_workers)
+    - Kho job giới hạn max_jobs; job đã xong bị xóa sau result_ttl giây
+      hoặc khi kho đầy (job cũ nhất trước)
+    """
+
+    def __init__(self, max_workers: int = 2, max_jobs: int = 200, result_ttl: float = 600):
+        self.max_jobs = max_jobs
+        self.result_ttl = result_ttl
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="solve-job")
+
+    def submit(self, params: Dict[str, Any], run: Callable[[Job], Dict[str, Any]]) -> Job:
+        """
+        Đưa job vào hàng đợi
+
+        Args:
+            params: tham số gốc của job (lưu lại để tra cứu)
+            run: hàm thực thi nhận Job, trả về kết quả
+        """
+        job = Job(uuid.uuid4().hex, params)
+        with self._lock:
+            self._purge()
+            if len(self._jobs) >= self.max_jobs:
+                raise JobStoreFull("Quá nhiều job đang chờ xử lý")
+            self._jobs[job.id] = job
+        job.future = self._executor.submit(self._execute, job, run)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._purge()
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return job
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            # Chưa bắt đầu chạy: hủy ngay
+            job.update(status='cancelled', finished_at=time.time())
+        return job
+
+    def _execute(self, job: Job, run: Callable[[Job], Dict[str, Any]]):
+        if job.cancel_event.is_set():
+            job.update(status='cancelled', finished_at=time.time())
+            return
+        job.update(status='running')
+        try:
+            result = run(job)
+            status = 'cancelled' if job.cancel_event.is_set() else 'succeeded'
+            job.update(status=status, result=result, finished_at=time.time())
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {str(e)}")
+            job.update(status='failed', error=str(e), finished_at=time.time())
+
+    def _purge(self):
+        # Gọi khi đang giữ self._lock
+        now = time.time()
+        for job_id in [j.id for j in self._jobs.values()
+                       if j.finished and now - j.finished_at > self.result_ttl]:
+            del self._jobs[job_id]
+        while len(self._jobs) >= self.max_jobs:
+            oldest_finished = next((j.id for j in self._jobs.values() if j.finished), None)
+            if oldest_finished is None:
+                break
+            del self._jobs[oldest_finished]
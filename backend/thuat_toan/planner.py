@@ -0,0 +1,173 @@
+
+# Chọn thuật toán và tham số theo mô hình chi phí đã hiệu chỉnh trên máy hiện tại,
+# sao cho phần giải vừa với thời gian mục tiêu của request
+
+import json
+import os
+import threading
+import time
+import numpy as np
+from config import Config
+from thuat_toan.algorithms.genetic_algorithm import genetic_algorithm
+from thuat_toan.algorithms.held_karp import held_karp
+from thuat_toan.algorithms.local_search import iterated_local_search
+from utils.logger import logger
+
+CALIBRATION_VERSION = 1
+# Held-Karp không chạy quá 20 điểm (bộ nhớ bảng quy hoạch động ~ 2^(n-1) * (n-1) ô)
+HELD_KARP_HARD_MAX_N = 20
+# Giới hạn tham số GA khi tự chọn
+MIN_POPULATION = 20
+MAX_POPULATION = 150
+MIN_GENERATIONS = 30
+MAX_GENERATIONS = 1000
+
+_calibration = None
+_lock = threading.Lock()
+
+def _random_matrix(n, rng):
+    points = rng.random((n, 2)) * 10000
+    return np.sqrt(((points[:, None] - points[None]) ** 2).sum(axis=2)).astype(np.float32)
+
+def _timed(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+def calibrate():
+    """
+    Đo tốc độ các thuật toán trên máy hiện tại (~1-2 giây):
+    - held_karp: giây cho mỗi đơn vị 2^(n-1) * (n-1)^2
+    - ga_generation / ga_unit: chi phí mỗi thế hệ = ga_generation + ga_unit * population * n
+    - ga_setup: chi phí khởi tạo quần thể (gieo heuristic) cho mỗi n^2
+    - ils_setup: chi phí tour xây dựng + tìm kiếm cục bộ đầu tiên cho mỗi n^2
+    - ils_iteration: chi phí mỗi lần nhiễu của ILS (gần như không phụ thuộc n)
+    """
+    rng = np.random.default_rng(0)
+    held_karp(_random_matrix(8, rng))  # khởi động NumPy
+
+    n = 14
+    hk = _timed(lambda: held_karp(_random_matrix(n, rng))) / (2 ** (n - 1) * (n - 1) ** 2)
+
+    # Chi phí mỗi thế hệ ở vài cỡ (population * n), khớp đường thẳng bằng bình phương tối thiểu
+    units, per_generation = [], []
+    for n, population in ((20, 20), (60, 30), (150, 100)):
+        matrix = _random_matrix(n, rng)
+        nodes = list(range(n))
+        runs = [_timed(lambda: genetic_algorithm(matrix, nodes, population_size=population,
+                                                 generations=generations, stall_generations=0,
+                                                 seed=0, seed_fraction=Config.GA_SEED_FRACTION))
+                for generations in (1, 21)]
+        units.append(population * n)
+        per_generation.append(max(runs[1] - runs[0], 1e-6) / 20)
+    # Khởi tạo quần thể đo ở cỡ lớn nhất (ở cỡ nhỏ chủ yếu là chi phí cố định)
+    setup = runs[0] / n ** 2
+    ga_unit, ga_generation = np.polyfit(units, per_generation, 1)
+    ga_unit = max(float(ga_unit), 1e-10)
+    ga_generation = max(float(ga_generation), 0.0)
+
+    n = 200
+    matrix = _random_matrix(n, rng)
+    runs = [_timed(lambda: iterated_local_search(matrix, list(range(n)), seed=0,
+                                                 max_iterations=iterations))
+            for iterations in (0, 50)]
+
+    return {
+        'version': CALIBRATION_VERSION,
+        'measured_at': time.time(),
+        'held_karp': hk,
+        'ga_generation': ga_generation,
+        'ga_unit': ga_unit,
+        'ga_setup': setup,
+        'ils_setup': runs[0] / n ** 2,
+        'ils_iteration': max(runs[1] - runs[0], 1e-6) / 50
+    }
+
+def get_calibration():
+    """
+    Hệ số hiệu chỉnh của tiến trình hiện tại: đọc từ PLANNER_CALIBRATION_PATH nếu có
+    (các worker của pool dùng chung kết quả đã đo), không thì đo rồi lưu lại
+    """
+    global _calibration
+    with _lock:
+        if _calibration is not None:
+            return _calibration
+        path = Config.PLANNER_CALIBRATION_PATH
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+                if data.get('version') == CALIBRATION_VERSION:
+                    _calibration = data
+                    return _calibration
+            except (OSError, ValueError) as e:
+                logger.error(f"Cannot read planner calibration {path}: {str(e)}")
+
+        _calibration = calibrate()
+        logger.info(f"Planner calibration: {_calibration}")
+        if path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                with open(path, 'w') as f:
+                    json.dump(_calibration, f, indent=2)
+            except OSError as e:
+                logger.error(f"Cannot save planner calibration {path}: {str(e)}")
+        return _calibration
+
+def _ga_estimate(cal, n, population, generations):
+    return cal['ga_setup'] * n ** 2 + generations * (cal['ga_generation'] + cal['ga_unit'] * population * n)
+
+def plan_solve(n, budget, population_size=None, generations=None):
+    """
+    Chọn thuật toán và tham số cho bài N điểm với budget giây cho phần giải
+
+    - Held-Karp nếu N <= HELD_KARP_HARD_MAX_N và ước lượng thời gian vừa budget
+    - Branch-and-bound nếu N <= BRANCH_AND_BOUND_MAX_N (dừng ở budget, kèm gap)
+    - GA nếu N < LOCAL_SEARCH_MIN_N: quần thể theo N, số thế hệ lấp đầy budget
+      (giảm quần thể nếu không đủ MIN_GENERATIONS thế hệ)
+    - ILS cho N lớn hơn: độ sâu LK tăng khi budget cho phép nhiều lần nhiễu
+    population_size / generations do request chỉ định được giữ nguyên
+
+    Returns:
+        dict: algorithm, budget_ms, estimated_ms và các tham số của thuật toán đã chọn
+    """
+    cal = get_calibration()
+    budget = max(budget, 0.05)
+    plan = {'budget_ms': round(budget * 1000)}
+
+    if n <= HELD_KARP_HARD_MAX_N:
+        # Chỉ ước lượng khi N nhỏ: 2^(n-1) tràn float khi N > ~1025
+        hk_estimate = cal['held_karp'] * 2 ** (n - 1) * (n - 1) ** 2
+        if n <= Config.HELD_KARP_MAX_N or hk_estimate <= budget:
+            plan.update(algorithm='held_karp', estimated_ms=round(hk_estimate * 1000))
+            return plan
+
+    if Config.BRANCH_AND_BOUND_MAX_N and n <= Config.BRANCH_AND_BOUND_MAX_N:
+        plan.update(algorithm='branch_and_bound', estimated_ms=round(budget * 1000),
+                    time_limit_ms=round(budget * 1000))
+        return plan
+
+    if not Config.LOCAL_SEARCH_MIN_N or n < Config.LOCAL_SEARCH_MIN_N:
+        population = population_size or min(max(n, MIN_POPULATION * 2), MAX_POPULATION)
+        if generations is None:
+            available = budget - cal['ga_setup'] * n ** 2
+            per_generation = cal['ga_generation'] + cal['ga_unit'] * population * n
+            fits = available / per_generation
+            if population_size is None and fits < MIN_GENERATIONS:
+                # Không đủ thế hệ: giảm quần thể trước
+                population = int((available / MIN_GENERATIONS - cal['ga_generation'])
+                                 / (cal['ga_unit'] * n))
+                population = min(max(population, MIN_POPULATION), MAX_POPULATION)
+                per_generation = cal['ga_generation'] + cal['ga_unit'] * population * n
+                fits = available / per_generation
+            generations = int(min(max(fits, MIN_GENERATIONS), MAX_GENERATIONS))
+        plan.update(algorithm='genetic_algorithm', population_size=int(population),
+                    generations=int(generations),
+                    estimated_ms=round(_ga_estimate(cal, n, population, generations) * 1000))
+        return plan
+
+    iterations = (budget - cal['ils_setup'] * n ** 2) / cal['ils_iteration']
+    depth = 5 if iterations >= 10 * n else 4 if iterations >= 3 * n else 3
+    plan.update(algorithm='iterated_local_search', ls_depth=depth,
+                time_limit_ms=round(budget * 1000), estimated_ms=round(budget * 1000))
+    return plan
@@ -0,0 +1,103 @@
+
+# Cache kết quả giải theo (tọa độ, tham số) và gộp các request giống nhau đang chạy (single-flight)
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+from thuat_toan.worker_pool import DeadlineExceeded, PoolSaturated
+
+# Lỗi phụ thuộc vào thời hạn / thời điểm của riêng request dẫn đầu: request đang chờ
+# không nhận lỗi này mà tự giải lại theo thời hạn của mình
+_LEADER_ONLY_ERRORS = (DeadlineExceeded, PoolSaturated)
+
+class _Flight:
+    """Một lần giải đang chạy: các request cùng khóa chờ trên event"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class ResultCache:
+    """
+    - LRU giới hạn max_entries, mỗi kết quả hết hạn sau ttl giây
+    - Request trùng khóa với một lần giải đang chạy thì chờ lần giải đó thay vì
+      tự lấy ma trận / chạy thuật toán; lỗi của lần giải được trả cho mọi request đang chờ,
+      trừ lỗi hết thời hạn / pool đầy của request dẫn đầu (request chờ tự giải lại)
+    - Chỉ giữ kết quả thành công (có route) trên ma trận thật (không phải ước lượng khi
+      OSRM lỗi), không giữ ma trận
+    """
+
+    def __init__(self, max_entries: int = 500, ttl: float = 600, precision: int = 5):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.scale = 10 ** precision
+        self._entries: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._flights: Dict[tuple, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def make_key(self, points, **params) -> tuple:
+        """Khóa: tọa độ đã lượng tử hóa (giữ thứ tự vì route là chỉ số điểm) + tham số giải"""
+        coords = tuple((round(float(p['lat']) * self.scale), round(float(p['lng']) * self.scale))
+                       for p in points)
+        return (coords, tuple(sorted((name, repr(value)) for name, value in params.items())))
+
+    def get_or_compute(self, key: tuple, compute: Callable[[], Dict[str, Any]],
+                       deadline: float = None):
+        """
+        Returns:
+            (kết quả, nguồn): nguồn là 'hit' (có sẵn), 'coalesced' (chờ lần giải đang
+            chạy) hoặc 'miss' (tự giải). Kết quả luôn là bản sao, có thể sửa tự do
+        """
+        while True:
+            with self._lock:
+                cached = self._get(key)
+                if cached is not None:
+                    return dict(cached), 'hit'
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = _Flight()
+            if leader:
+                break
+
+            timeout = None if deadline is None else max(deadline - time.time(), 0)
+            if not flight.done.wait(timeout):
+                raise DeadlineExceeded("Không giải xong trong thời hạn của request.")
+            if flight.error is None:
+                return dict(flight.result), 'coalesced'
+            if not isinstance(flight.error, _LEADER_ONLY_ERRORS):
+                raise flight.error
+            # Request dẫn đầu hết thời hạn / bị từ chối: thử lại (dẫn đầu hoặc chờ lần mới)
+            # với thời hạn của chính request này
+
+        try:
+            result = compute()
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+            raise
+
+        shared = {k: v for k, v in result.items() if k != 'matrix'}
+        flight.result = shared
+        with self._lock:
+            del self._flights[key]
+            if shared.get('route') and not shared.get('estimated_matrix'):
+                self._entries[key] = {'result': shared, 'saved_at': time.time()}
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        flight.done.set()
+        return result, 'miss'
+
+    def _get(self, key) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry['saved_at'] > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry['result']
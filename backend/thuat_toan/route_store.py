@@ -0,0 +1,53 @@
+
+# Lưu các lời giải gần đây (điểm, route, ma trận) để request sau có thể warm start qua route_id
+
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+import numpy as np
+from thuat_toan.algorithms.matrix import to_cost_array
+
+class RouteStore:
+    """
+    - LRU giới hạn max_entries, mỗi lời giải hết hạn sau ttl giây
+    - Ma trận chỉ được giữ (float32) khi số điểm <= matrix_max_n để giới hạn bộ nhớ;
+      các bài lớn hơn vẫn warm start được, phần ma trận lấy lại từ cache khoảng cách
+    """
+
+    def __init__(self, max_entries: int = 200, ttl: float = 3600, matrix_max_n: int = 500):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.matrix_max_n = matrix_max_n
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def save(self, points: List[Dict[str, float]], route: List[int], matrix=None) -> str:
+        route_id = uuid.uuid4().hex
+        entry = {
+            'points': [{'lat': float(p['lat']), 'lng': float(p['lng'])} for p in points],
+            'route': [int(v) for v in route],
+            'matrix': None,
+            'saved_at': time.time()
+        }
+        if matrix is not None and len(points) <= self.matrix_max_n:
+            entry['matrix'] = to_cost_array(matrix, dtype=np.float32, copy=True)
+
+        with self._lock:
+            self._entries[route_id] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return route_id
+
+    def get(self, route_id: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(route_id)
+            if entry is None:
+                return None
+            if now - entry['saved_at'] > self.ttl:
+                del self._entries[route_id]
+                return None
+            self._entries.move_to_end(route_id)
+            return entry
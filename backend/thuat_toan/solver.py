@@ -2,11 +2,35 @@
 # Solver kết hợp OSRM và Chiến thuật lai (Held-Karp / GA+2Opt) để tìm đường đi ngắn nhất
 
 from __future__ import annotations
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+import numpy as np
 from typing import List, Dict, Any, Tuple
 from thuat_toan.algorithms.genetic_algorithm import genetic_algorithm
 from thuat_toan.algorithms.held_karp import held_karp
+from thuat_toan.algorithms.branch_and_bound import branch_and_bound
+from thuat_toan.algorithms.island_model import island_genetic_algorithm
+from thuat_toan.algorithms.local_search import iterated_local_search, repair_tour
+from thuat_toan.algorithms.decomposition import (
+    MIN_CLUSTER_SIZE, SEAM_SIDE, auto_cluster_size, choose_endpoints, order_clusters,
+    partition, path_from_tour, path_matrix, repair_seam
+)
+from thuat_toan.planner import plan_solve
+from thuat_toan.result_cache import ResultCache
+from thuat_toan.worker_pool import (
+    DEADLINE_GRACE, Admission, DeadlineExceeded, in_worker_process, pool_size
+)
 from thong_tin.osrm_service import OSRMService
+from thong_tin.stop_collapse import collapse_stops, expand_route
+from config import Config
 from utils.logger import logger
+from utils import metrics
+
+result_cache = ResultCache(
+    max_entries=Config.RESULT_CACHE_MAX_ENTRIES,
+    ttl=Config.RESULT_CACHE_TTL,
+    precision=Config.OSRM_CACHE_PRECISION
+)
 
 class MatrixGraph:
     """Wrapper để GA có thể đọc ma trận khoảng cách như một đồ thị"""
@@ -20,16 +44,151 @@ class MatrixGraph:
 
 class RouteSolver:
     """
-    - N <= 12: Held-Karp 
-    - N > 12: GA + 2-Opt 
+    Chọn thuật toán theo N (PLANNER_ENABLED: planner.plan_solve chọn theo mô hình chi phí
+    và thời gian còn lại, ngưỡng bên dưới là mặc định khi tắt planner):
+    - N <= HELD_KARP_MAX_N (mặc định 16): Held-Karp; planner dùng tới
+      HELD_KARP_HARD_MAX_N nếu ước lượng vừa thời gian
+    - N <= BRANCH_AND_BOUND_MAX_N (mặc định 30): Branch-and-bound (chính xác, hết giờ
+      thì trả về kèm gap)
+    - N < LOCAL_SEARCH_MIN_N (mặc định 300): GA + 2-Opt (GA_ISLANDS > 1: island model)
+    - N >= LOCAL_SEARCH_MIN_N: Iterated Local Search (Or-opt + LK)
+    - N >= DECOMPOSITION_MIN_N (mặc định 1000): phân cụm rồi giải từng cụm song song
+    - Có lời giải trước (warm start): sửa tour cũ bằng local search thay vì giải lại
     """
     
     def __init__(self, consider_traffic: bool = True):
         self.consider_traffic = consider_traffic
     
     def solve_from_coordinates(self, coordinates: List[Dict[str, float]],
-                               ga_population_size: int = 100,
-                               ga_generations: int = 100) -> Dict[str, Any]:
+                               on_progress=None, previous: Dict[str, Any] = None,
+                               profile=None, deadline: float = None,
+                               decomposition: bool = None,
+                               **solve_options) -> Dict[str, Any]:
+        """
+        Lấy ma trận khoảng cách từ OSRM rồi giải bằng solve_from_matrix
+        (solve_options: các tham số của solve_from_matrix)
+
+        previous: lời giải trước {'points', 'route', 'matrix' (có thể None)}; nếu có,
+            chỉ lấy các ô ma trận mới và sửa tour cũ thay vì giải lại (warm start)
+        Kết quả có thêm 'matrix' (ma trận đã dùng) để lưu lại cho lần warm start sau
+        profile: RequestProfile (utils/profiling.py) nhận thời gian các giai đoạn,
+            top hàm (cProfile) và bản ghi hội tụ; None = không đo gì thêm
+        deadline: thời hạn của request (time.time()); quá hạn -> DeadlineExceeded
+        decomposition: True / False để bật / tắt chế độ phân cụm (_solve_decomposed);
+            None = tự bật khi N >= DECOMPOSITION_MIN_N (khi đó bỏ qua previous)
+
+        Khi SOLVER_USE_PROCESS_POOL bật, phần giải chạy trên process pool dùng chung
+        (giữ chỗ trước khi lấy ma trận, đầy -> PoolSaturated); các request cần callback
+        tiến độ / hủy giữa chừng / profile vẫn giải ngay trong thread hiện tại
+
+        Khi RESULT_CACHE_ENABLED bật, request không warm start / tiến độ / profile đi qua
+        result_cache: trùng (tọa độ, tham số) với kết quả đã có hoặc lần giải đang chạy thì
+        dùng lại kết quả đó (seed None được thay bằng RESULT_CACHE_SEED để kết quả tái lập được)
+
+        Các điểm trùng / cách nhau không quá STOP_MERGE_RADIUS_M mét được gộp thành một
+        điểm trước khi giải (_solve_collapsed); route trả về vẫn theo chỉ số điểm gốc
+        """
+        if Config.STOP_MERGE_RADIUS_M >= 0 and len(coordinates) > 2:
+            reduced, groups = collapse_stops(coordinates, Config.STOP_MERGE_RADIUS_M)
+            if len(reduced) < len(coordinates):
+                return self._solve_collapsed(coordinates, reduced, groups, on_progress, previous,
+                                             profile, deadline, decomposition, solve_options)
+        return self._solve_points(coordinates, on_progress, previous, profile, deadline,
+                                  decomposition, solve_options)
+
+    def _solve_collapsed(self, coordinates, reduced, groups, on_progress, previous, profile,
+                         deadline, decomposition, solve_options):
+        """Giải bài đã gộp điểm rồi trải route (và route trong bản tin tiến độ) về chỉ số gốc"""
+        n = len(coordinates)
+        logger.info(f"Collapsed {n} stops into {len(reduced)} "
+                    f"(radius {Config.STOP_MERGE_RADIUS_M} m)")
+        if len(reduced) < 2:
+            return {
+                'route': list(range(n)) + [0],
+                'distance': 0,
+                'message': 'Các điểm trùng nhau, không cần tối ưu',
+                'stop_reason': 'optimal',
+                'merged_stops': n - 1
+            }
+
+        progress = None
+        if on_progress is not None:
+            def progress(update):
+                if 'route' in update:
+                    update = dict(update, route=expand_route(update['route'], groups))
+                on_progress(update)
+
+        result = self._solve_points(reduced, progress, previous, profile, deadline,
+                                    decomposition, solve_options)
+        if result.get('route'):
+            result['route'] = expand_route(result['route'], groups)
+        # Ma trận là của bài đã gộp, không dùng lại được cho các điểm gốc
+        result['matrix'] = None
+        result['merged_stops'] = n - len(reduced)
+        return result
+
+    def _solve_points(self, coordinates, on_progress, previous, profile, deadline, decomposition,
+                      solve_options):
+        if self._use_result_cache(on_progress, profile, previous, solve_options):
+            if solve_options.get('seed') is None:
+                solve_options = dict(solve_options, seed=Config.RESULT_CACHE_SEED)
+            key = result_cache.make_key(coordinates, consider_traffic=self.consider_traffic,
+                                        decomposition=decomposition, **solve_options)
+            result, source = result_cache.get_or_compute(
+                key,
+                lambda: self._dispatch(coordinates, on_progress, previous, profile, deadline,
+                                       decomposition, solve_options),
+                deadline=deadline
+            )
+            metrics.RESULT_CACHE.inc(outcome=source)
+            if source != 'miss':
+                logger.info(f"Result cache {source} for {len(coordinates)} points")
+            return result
+        return self._dispatch(coordinates, on_progress, previous, profile, deadline,
+                              decomposition, solve_options)
+
+    @staticmethod
+    def _use_result_cache(on_progress, profile, previous, solve_options):
+        return (Config.RESULT_CACHE_ENABLED and on_progress is None and profile is None
+                and previous is None and solve_options.get('cancel_event') is None)
+
+    def _dispatch(self, coordinates, on_progress, previous, profile, deadline, decomposition,
+                  solve_options):
+        if self._use_decomposition(len(coordinates), decomposition):
+            if self._use_pool(on_progress, profile, solve_options):
+                # Giữ tới một chỗ mỗi worker: các cụm chạy song song trên các chỗ của request
+                with Admission(count=pool_size(), minimum=1) as slot:
+                    return self._solve_decomposed(coordinates, on_progress, profile, deadline,
+                                                  slot, solve_options)
+            return self._solve_decomposed(coordinates, on_progress, profile, deadline,
+                                          None, solve_options)
+        if self._use_pool(on_progress, profile, solve_options):
+            # Island model: giữ tới một chỗ cho mỗi đảo (ít nhất một chỗ)
+            with Admission(count=self._islands(solve_options), minimum=1) as slot:
+                return self._fetch_and_solve(coordinates, on_progress, previous, profile,
+                                             deadline, slot, solve_options)
+        return self._fetch_and_solve(coordinates, on_progress, previous, profile,
+                                     deadline, None, solve_options)
+
+    @staticmethod
+    def _use_pool(on_progress, profile, solve_options):
+        return (Config.SOLVER_USE_PROCESS_POOL and on_progress is None and profile is None
+                and solve_options.get('cancel_event') is None and not in_worker_process())
+
+    @staticmethod
+    def _islands(solve_options):
+        islands = solve_options.get('ga_islands')
+        return max(islands if islands is not None else Config.GA_ISLANDS, 1)
+
+    @staticmethod
+    def _use_decomposition(n, decomposition):
+        if decomposition is None:
+            return bool(Config.DECOMPOSITION_MIN_N) and n >= Config.DECOMPOSITION_MIN_N
+        return bool(decomposition) and n >= 2 * MIN_CLUSTER_SIZE
+
+    def _fetch_and_solve(self, coordinates, on_progress, previous, profile, deadline, slot,
+                         solve_options):
+        started = time.time()
       
         n = len(coordinates)
         if n < 2:
@@ -41,13 +200,20 @@ class RouteSolver:
         
         
         # 1. Lấy Ma trận khoảng cách từ OSRM
-        import time
+        if on_progress is not None:
+            on_progress({'stage': 'matrix'})
         start_osrm = time.time()
-        matrix = OSRMService.get_distance_matrix(coordinates)
+        known = None
+        if previous is not None and previous.get('matrix') is not None:
+            known = (previous['points'], previous['matrix'])
+        matrix_info = {}
+        matrix = OSRMService.get_distance_matrix(coordinates, known=known, info=matrix_info)
         end_osrm = time.time()
         logger.info(f"OSRM Request Time: {end_osrm - start_osrm:.4f}s")
+        if profile is not None:
+            profile.record('matrix', end_osrm - start_osrm)
         
-        if not matrix:
+        if matrix is None:
             logger.error("Failed to get distance matrix from OSRM")
             return {
                 'route': [],
@@ -57,42 +223,525 @@ class RouteSolver:
             
         logger.info(f"Using OSRM Distance Matrix for {n} points")
         
+        options = dict(solve_options, started=started, deadline=deadline)
+        if slot is not None and self._islands_in_parent(n, previous, options):
+            # Các đảo được gửi lên pool từ tiến trình này, mỗi đảo trên một chỗ của request
+            result = self.solve_from_matrix(matrix, executor=slot, **options)
+        elif slot is not None:
+            result = slot.run(solve_task, matrix, coordinates, previous, options, deadline=deadline)
+        elif profile is None:
+            result = self._solve(matrix, coordinates, previous, on_progress=on_progress, **options)
+        else:
+            with profile.phase('solve'), profile.profiling():
+                result = self._solve(matrix, coordinates, previous, on_progress=on_progress,
+                                     trace=profile.trace, **options)
+        record_solve_metrics(result, n)
+        result['matrix'] = matrix
+        if matrix_info.get('estimated'):
+            mark_estimated(result)
+        return result
+    
+    def _islands_in_parent(self, n, previous, options):
+        """
+        Island model chạy ở tiến trình chính (các đảo song song trên pool) thay vì cả bài
+        trong một worker (ở đó các đảo chỉ chạy lần lượt): khi có nhiều đảo, không warm
+        start và thuật toán được chọn là GA
+        """
+        if self._islands(options) <= 1 or previous is not None:
+            return False
+        time_limit_ms = options.get('time_limit_ms') or Config.GA_TIME_LIMIT_MS or None
+        algorithm, _ = self._choose_algorithm(n, time_limit_ms, options['started'],
+                                              options.get('deadline'),
+                                              options.get('ga_population_size'),
+                                              options.get('ga_generations'))
+        return algorithm == 'genetic_algorithm'
+
+    def _solve_decomposed(self, coordinates, on_progress, profile, deadline, slot,
+                          solve_options):
+        """
+        Cluster-first, route-second cho bài rất nhiều điểm:
+        1. Chia các điểm thành cụm theo vị trí (k-means), kích thước cụm lấy từ
+           DECOMPOSITION_CLUSTER_SIZE hoặc tự chọn theo N và số worker
+        2. Thứ tự các cụm: tour ngắn nhất qua tâm cụm; mỗi cụm có một điểm vào / điểm ra
+        3. Lấy ma trận riêng từng cụm (tổng số ô ~ N * kích thước cụm thay vì N^2), giải
+           mỗi cụm như đường đi từ điểm vào tới điểm ra, song song trên process pool
+        4. Nối các đường đi, sắp lại tối ưu một cửa sổ quanh mỗi chỗ nối (Held-Karp trên
+           ma trận riêng của cửa sổ) nên chặng nối giữa hai cụm luôn là khoảng cách thật
+        Thời gian tăng gần tuyến tính theo N vì mỗi cụm có kích thước giới hạn
+        slot: Admission của request (các cụm chạy trên các chỗ đã giữ), None = giải tại chỗ
+        """
+        started = time.time()
+        n = len(coordinates)
+        size = Config.DECOMPOSITION_CLUSTER_SIZE or auto_cluster_size(
+            n, pool_size(), Config.DECOMPOSITION_MAX_CLUSTER_SIZE)
+        clusters, xy = partition(coordinates, size, seed=solve_options.get('seed'))
+        order = order_clusters(np.array([xy[c].mean(axis=0) for c in clusters]))
+        endpoints = choose_endpoints(clusters, order, xy)
+        clusters = [clusters[c] for c in order]
+        logger.info(f"Decomposition: {n} points -> {len(clusters)} clusters (size ~{size})")
+
+        if on_progress is not None:
+            on_progress({'stage': 'matrix'})
+        options = dict(solve_options, started=started, deadline=deadline)
+        osrm_error = {
+            'route': [],
+            'distance': 0,
+            'message': 'Lỗi kết nối OSRM (Không lấy được dữ liệu bản đồ). Vui lòng thử lại.'
+        }
+
+        # Lấy ma trận cụm nào gửi giải cụm đó ngay, trong lúc lấy ma trận các cụm sau
+        matrix_time = 0.0
+        matrix_info = {}
+        jobs = []
+        for members, (entry, exit) in zip(clusters, endpoints):
+            start_osrm = time.time()
+            matrix = OSRMService.get_distance_matrix([coordinates[i] for i in members],
+                                                     info=matrix_info)
+            matrix_time += time.time() - start_osrm
+            if matrix is None:
+                logger.error("Failed to get cluster distance matrix from OSRM")
+                for _, _, job in jobs:
+                    if slot is not None:
+                        job.cancel()
+                return osrm_error
+            extended = path_matrix(matrix, members.index(entry), members.index(exit))
+            if slot is not None:
+                try:
+                    job = slot.submit(solve_matrix_task, extended, options, deadline=deadline)
+                except DeadlineExceeded:
+                    for _, _, other in jobs:
+                        other.cancel()
+                    raise
+            else:
+                job = self.solve_from_matrix(extended, **options)
+            jobs.append((members, matrix, job))
+        logger.info(f"OSRM Request Time: {matrix_time:.4f}s")
+        if profile is not None:
+            profile.record('matrix', matrix_time)
+        if on_progress is not None:
+            on_progress({'stage': 'solving', 'generation': 0})
+
+        # Ghép đường đi của các cụm; legs[t] = chặng tour[t] -> tour[t + 1]
+        tour, legs, starts = [], [], []
+        generations = 0
+        for index, (members, matrix, job) in enumerate(jobs):
+            result = job if slot is None else self._wait_cluster(jobs, index, deadline)
+            path = path_from_tour(result['route'], len(members))
+            starts.append(len(tour))
+            tour.extend(members[i] for i in path)
+            legs.extend(float(matrix[a][b]) for a, b in zip(path, path[1:]))
+            # Chặng sang cụm kế tiếp chưa có trong ma trận nào: tính ở bước sửa chỗ nối
+            legs.append(float(matrix[path[-1]][path[0]]) if len(jobs) == 1 else None)
+            generations += result.get('generations', 0)
+
+        start_seams = time.time()
+        if len(clusters) > 1:
+            for t, start in enumerate(starts):
+                before = min(SEAM_SIDE, len(clusters[t - 1]) // 2)
+                after = min(SEAM_SIDE, len(clusters[t]) // 2)
+                positions = [(start - before + j) % n for j in range(before + after)]
+                window = [tour[p] for p in positions]
+                start_osrm = time.time()
+                matrix = OSRMService.get_distance_matrix([coordinates[i] for i in window],
+                                                         info=matrix_info)
+                matrix_time += time.time() - start_osrm
+                if matrix is None:
+                    logger.error("Failed to get seam distance matrix from OSRM")
+                    return osrm_error
+                seam_order, seam_legs = repair_seam(matrix)
+                for j, p in enumerate(positions):
+                    tour[p] = window[seam_order[j]]
+                for j, leg in enumerate(seam_legs):
+                    legs[positions[j]] = leg
+        if profile is not None:
+            profile.record('seams', time.time() - start_seams)
+
+        first = tour.index(0)
+        route = tour[first:] + tour[:first]
+        elapsed = time.time() - started - matrix_time
+        logger.info(f"Algorithm Execution Time: {elapsed:.4f}s")
+
+        result = {
+            'route': route + route[:1],
+            'distance': round(sum(legs) / 1000.0, 2),
+            'message': f'Tối ưu thành công bằng phân cụm ({len(clusters)} cụm, mỗi cụm GA / ILS)',
+            'generations': generations,
+            'stop_reason': 'decomposition',
+            'algorithm': 'decomposition',
+            'algorithm_time': elapsed,
+            'matrix': None
+        }
+        record_solve_metrics(result, n)
+        if matrix_info.get('estimated'):
+            mark_estimated(result)
+        return result
+
+    @staticmethod
+    def _wait_cluster(jobs, index, deadline):
+        """Chờ kết quả một cụm trên pool; quá hạn thì hủy các cụm còn chờ"""
+        timeout = None if deadline is None else max(deadline - time.time(), 0) + DEADLINE_GRACE
+        try:
+            return jobs[index][2].result(timeout=timeout)
+        except FutureTimeout:
+            for _, _, job in jobs[index:]:
+                job.cancel()
+            raise DeadlineExceeded("Không giải xong trong thời hạn của request.")
+
+    def _solve(self, matrix, coordinates, previous, **solve_options):
+        result = None
+        if previous is not None:
+            result = self.repair_from_previous(matrix, coordinates, previous)
+        if result is None:
+            result = self.solve_from_matrix(matrix, **solve_options)
+        return result
+    
+    def repair_from_previous(self, matrix, coordinates: List[Dict[str, float]],
+                             previous: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Warm start: giữ thứ tự cũ của các điểm không đổi (so khớp theo tọa độ), gỡ các
+        điểm đã bị xóa, chèn điểm mới rồi tìm kiếm cục bộ quanh vùng thay đổi.
+        Trả về None nếu nên giải lại từ đầu (bài nhỏ cho Held-Karp hoặc thay đổi quá nhiều)
+        """
+        n = len(coordinates)
+        if n <= Config.HELD_KARP_MAX_N:
+            return None
+
+        # Tọa độ -> các chỉ số mới (hỗ trợ điểm trùng nhau)
+        new_index = {}
+        for i, p in enumerate(coordinates):
+            new_index.setdefault((float(p['lat']), float(p['lng'])), []).append(i)
+
+        old_points = previous['points']
+        old_route = list(previous['route'])
+        if len(old_route) > 1 and old_route[0] == old_route[-1]:
+            old_route = old_route[:-1]
+
+        mapped = []
+        for old in old_route:
+            p = old_points[old]
+            candidates = new_index.get((float(p['lat']), float(p['lng'])))
+            mapped.append(candidates.pop(0) if candidates else None)
+
+        # Đầu mút của chỗ vừa gỡ điểm cũ cần được xét lại
+        touched = set()
+        for t, new in enumerate(mapped):
+            if new is None:
+                for neighbor in (mapped[t - 1], mapped[(t + 1) % len(mapped)]):
+                    if neighbor is not None:
+                        touched.add(neighbor)
+
+        partial = [new for new in mapped if new is not None]
+        if 0 in partial:
+            start = partial.index(0)
+            partial = partial[start:] + partial[:start]
+        else:
+            partial = [0] + partial
+        kept = set(partial)
+        new_stops = [i for i in range(n) if i not in kept]
+
+        if len(new_stops) > Config.WARM_START_MAX_CHANGE * n or len(partial) < 2:
+            return None
+
+        logger.info(f"Warm start: kept {len(partial)} stops, inserting {len(new_stops)}, "
+                    f"removed {mapped.count(None)}")
+        start_algo = time.time()
+        repaired = repair_tour(matrix, partial, new_stops, touched)
+        elapsed = time.time() - start_algo
+        logger.info(f"Algorithm Execution Time: {elapsed:.4f}s")
+
+        return {
+            'route': repaired['route'],
+            'distance': round(repaired['distance'] / 1000.0, 2),
+            'message': 'Cập nhật lộ trình từ lời giải trước (warm start)',
+            'generations': 0,
+            'stop_reason': 'warm_start',
+            'algorithm': 'warm_start',
+            'algorithm_time': elapsed
+        }
+    
+    def solve_from_matrix(self, matrix,
+                          ga_population_size: int = None,
+                          ga_generations: int = None,
+                          ga_islands: int = None,
+                          ga_migration_interval: int = None,
+                          seed: int = None,
+                          time_limit_ms: float = None,
+                          stall_generations: int = None,
+                          stall_time_ms: float = None,
+                          on_progress=None,
+                          cancel_event=None,
+                          started: float = None,
+                          trace: list = None,
+                          deadline: float = None,
+                          executor=None) -> Dict[str, Any]:
+        """
+        Giải bài toán trên ma trận khoảng cách có sẵn (mét)
+
+        time_limit_ms: ngân sách thời gian cho cả request (tính từ started, gồm cả
+            thời gian lấy ma trận); GA dừng và trả về lời giải tốt nhất khi hết giờ
+        stall_generations / stall_time_ms: dừng sớm khi GA không cải thiện
+        on_progress: callback(dict) nhận tiến độ (stage, generation, best_distance km,
+            route khi lời giải tốt nhất thay đổi)
+        cancel_event: threading.Event để hủy GA giữa chừng
+        trace: list (tùy chọn) nhận bản ghi hội tụ mỗi thế hệ GA / vòng ILS
+        deadline: thời điểm (time.time()) GA / ILS phải dừng, bất kể các giới hạn khác
+        executor: nơi gửi các đảo của island model (Admission của request), None = các đảo
+            chạy tuần tự trong tiến trình này
+        ga_population_size / ga_generations: None = do planner chọn (hoặc GA_POPULATION_SIZE /
+            GA_GENERATIONS khi tắt PLANNER_ENABLED)
+
+        Khi PLANNER_ENABLED bật, thuật toán và tham số do planner chọn theo mô hình chi phí
+        đã hiệu chỉnh để phần giải vừa time_limit_ms (hoặc PLANNER_TARGET_MS); kế hoạch
+        được trả về trong 'plan'. Khi tắt, chọn theo các ngưỡng N trong Config
+        """
+        if started is None:
+            started = time.time()
+        if time_limit_ms is None and Config.GA_TIME_LIMIT_MS:
+            time_limit_ms = Config.GA_TIME_LIMIT_MS
+        if stall_generations is None:
+            stall_generations = Config.GA_STALL_GENERATIONS
+        if stall_time_ms is None:
+            stall_time_ms = Config.GA_STALL_TIME_MS
+        
+        n = len(matrix)
+
+        algorithm, plan = self._choose_algorithm(n, time_limit_ms, started, deadline,
+                                                 ga_population_size, ga_generations)
+        if plan is not None:
+            ga_population_size = plan.get('population_size', ga_population_size)
+            ga_generations = plan.get('generations', ga_generations)
+            if time_limit_ms is None:
+                time_limit_ms = Config.PLANNER_TARGET_MS
+        if ga_population_size is None:
+            ga_population_size = Config.GA_POPULATION_SIZE
+        if ga_generations is None:
+            ga_generations = Config.GA_GENERATIONS
+        
         result_route = []
         result_distance = 0
         algo_name = ""
+        generations_run = 0
+        stop_reason = 'optimal'
+        optimality_gap = None
         
+        if on_progress is not None:
+            on_progress({'stage': 'solving', 'generation': 0})
         start_algo = time.time()
-        # 2. Chọn thuật toán dựa trên N
-        if n <= 12:
-            logger.info("N <= 12: Using Held-Karp Algorithm (Exact)")
+        # 2. Chạy thuật toán đã chọn
+        if algorithm == 'held_karp':
+            logger.info(f"N = {n}: Using Held-Karp Algorithm (Exact)")
             hk_result = held_karp(matrix)
             result_route = hk_result['route']
             result_distance = hk_result['distance']
             algo_name = "Held-Karp (Chính xác tuyệt đối)"
+            algo_key = 'held_karp'
+        elif algorithm == 'branch_and_bound':
+            logger.info(f"N = {n}: Using Branch-and-Bound (1-tree bounds)")
+            time_limit = Config.BRANCH_AND_BOUND_TIME_MS / 1000.0
+            if time_limit_ms:
+                time_limit = max(time_limit_ms / 1000.0 - (time.time() - started), 0)
+            time_limit = self._cap_to_deadline(time_limit, deadline)
+            bb_result = branch_and_bound(matrix, time_limit=time_limit, cancel_event=cancel_event)
+            result_route = bb_result['route']
+            result_distance = bb_result['distance']
+            stop_reason = bb_result['stop_reason']
+            optimality_gap = round(bb_result['gap'], 4)
+            if stop_reason == 'optimal':
+                algo_name = "Branch-and-Bound (Chính xác tuyệt đối)"
+            else:
+                algo_name = f"Branch-and-Bound (dừng sớm, sai khác tối đa {optimality_gap:.2%})"
+            algo_key = 'branch_and_bound'
+            logger.info(f"Branch-and-bound: {bb_result['nodes']} nodes, gap {optimality_gap} ({stop_reason})")
+        elif algorithm == 'iterated_local_search':
+            logger.info(f"N = {n}: Using Iterated Local Search (Or-opt + LK)")
+            time_limit = Config.LOCAL_SEARCH_TIME_MS / 1000.0
+            if time_limit_ms:
+                time_limit = max(time_limit_ms / 1000.0 - (time.time() - started), 0)
+            time_limit = self._cap_to_deadline(time_limit, deadline)
+            ls_result = iterated_local_search(
+                matrix,
+                list(range(n)),
+                seed=seed,
+                max_depth=plan['ls_depth'] if plan is not None else 3,
+                time_limit=time_limit,
+                stall_iterations=Config.LOCAL_SEARCH_STALL_ITERATIONS,
+                on_iteration=self._trace_reporter(self._progress_reporter(on_progress), trace),
+                cancel_event=cancel_event
+            )
+            result_route = ls_result['route']
+            result_distance = ls_result['distance']
+            generations_run = ls_result['generations']
+            stop_reason = ls_result['stop_reason']
+            algo_name = "Iterated Local Search (Or-opt + Lin-Kernighan)"
+            algo_key = 'iterated_local_search'
+            logger.info(f"ILS stopped after {generations_run} iterations ({stop_reason})")
         else:
-            logger.info("N > 12: Using Genetic Algorithm + 2-Opt")
+            logger.info(f"N = {n}: Using Genetic Algorithm + 2-Opt "
+                        f"(population {ga_population_size}, generations {ga_generations})")
             # PASS RAW MATRIX instead of Graph Wrapper for performance
             # graph = MatrixGraph(matrix) 
             nodes = list(range(n))
             
-            ga_result = genetic_algorithm(
-                matrix, # Pass matrix directly
-                nodes,
+            time_limit = None
+            if time_limit_ms:
+                # Phần ngân sách còn lại sau khi lấy ma trận
+                time_limit = max(time_limit_ms / 1000.0 - (time.time() - started), 0)
+            time_limit = self._cap_to_deadline(time_limit, deadline)
+            ga_options = dict(
                 population_size=ga_population_size,
-                generations=ga_generations
+                generations=ga_generations,
+                mutation_rate=Config.GA_MUTATION_RATE,
+                elite_size=Config.GA_ELITE_SIZE,
+                seed_fraction=Config.GA_SEED_FRACTION,
+                improvement=Config.GA_IMPROVEMENT,
+                seed=seed,
+                time_limit=time_limit,
+                stall_generations=stall_generations,
+                stall_time=stall_time_ms / 1000.0 if stall_time_ms else None,
+                on_generation=self._progress_reporter(on_progress),
+                cancel_event=cancel_event
             )
+            
+            islands = ga_islands if ga_islands is not None else Config.GA_ISLANDS
+            if islands > 1:
+                logger.info(f"Island model: {islands} islands")
+                # Các đảo chạy ở process khác nên chỉ ghi được khoảng cách tốt nhất mỗi epoch
+                ga_options['on_generation'] = self._trace_reporter(ga_options['on_generation'], trace)
+                ga_result = island_genetic_algorithm(
+                    matrix,
+                    nodes,
+                    islands=islands,
+                    migration_interval=ga_migration_interval or Config.GA_MIGRATION_INTERVAL,
+                    migration_size=Config.GA_MIGRATION_SIZE,
+                    executor=executor,
+                    deadline=deadline,
+                    **ga_options
+                )
+                algo_name = f"Island Memetic Algorithm ({islands} đảo, GA + 2-Opt)"
+                algo_key = 'island_model'
+            else:
+                ga_result = genetic_algorithm(
+                    matrix, # Pass matrix directly
+                    nodes,
+                    trace=trace,
+                    **ga_options
+                )
+                algo_name = "Memetic Algorithm (GA + 2-Opt)"
+                algo_key = 'genetic_algorithm'
             result_route = ga_result['route']
             result_distance = ga_result['distance']
-            algo_name = "Memetic Algorithm (GA + 2-Opt)"
+            generations_run = ga_result['generations']
+            stop_reason = ga_result['stop_reason']
+            logger.info(f"GA stopped after {generations_run} generations ({stop_reason})")
             
         end_algo = time.time()
         logger.info(f"Algorithm Execution Time: {end_algo - start_algo:.4f}s")
             
         # 3. Xử lý kết quả (Convert m -> km)
-        distance_km = result_distance / 1000.0
+        distance_km = float(result_distance) / 1000.0
             
-        return {
+        result = {
             'route': result_route, 
             'distance': round(distance_km, 2),
-            'message': f'Tối ưu thành công bằng {algo_name}'
+            'message': f'Tối ưu thành công bằng {algo_name}',
+            'generations': generations_run,
+            'stop_reason': stop_reason,
+            'algorithm': algo_key,
+            'algorithm_time': end_algo - start_algo
         }
+        if optimality_gap is not None:
+            # (cận trên - cận dưới) / cận trên: 0 nghĩa là đã chứng minh tối ưu
+            result['optimality_gap'] = optimality_gap
+        if plan is not None:
+            result['plan'] = plan
+        return result
+
+    def _choose_algorithm(self, n, time_limit_ms, started, deadline, population_size, generations):
+        """
+        (thuật toán, kế hoạch) cho bài N điểm: planner theo thời gian còn lại của
+        time_limit_ms (hoặc PLANNER_TARGET_MS), kế hoạch None khi tắt PLANNER_ENABLED
+        """
+        if not Config.PLANNER_ENABLED:
+            return self._default_algorithm(n), None
+        target = (time_limit_ms or Config.PLANNER_TARGET_MS) / 1000.0
+        budget = self._cap_to_deadline(max(target - (time.time() - started), 0), deadline)
+        plan = plan_solve(n, budget, population_size=population_size, generations=generations)
+        return plan['algorithm'], plan
+
+    @staticmethod
+    def _default_algorithm(n):
+        """Chọn thuật toán theo các ngưỡng N cố định (khi tắt planner)"""
+        if n <= Config.HELD_KARP_MAX_N:
+            return 'held_karp'
+        if Config.BRANCH_AND_BOUND_MAX_N and n <= Config.BRANCH_AND_BOUND_MAX_N:
+            return 'branch_and_bound'
+        if Config.LOCAL_SEARCH_MIN_N and n >= Config.LOCAL_SEARCH_MIN_N:
+            return 'iterated_local_search'
+        return 'genetic_algorithm'
+
+    @staticmethod
+    def _progress_reporter(on_progress):
+        """Chuyển callback mỗi thế hệ của GA thành bản tin tiến độ (km, route khi cải thiện)"""
+        if on_progress is None:
+            return None
+        last_distance = [None]
+
+        def report(generation, route, distance):
+            update = {
+                'stage': 'solving',
+                'generation': generation,
+                'best_distance': round(distance / 1000.0, 2)
+            }
+            if route is not None and distance != last_distance[0]:
+                last_distance[0] = distance
+                update['route'] = [int(v) for v in route] + [int(route[0])]
+            on_progress(update)
+
+        return report
+
+    @staticmethod
+    def _cap_to_deadline(time_limit, deadline):
+        if deadline is None:
+            return time_limit
+        remaining = max(deadline - time.time(), 0)
+        return remaining if time_limit is None else min(time_limit, remaining)
+
+    @staticmethod
+    def _trace_reporter(report, trace):
+        """Ghi khoảng cách tốt nhất mỗi vòng vào trace (ILS, island model) rồi gọi tiếp report"""
+        if trace is None:
+            return report
+
+        def record(generation, route, distance):
+            trace.append({'generation': generation, 'best_distance': distance})
+            if report is not None:
+                report(generation, route, distance)
+
+        return record
+
+def mark_estimated(result: Dict[str, Any]):
+    """
+    Kết quả giải trên ma trận ước lượng theo đường chim bay (không lấy được dữ liệu
+    OSRM): gắn cờ 'estimated_matrix' và không giữ ma trận cho warm start
+    """
+    result['estimated_matrix'] = True
+    result['matrix'] = None
+    result['message'] = (f"{result.get('message', '')} (khoảng cách ước lượng theo "
+                         f"đường chim bay do không kết nối được OSRM)")
+
+def record_solve_metrics(result: Dict[str, Any], n: int):
+    """Ghi metrics thời gian thuật toán / số thế hệ (ở tiến trình chính, kể cả khi giải trên pool)"""
+    algorithm = result.get('algorithm')
+    if algorithm is None:
+        return
+    metrics.ALGORITHM_TIME.observe(result['algorithm_time'], algorithm=algorithm, n_bucket=metrics.n_bucket(n))
+    if result.get('generations'):
+        metrics.GENERATIONS.inc(result['generations'], algorithm=algorithm)
+
+def solve_matrix_task(matrix, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Điểm vào cho process pool: giải một ma trận với các tham số cho trước"""
+    return RouteSolver().solve_from_matrix(matrix, **options)
+
+def solve_task(matrix, coordinates, previous, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Điểm vào cho process pool của /multi-route: warm start nếu được, không thì giải từ đầu"""
+    return RouteSolver()._solve(matrix, coordinates, previous, **options)
@@ -0,0 +1,146 @@
+
+# Process pool dùng chung cho các tác vụ tính toán nặng (island GA, ...)
+
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from config import Config
+
+_pool = None
+_pool_lock = threading.Lock()
+_in_worker = False
+_slots = None
+
+# Thời gian chờ thêm sau deadline để bài đang chạy kịp trả về lời giải tốt nhất (giây)
+DEADLINE_GRACE = 1.0
+
+class PoolSaturated(Exception):
+    """Mọi worker đều bận và hàng chờ đã đầy (API trả về 429)"""
+
+class DeadlineExceeded(Exception):
+    """Bài toán không xong trước thời hạn của request (API trả về 503)"""
+
+def _mark_worker():
+    global _in_worker
+    _in_worker = True
+    # Import trước các module nặng để request đầu tiên không phải chờ
+    import thuat_toan.solver  # noqa: F401
+
+def _warm_task():
+    # Giữ worker một lúc để mỗi worker nhận đúng một tác vụ khởi động
+    time.sleep(0.1)
+    return os.getpid()
+
+def in_worker_process() -> bool:
+    """True nếu đang chạy bên trong một tiến trình của pool (không tạo pool lồng nhau)"""
+    return _in_worker
+
+def pool_size() -> int:
+    return Config.SOLVER_WORKERS or os.cpu_count() or 1
+
+def queue_size() -> int:
+    return pool_size() if Config.SOLVER_QUEUE_SIZE < 0 else Config.SOLVER_QUEUE_SIZE
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Khởi tạo (lần đầu) và trả về process pool dùng chung, kích thước theo số lõi CPU"""
+    global _pool, _slots
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=pool_size(), initializer=_mark_worker)
+            # Số bài được nhận cùng lúc: đang chạy trên worker + đang chờ
+            _slots = threading.BoundedSemaphore(pool_size() + queue_size())
+    return _pool
+
+def warm_up():
+    """Khởi động sẵn toàn bộ worker (gọi lúc khởi động server, trước khi nhận request)"""
+    pool = get_process_pool()
+    futures = [pool.submit(_warm_task) for _ in range(pool_size())]
+    return len({future.result() for future in futures})
+
+class Admission:
+    """
+    Giữ chỗ trong pool (worker đang chạy + hàng chờ) cho một request, dùng với `with`
+    - count: số chỗ muốn giữ (số bài chạy song song tối đa của request); lấy được ít nhất
+      `minimum` chỗ (mặc định count) nếu không -> PoolSaturated ngay, không xếp hàng thêm
+    - submit() gửi bài lên pool trên một chỗ đang rảnh, hết chỗ thì chờ một bài của chính
+      request này xong; mỗi chỗ được trả khi bài trên đó chạy xong (hoặc khi thoát `with`
+      nếu chỗ đó đang rảnh)
+    """
+
+    def __init__(self, count=1, minimum=None):
+        get_process_pool()
+        count = max(count, 1)
+        minimum = count if minimum is None else min(max(minimum, 1), count)
+        held = 0
+        while held < count and _slots.acquire(blocking=False):
+            held += 1
+        if held < minimum:
+            for _ in range(held):
+                _slots.release()
+            raise PoolSaturated("Máy chủ đang quá tải, vui lòng thử lại sau.")
+        self.slots = held
+        self._held = held
+        self._running = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        with self._cond:
+            self._closed = True
+            free = self._held - self._running
+            self._held -= free
+        for _ in range(free):
+            _slots.release()
+        return False
+
+    def _task_done(self, _):
+        with self._cond:
+            self._running -= 1
+            release = self._closed
+            if release:
+                self._held -= 1
+            self._cond.notify()
+        if release:
+            _slots.release()
+
+    def submit(self, fn, *args, deadline=None):
+        """
+        Gửi fn(*args) lên pool trên một chỗ của request, trả về Future.
+        Mọi chỗ đều bận thì chờ tới deadline (time.time()), quá hạn -> DeadlineExceeded
+        """
+        with self._cond:
+            while self._running >= self._held:
+                timeout = None if deadline is None else deadline - time.time()
+                if (timeout is not None and timeout <= 0) or not self._cond.wait(timeout):
+                    raise DeadlineExceeded("Không giải xong trong thời hạn của request.")
+            self._running += 1
+        try:
+            future = get_process_pool().submit(fn, *args)
+        except BaseException:
+            self._task_done(None)
+            raise
+        future.add_done_callback(self._task_done)
+        return future
+
+    def run(self, fn, *args, deadline=None):
+        """
+        Chạy fn(*args) trên pool, chờ tới deadline (time.time()); quá hạn thì hủy bài
+        nếu còn đang chờ và raise DeadlineExceeded. fn nên tự dừng trước deadline vì bài
+        đã chạy thì không hủy được (chờ thêm DEADLINE_GRACE giây để nhận lời giải tốt nhất)
+        """
+        if deadline is not None and time.time() >= deadline:
+            raise DeadlineExceeded("Không giải xong trong thời hạn của request.")
+        return wait_result(self.submit(fn, *args, deadline=deadline), deadline)
+
+def wait_result(future, deadline=None):
+    """Kết quả của một bài trên pool, quá deadline (+ DEADLINE_GRACE) thì hủy bài và raise DeadlineExceeded"""
+    timeout = None if deadline is None else max(deadline - time.time(), 0) + DEADLINE_GRACE
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeout:
+        future.cancel()
+        raise DeadlineExceeded("Không giải xong trong thời hạn của request.")
@@ -0,0 +1,184 @@
+"""
+Metrics theo định dạng text của Prometheus (không cần thư viện ngoài)
+"""
+import bisect
+import threading
+
+# Bucket mặc định cho thời gian (giây)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RATIO_BUCKETS = (0.0, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1.0)
+
+# Ranh giới nhóm kích thước bài toán (N) dùng làm nhãn
+N_BUCKETS = (16, 50, 100, 300, 1000)
+
+def n_bucket(n):
+    """Nhãn nhóm kích thước bài toán, ví dụ '<=16', '17-50', '>1000'"""
+    lower = 1
+    for upper in N_BUCKETS:
+        if n <= upper:
+            return f"<={upper}" if lower == 1 else f"{lower}-{upper}"
+        lower = upper + 1
+    return f">{N_BUCKETS[-1]}"
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name}: cần các nhãn {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._render_samples(items))
+        return lines
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _render_samples(self, items):
+        return [f"{self.name}_total{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in items]
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [số mẫu theo từng bucket (không cộng dồn), tổng, số mẫu]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _render_samples(self, items):
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for upper, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ('le', _format_value(upper)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        """Toàn bộ metrics theo định dạng text exposition 0.0.4 của Prometheus"""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Registry mặc định dùng chung cho cả app
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.histogram(
+    'route_finder_http_request_duration_seconds',
+    'Thời gian xử lý HTTP request',
+    ('endpoint', 'method', 'status')
+)
+MATRIX_FETCH_TIME = registry.histogram(
+    'route_finder_matrix_fetch_seconds',
+    'Thời gian lấy các ô ma trận còn thiếu từ nguồn (OSRM / OSM cục bộ)',
+    ('provider',)
+)
+MATRIX_CACHE_HIT_RATIO = registry.histogram(
+    'route_finder_matrix_cache_hit_ratio',
+    'Tỉ lệ ô ma trận lấy từ cache / lời giải trước trong mỗi lần lấy ma trận',
+    buckets=RATIO_BUCKETS
+)
+MATRIX_CELLS = registry.counter(
+    'route_finder_matrix_cells',
+    'Số ô ma trận theo nguồn (cache, fetch hoặc estimate)',
+    ('source',)
+)
+OSRM_FAILURES = registry.counter(
+    'route_finder_osrm_failures',
+    'Số lần gọi OSRM thất bại',
+    ('reason',)
+)
+OSRM_HEDGES = registry.counter(
+    'route_finder_osrm_hedges',
+    'Request OSRM dự phòng: sent (đã gửi), skipped (bỏ qua vì đủ request thua đang chạy), primary / hedge (request nào trả lời trước)',
+    ('outcome',)
+)
+OSRM_CIRCUIT_OPEN = registry.counter(
+    'route_finder_osrm_circuit_open',
+    'Số lần ngắt mạch một máy chủ OSRM',
+    ('backend',)
+)
+ALGORITHM_TIME = registry.histogram(
+    'route_finder_algorithm_seconds',
+    'Thời gian chạy thuật toán theo thuật toán và nhóm kích thước N',
+    ('algorithm', 'n_bucket')
+)
+RESULT_CACHE = registry.counter(
+    'route_finder_result_cache_requests',
+    'Số request giải theo nguồn kết quả (hit, coalesced, miss)',
+    ('outcome',)
+)
+GENERATIONS = registry.counter(
+    'route_finder_generations',
+    'Số thế hệ GA / vòng lặp ILS đã chạy',
+    ('algorithm',)
+)
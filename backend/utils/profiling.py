@@ -0,0 +1,78 @@
+"""
+Profiling theo từng request (bật bằng cờ 'profile' trong payload)
+"""
+import cProfile
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+# cProfile không chạy lồng nhau được: mỗi lúc chỉ một request được lấy top hàm
+_profiler_lock = threading.Lock()
+
+class RequestProfile:
+    """
+    Thu thập cho một request:
+    - phases: thời gian từng giai đoạn (validate, matrix, solve, serialize)
+    - top_functions: các hàm tốn thời gian nhất theo cProfile trong giai đoạn giải
+    - trace: bản ghi hội tụ mỗi thế hệ GA / vòng ILS
+    """
+
+    def __init__(self, top=20):
+        self.top = top
+        self.phases = {}
+        self.trace = []
+        self.top_functions = None
+        self.note = None
+
+    def record(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    @contextmanager
+    def profiling(self):
+        """Chạy khối lệnh dưới cProfile (bỏ qua nếu request khác đang được profile)"""
+        if not _profiler_lock.acquire(blocking=False):
+            self.note = 'Bỏ qua cProfile vì request khác đang được profile'
+            yield
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+            self.top_functions = self._summarize(profiler)
+        finally:
+            _profiler_lock.release()
+
+    def _summarize(self, profiler):
+        stats = pstats.Stats(profiler).strip_dirs()
+        rows = []
+        for (filename, line, function), (_, calls, total, cumulative, _) in stats.stats.items():
+            rows.append({
+                'function': f"{filename}:{line}({function})",
+                'calls': calls,
+                'total_ms': round(total * 1000.0, 3),
+                'cumulative_ms': round(cumulative * 1000.0, 3)
+            })
+        rows.sort(key=lambda row: row['cumulative_ms'], reverse=True)
+        return rows[:self.top]
+
+    def to_dict(self):
+        result = {
+            'phases_ms': {name: round(seconds * 1000.0, 3) for name, seconds in self.phases.items()},
+            'top_functions': self.top_functions,
+            'trace': self.trace
+        }
+        if self.note:
+            result['note'] = self.note
+        return result
@@ -0,0 +1,30 @@
+"""
+Điểm khởi chạy cho môi trường production
+
+    python wsgi.py                 # chạy bằng waitress
+    waitress-serve --port=5000 wsgi:app
+"""
+import sys
+import os
+
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app import create_app
+from config import Config
+from thuat_toan.planner import get_calibration
+from thuat_toan.worker_pool import pool_size, warm_up
+from utils.logger import logger
+
+app = create_app()
+
+if __name__ == "__main__":
+    from waitress import serve
+
+    # Hiệu chỉnh planner trước (các worker đọc lại file hiệu chỉnh thay vì tự đo)
+    get_calibration()
+    # Khởi động sẵn các worker giải trước khi nhận request
+    if Config.SOLVER_USE_PROCESS_POOL:
+        logger.info(f"Solver process pool ready: {warm_up()}/{pool_size()} workers")
+    serve(app, host=Config.HOST, port=Config.PORT, threads=Config.SERVER_THREADS)
@@ -3,6 +3,7 @@ import { MapContainer, TileLayer, Marker, Popup, useMapEvents, Polyline } from '
 import L from 'leaflet';
 import 'leaflet/dist/leaflet.css';
 import apiService from '../../services/api';
+import { decodePolyline } from '../../services/polyline';
 import './Map.css';
 
 delete L.Icon.Default.prototype._getIconUrl;
@@ -12,6 +13,9 @@ L.Icon.Default.mergeOptions({
   shadowUrl: 'https://cdnjs.cloudflare.com/ajax/libs/leaflet/1.9.4/images/marker-shadow.png',
 });
 
+// Chờ sau lần zoom cuối trước khi tải lại hình dạng đường đi (ms)
+const ZOOM_REFETCH_DELAY_MS = 300;
+
 function MapClickHandler({ onMapClick }) {
   useMapEvents({
     click: (e) => {
@@ -22,6 +26,15 @@ function MapClickHandler({ onMapClick }) {
   return null;
 }
 
+function MapZoomHandler({ onZoomEnd }) {
+  useMapEvents({
+    zoomend: (e) => {
+      onZoomEnd(e.target.getZoom());
+    },
+  });
+  return null;
+}
+
 // Tạo icon marker 
 function createNumberedIcon(number) {
   return L.divIcon({
@@ -50,6 +63,10 @@ function Map() {
   const [isCalculating, setIsCalculating] = useState(false);
   const [routeError, setRouteError] = useState(null);
   const mapRef = useRef(null);
+  // Route đang vẽ bằng geometry của backend (điểm, thứ tự, zoom lúc tải) để tải lại khi zoom đổi
+  const shownRouteRef = useRef(null);
+  const geometryRequestRef = useRef(0);
+  const zoomTimerRef = useRef(null);
 
   const reverseGeocode = useCallback(async (lat, lng) => {
     try {
@@ -148,6 +165,8 @@ function Map() {
     if (isDeleting) return;
 
     setIsDeleting(true);
+    shownRouteRef.current = null;
+    geometryRequestRef.current += 1;
     setSelectedPoints([]);
     setRoutePath([]);
     setRouteDistance(null);
@@ -165,6 +184,48 @@ function Map() {
     checkBackendConnection();
   }, []);
 
+  useEffect(() => () => clearTimeout(zoomTimerRef.current), []);
+
+  // Căn bản đồ theo các tọa độ, resolve khi đã căn xong (kể cả animation zoom)
+  const fitMapTo = useCallback((coords) => new Promise((resolve) => {
+    const map = mapRef.current;
+    if (!map || coords.length === 0) {
+      resolve();
+      return;
+    }
+    map.once('moveend', () => resolve());
+    map.fitBounds(L.latLngBounds(coords), { padding: [50, 50] });
+  }), []);
+
+  // Lấy hình dạng đường đi (geometry từng chặng được cache, đã đơn giản hóa theo mức
+  // zoom hiện tại của bản đồ); trả về null nếu đã có request mới hơn
+  const loadGeometry = useCallback(async (points, routeIndices) => {
+    const requestId = ++geometryRequestRef.current;
+    const zoomLevel = mapRef.current ? mapRef.current.getZoom() : undefined;
+    const result = await apiService.getRouteGeometry(points, routeIndices, zoomLevel);
+    if (requestId !== geometryRequestRef.current) {
+      return null;
+    }
+    if (!result.polyline) {
+      throw new Error('Backend không trả về hình dạng đường đi');
+    }
+    setRoutePath([decodePolyline(result.polyline)]); // 1 đường liền mạch
+    shownRouteRef.current = { points, routeIndices, zoom: zoomLevel };
+    return result;
+  }, []);
+
+  // Zoom đổi: tải lại geometry theo mức zoom mới (debounce, bỏ qua nếu zoom không đổi)
+  const handleZoomEnd = useCallback((zoomLevel) => {
+    clearTimeout(zoomTimerRef.current);
+    zoomTimerRef.current = setTimeout(() => {
+      const shown = shownRouteRef.current;
+      if (!shown || shown.zoom === zoomLevel) return;
+      loadGeometry(shown.points, shown.routeIndices).catch((err) => {
+        console.warn('Lỗi tải lại hình dạng đường đi theo zoom:', err);
+      });
+    }, ZOOM_REFETCH_DELAY_MS);
+  }, [loadGeometry]);
+
   // Tìm route tối ưu
   const handleFindRoute = useCallback(async () => {
     if (selectedPoints.length < 2) {
@@ -174,16 +235,17 @@ function Map() {
 
     setIsCalculating(true);
     setRouteError(null);
+    shownRouteRef.current = null;
+    geometryRequestRef.current += 1;
     setRoutePath([]);
     setRouteDistance(null);
     setRouteLegs([]);
 
     try {
       // Bước 1: Gửi request lên backend để tìm thứ tự tối ưu
+      // Không gửi tham số GA: backend tự chọn theo số điểm và thời gian mục tiêu
       const data = await apiService.findMultiRoute(selectedPoints, {
-        consider_traffic: true,
-        ga_population_size: 100,
-        ga_generations: 500
+        consider_traffic: true
       });
 
       if (!data.route || data.route.length === 0) {
@@ -192,45 +254,24 @@ function Map() {
 
       const routeIndices = data.route;
 
-      // OPTIMIZATION: Gộp tất cả các điểm thành 1 request duy nhất gửi đến OSRM
-      // Giảm thời gian vẽ từ O(N) request xuống O(1) request
-      const orderedCoordinates = routeIndices
-        .map(idx => selectedPoints[idx])
-        .filter(p => p)
-        .map(p => `${p.lng},${p.lat}`)
-        .join(';');
-
+      // Bước 2: Căn bản đồ theo các điểm, đợi căn xong rồi mới lấy hình dạng đường đi
+      // để backend đơn giản hóa theo đúng mức zoom sẽ hiển thị
+      await fitMapTo(routeIndices.map(i => [selectedPoints[i].lat, selectedPoints[i].lng]));
       try {
-        const url = `https://routing.openstreetmap.de/routed-car/route/v1/driving/${orderedCoordinates}?overview=full&geometries=geojson`;
-        const response = await fetch(url);
-        const result = await response.json();
-
-        if (result.routes && result.routes.length > 0) {
-          const route = result.routes[0];
+        const result = await loadGeometry(selectedPoints, routeIndices);
 
+        if (result) {
           // Tổng quãng đường (km)
-          const totalDistanceKm = (route.distance / 1000).toFixed(2);
+          const totalDistanceKm = result.distance.toFixed(2);
           setRouteDistance(totalDistanceKm);
 
-          // Geometry: OSRM trả [lng, lat], Leaflet cần [lat, lng]
-          const geometry = route.geometry.coordinates.map(coord => [coord[1], coord[0]]);
-          setRoutePath([geometry]); // 1 đường liền mạch
-
           // Thông tin chi tiết các chặng (Legs)
-          const legs = route.legs.map((leg, index) => ({
-            from: routeIndices[index] + 1,
-            to: routeIndices[index + 1] + 1,
-            distance: leg.distance / 1000
+          const legs = result.legs.map(leg => ({
+            from: leg.from + 1,
+            to: leg.to + 1,
+            distance: leg.distance
           }));
           setRouteLegs(legs);
-
-          // Fit map
-          if (mapRef.current && geometry.length > 0) {
-            const bounds = L.latLngBounds(geometry);
-            mapRef.current.fitBounds(bounds, { padding: [50, 50] });
-          }
-        } else {
-          throw new Error('OSRM không trả về kết quả');
         }
       } catch (err) {
         console.warn('Lỗi hiển thị đường đi chi tiết (chuyển sang chế độ vẽ thẳng):', err);
@@ -264,12 +305,6 @@ function Map() {
         setRoutePath(fallbackPaths);
         setRouteDistance(fallbackTotalDist.toFixed(2));
         setRouteLegs(fallbackLegs);
-
-        if (mapRef.current && fallbackPaths.length > 0) {
-          const allCoords = fallbackPaths.flat();
-          const bounds = L.latLngBounds(allCoords);
-          mapRef.current.fitBounds(bounds, { padding: [50, 50] });
-        }
       }
 
     } catch (error) {
@@ -281,7 +316,7 @@ function Map() {
     } finally {
       setIsCalculating(false);
     }
-  }, [selectedPoints]);
+  }, [selectedPoints, fitMapTo, loadGeometry]);
 
   return (
     <div className="map-container">
@@ -382,15 +417,14 @@ function Map() {
         zoom={zoom}
         style={{ height: '100%', width: '100%' }}
         scrollWheelZoom={true}
-        whenCreated={(mapInstance) => {
-          mapRef.current = mapInstance;
-        }}
+        ref={mapRef}
       >
         <TileLayer
           url="https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png"
           attribution='&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors'
         />
         <MapClickHandler onMapClick={handleMapClick} />
+        <MapZoomHandler onZoomEnd={handleZoomEnd} />
         {routePath.length > 0 && routePath.map((path, idx) => (
           <Polyline
             key={`route-${idx}`}
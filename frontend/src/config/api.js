@@ -4,6 +4,7 @@ const API_CONFIG = {
   ENDPOINTS: {
     ROUTE: '/api/route',
     MULTI_ROUTE: '/api/multi-route',
+    ROUTE_GEOMETRY: '/api/route-geometry',
     HEALTH: '/health'
   },
 
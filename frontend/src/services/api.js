@@ -47,10 +47,14 @@ class ApiService {
         lat: point.lat,
         lng: point.lng
       })),
-      consider_traffic: options.consider_traffic !== false,
-      ga_population_size: options.ga_population_size || 100,
-      ga_generations: options.ga_generations || 500
+      consider_traffic: options.consider_traffic !== false
     };
+    if (options.ga_population_size) {
+      requestBody.ga_population_size = options.ga_population_size;
+    }
+    if (options.ga_generations) {
+      requestBody.ga_generations = options.ga_generations;
+    }
 
     const controller = new AbortController();
     const timeoutId = setTimeout(() => controller.abort(), this.timeout);
@@ -74,6 +78,25 @@ class ApiService {
     }
   }
 
+  async getRouteGeometry(points, route, zoom) {
+    const url = this.getFullUrl(API_CONFIG.ENDPOINTS.ROUTE_GEOMETRY);
+
+    const response = await fetch(url, {
+      ...API_CONFIG.DEFAULT_OPTIONS,
+      method: 'POST',
+      body: JSON.stringify({
+        points: points.map(point => ({
+          lat: point.lat,
+          lng: point.lng
+        })),
+        route,
+        zoom
+      })
+    });
+
+    return this.handleResponse(response);
+  }
+
   async checkHealth() {
     const url = this.getFullUrl(API_CONFIG.ENDPOINTS.HEALTH);
 
@@ -0,0 +1,28 @@
+// Giải mã Encoded Polyline (precision 5) thành mảng [lat, lng] cho Leaflet
+export function decodePolyline(encoded, precision = 5) {
+  const factor = Math.pow(10, precision);
+  const coordinates = [];
+  let index = 0;
+  let lat = 0;
+  let lng = 0;
+
+  while (index < encoded.length) {
+    const deltas = [];
+    for (let k = 0; k < 2; k++) {
+      let result = 0;
+      let shift = 0;
+      let byte;
+      do {
+        byte = encoded.charCodeAt(index++) - 63;
+        result |= (byte & 0x1f) << shift;
+        shift += 5;
+      } while (byte >= 0x20);
+      deltas.push(result & 1 ? ~(result >> 1) : result >> 1);
+    }
+    lat += deltas[0];
+    lng += deltas[1];
+    coordinates.push([lat / factor, lng / factor]);
+  }
+
+  return coordinates;
+}